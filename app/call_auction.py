@@ -0,0 +1,339 @@
+"""
+Periodic call auction: orders collected per settlement interval and cleared at one price
+"""
+
+import bisect
+import threading
+import time
+
+import numpy as np
+
+# Orders are cleared in int64 arrays. Prices only need to fit; each order's
+# amount is capped so an interval's cumulative totals stay far from overflow.
+MAX_PRICE = 2 ** 63 - 1
+MAX_ENERGY_AMOUNT = 2 ** 32 - 1
+
+
+def clear_orders(amounts, prices, is_buy):
+    """Uniform-price clearing of one interval's orders
+
+    The clearing price is where the aggregate demand curve (bid quantity
+    at or above a price) meets the supply curve (ask quantity at or below
+    it): the order price that trades the most energy, then leaves the
+    smallest surplus, then the middle one of those still tied. The short
+    side fills completely; on the long side better-priced orders fill first
+    and orders at the marginal price share what is left pro-rata.
+
+    Returns ``(price, volume, fills)`` where ``fills[i]`` is the quantity
+    order ``i`` trades; ``price`` is None when no bid reaches an ask.
+    Orders with a zero amount (cancelled) take no part.
+    """
+    amounts = np.asarray(amounts, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.int64)
+    is_buy = np.asarray(is_buy, dtype=bool)
+    fills = np.zeros(len(amounts), dtype=np.int64)
+
+    live = amounts > 0
+    bids = np.flatnonzero(live & is_buy)
+    asks = np.flatnonzero(live & ~is_buy)
+    if len(bids) == 0 or len(asks) == 0:
+        return None, 0, fills
+
+    bid_order = np.argsort(prices[bids], kind='stable')
+    bid_prices = prices[bids][bid_order]
+    bid_cumulative = np.concatenate(([0], np.cumsum(amounts[bids][bid_order])))
+    ask_order = np.argsort(prices[asks], kind='stable')
+    ask_prices = prices[asks][ask_order]
+    ask_cumulative = np.concatenate(([0], np.cumsum(amounts[asks][ask_order])))
+
+    # Only prices between the best ask and the best bid can trade anything
+    candidates = np.unique(prices[live])
+    candidates = candidates[(candidates >= ask_prices[0]) & (candidates <= bid_prices[-1])]
+    if len(candidates) == 0:
+        return None, 0, fills
+    demand = bid_cumulative[-1] - bid_cumulative[np.searchsorted(bid_prices, candidates, side='left')]
+    supply = ask_cumulative[np.searchsorted(ask_prices, candidates, side='right')]
+    volume = np.minimum(demand, supply)
+    surplus = np.abs(demand - supply)
+    best = np.flatnonzero(volume == volume.max())
+    best = best[surplus[best] == surplus[best].min()]
+    chosen = best[len(best) // 2]
+    price, volume = int(candidates[chosen]), int(volume[chosen])
+
+    buyers = bids[prices[bids] >= price]
+    sellers = asks[prices[asks] <= price]
+    fills[buyers] = _ration(amounts[buyers], -prices[buyers], volume)
+    fills[sellers] = _ration(amounts[sellers], prices[sellers], volume)
+    return price, volume, fills
+
+
+def _ration(amounts, priority, volume):
+    """Allocate ``volume`` to orders by ascending ``priority``, pro-rata within the marginal level
+
+    ``amounts`` must total at least ``volume``. Integer shares are rounded
+    down and the units left over go to the largest remainders, earliest
+    order first on ties.
+    """
+    total = int(amounts.sum())
+    if total == volume:
+        return amounts.copy()
+    fills = np.zeros(len(amounts), dtype=np.int64)
+    order = np.argsort(priority, kind='stable')
+    cumulative = np.cumsum(amounts[order])
+    marginal = priority[order[np.searchsorted(cumulative, volume, side='left')]]
+
+    better = priority < marginal
+    fills[better] = amounts[better]
+    level = np.flatnonzero(priority == marginal)
+    remaining = volume - int(fills.sum())
+    level_total = int(amounts[level].sum())
+    level_amounts = amounts[level]
+    if int(level_amounts.max()) * remaining > np.iinfo(np.int64).max:
+        # Exact products in Python ints; the shares themselves fit int64 again
+        level_amounts = level_amounts.astype(object)
+    products = level_amounts * remaining
+    shares = (products // level_total).astype(np.int64)
+    remainders = (products % level_total).astype(np.int64)
+    leftover = remaining - int(shares.sum())
+    if leftover:
+        shares[np.lexsort((level, -remainders))[:leftover]] += 1
+    fills[level] = shares
+    return fills
+
+
+class CallAuction:
+    """Collects orders per settlement interval and clears each interval in one batch
+
+    Orders are assigned to the interval ``timestamp // interval_seconds``
+    and stored column-wise, so clearing an interval is a handful of NumPy
+    sorts and cumulative sums over its orders (``clear_orders``) instead of
+    one matching step per order. Every filled order trades at the
+    interval's clearing price. Fills are netted per address into a
+    settlement, the arguments of a single EnergyTrading.settleAuction call,
+    which is passed to ``on_settlement``.
+    """
+
+    def __init__(self, interval_seconds=900, on_settlement=None):
+        if interval_seconds <= 0:
+            raise ValueError("Interval must be greater than 0 seconds")
+        self.interval_seconds = interval_seconds
+        self.on_settlement = on_settlement
+        self.order_counter = 0
+        self.results = {}  # interval id -> clearing result
+        self._intervals = {}  # interval id -> order columns
+        self._fills = {}  # interval id -> fill per order once cleared
+        self._order_interval = {}  # order id -> interval id
+        self._lock = threading.Lock()
+
+    def interval_of(self, timestamp):
+        """Id of the settlement interval containing ``timestamp``"""
+        return int(timestamp // self.interval_seconds)
+
+    def submit_order(self, user, energy_amount, price, is_buy_order, timestamp=None):
+        """Add an order to the interval containing ``timestamp`` (default: now)
+
+        Returns ``(order_id, interval_id)``.
+        """
+        if not 0 < energy_amount <= MAX_ENERGY_AMOUNT:
+            raise ValueError(f"Energy amount must be greater than 0 and at most {MAX_ENERGY_AMOUNT}")
+        if not 0 < price <= MAX_PRICE:
+            raise ValueError(f"Price must be greater than 0 and at most {MAX_PRICE}")
+
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        interval = self.interval_of(timestamp)
+        with self._lock:
+            if interval in self.results:
+                raise ValueError(f"Interval {interval} is already cleared")
+            columns = self._intervals.get(interval)
+            if columns is None:
+                columns = self._intervals[interval] = {
+                    'orderId': [], 'user': [], 'energyAmount': [], 'price': [], 'isBuyOrder': [], 'timestamp': []
+                }
+            self.order_counter += 1
+            order_id = self.order_counter
+            for key, value in (('orderId', order_id), ('user', user), ('energyAmount', energy_amount),
+                               ('price', price), ('isBuyOrder', is_buy_order), ('timestamp', timestamp)):
+                columns[key].append(value)
+            self._order_interval[order_id] = interval
+        return order_id, interval
+
+    def cancel_order(self, order_id, user):
+        """Withdraw an order owned by ``user`` before its interval clears"""
+        with self._lock:
+            interval, index = self._locate(order_id)
+            columns = self._intervals.get(interval)
+            if columns is None or columns['user'][index] != user:
+                raise PermissionError("Only order owner can cancel")
+            if interval in self.results or columns['energyAmount'][index] == 0:
+                raise ValueError("Order is not active")
+            columns['energyAmount'][index] = 0
+
+    def get_order(self, order_id):
+        """Order details; ``filledAmount`` and ``clearingPrice`` once its interval has cleared"""
+        with self._lock:
+            interval, index = self._locate(order_id)
+            if interval is None:
+                return None
+            columns = self._intervals[interval]
+            order = {key: values[index] for key, values in columns.items()}
+            order['intervalId'] = interval
+            order['isActive'] = interval not in self.results and order['energyAmount'] > 0
+            fills = self._fills.get(interval)
+            if fills is not None:
+                order['filledAmount'] = int(fills[index])
+                order['clearingPrice'] = self.results[interval]['clearingPrice'] if fills[index] else None
+            return order
+
+    def pending(self):
+        """``{interval id: orders}`` of the intervals not cleared yet"""
+        with self._lock:
+            return {interval: len(columns['orderId']) for interval, columns in sorted(self._intervals.items())
+                    if interval not in self.results}
+
+    def get_result(self, interval):
+        """Clearing result of an interval, or None if it hasn't cleared"""
+        with self._lock:
+            return self.results.get(interval)
+
+    def clear_due(self, now=None):
+        """Clear every collected interval that has ended by ``now``; returns their results"""
+        current = self.interval_of(time.time() if now is None else now)
+        with self._lock:
+            due = sorted(interval for interval in self._intervals
+                         if interval < current and interval not in self.results)
+        return [self.clear(interval) for interval in due]
+
+    def clear(self, interval):
+        """Clear one interval at its uniform price and close it to new orders
+
+        Returns the clearing result: price (None when nothing crossed),
+        volume, order counts and participants. Clearing an interval twice
+        returns the first result.
+        """
+        with self._lock:
+            if interval in self.results:
+                return self.results[interval]
+            # Claim the interval so orders are neither added nor cancelled while it clears
+            self.results[interval] = None
+            columns = self._intervals.setdefault(interval, {
+                'orderId': [], 'user': [], 'energyAmount': [], 'price': [], 'isBuyOrder': [], 'timestamp': []
+            })
+
+        try:
+            result, fills, settlement = self._clear_columns(interval, columns)
+        except Exception:
+            with self._lock:
+                del self.results[interval]
+            raise
+
+        with self._lock:
+            self.results[interval] = result
+            self._fills[interval] = fills
+        if settlement and self.on_settlement:
+            self.on_settlement(settlement)
+        return result
+
+    def _clear_columns(self, interval, columns):
+        start = time.perf_counter()
+        amounts = np.array(columns['energyAmount'], dtype=np.int64)
+        is_buy = np.array(columns['isBuyOrder'], dtype=bool)
+        price, volume, fills = clear_orders(amounts, columns['price'], is_buy)
+
+        settlement = None
+        buyers, sellers = [], []
+        if volume:
+            users = np.array(columns['user'], dtype=object)
+            buyers, bought = _net_fills(users, fills, is_buy)
+            sellers, sold = _net_fills(users, fills, ~is_buy)
+            settlement = {
+                'intervalId': interval,
+                'clearingPrice': price,
+                'energyAmount': volume,
+                'buyers': buyers,
+                'boughtAmounts': bought,
+                'sellers': sellers,
+                'soldAmounts': sold
+            }
+
+        result = {
+            'intervalId': interval,
+            'start': interval * self.interval_seconds,
+            'end': (interval + 1) * self.interval_seconds,
+            'clearingPrice': price,
+            'energyAmount': volume,
+            'demand': int(amounts[is_buy].sum()),
+            'supply': int(amounts[~is_buy].sum()),
+            'orders': int(np.count_nonzero(amounts)),
+            'filledOrders': int(np.count_nonzero(fills)),
+            'buyers': len(buyers),
+            'sellers': len(sellers),
+            'seconds': time.perf_counter() - start
+        }
+        return result, fills, settlement
+
+    def _locate(self, order_id):
+        """``(interval id, index)`` of an order in its interval's columns, or ``(None, None)``"""
+        interval = self._order_interval.get(order_id)
+        if interval is None:
+            return None, None
+        # Order ids only grow, so each interval's ids are sorted
+        return interval, bisect.bisect_left(self._intervals[interval]['orderId'], order_id)
+
+
+def settlement_parts(settlement, max_fills):
+    """Split a settlement into parts of at most ``max_fills`` fills whose bought and sold amounts balance
+
+    Buyers and sellers are paired off in order, so a buyer or seller whose
+    fill spans two parts appears in both with a share of it. Returns
+    ``(buyer_count, users, amounts)`` per part, the buyers first: the
+    arguments of one EnergyTrading.settleAuctionPart call.
+    """
+    if max_fills < 2:
+        raise ValueError("A part needs room for at least one buyer and one seller")
+    buyers = list(zip(settlement['buyers'], settlement['boughtAmounts']))
+    sellers = list(zip(settlement['sellers'], settlement['soldAmounts']))
+    parts = []
+    bought, sold = [], []
+    b = s = 0
+    buy_left, sell_left = buyers[0][1], sellers[0][1]
+    while b < len(buyers) and s < len(sellers):
+        new_buyer = not bought or bought[-1][0] != buyers[b][0]
+        new_seller = not sold or sold[-1][0] != sellers[s][0]
+        if len(bought) + len(sold) + new_buyer + new_seller > max_fills:
+            parts.append(_part(bought, sold))
+            bought, sold = [], []
+            new_buyer = new_seller = True
+        quantity = min(buy_left, sell_left)
+        for entries, user, new in ((bought, buyers[b][0], new_buyer), (sold, sellers[s][0], new_seller)):
+            if new:
+                entries.append([user, quantity])
+            else:
+                entries[-1][1] += quantity
+        buy_left -= quantity
+        sell_left -= quantity
+        if buy_left == 0:
+            b += 1
+            buy_left = buyers[b][1] if b < len(buyers) else 0
+        if sell_left == 0:
+            s += 1
+            sell_left = sellers[s][1] if s < len(sellers) else 0
+    if bought:
+        parts.append(_part(bought, sold))
+    return parts
+
+
+def _part(bought, sold):
+    """``(buyer_count, users, amounts)`` of one settlement part"""
+    entries = bought + sold
+    return len(bought), [user for user, _ in entries], [amount for _, amount in entries]
+
+
+def _net_fills(users, fills, side):
+    """Addresses (sorted) and total filled quantity per address for one side"""
+    filled = np.flatnonzero(side & (fills > 0))
+    if len(filled) == 0:
+        return [], []
+    addresses, inverse = np.unique(users[filled], return_inverse=True)
+    totals = np.zeros(len(addresses), dtype=np.int64)
+    np.add.at(totals, inverse, fills[filled])
+    return addresses.tolist(), [int(total) for total in totals]
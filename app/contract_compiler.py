@@ -0,0 +1,58 @@
+"""
+ABI and bytecode of EnergyTrading for in-process deployments (benchmarks, tests)
+"""
+
+import json
+import os
+import subprocess
+
+try:
+    import solcx
+except ImportError:
+    solcx = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTRACT_PATH = os.path.join('contracts', 'EnergyTrading.sol')
+SOLC_VERSION = '0.8.19'
+
+
+def read_source(revision=None):
+    """The contract source in the working tree, or at a git ``revision``"""
+    if revision is None:
+        with open(os.path.join(ROOT, CONTRACT_PATH)) as f:
+            return f.read()
+    return subprocess.run(['git', 'show', f'{revision}:{CONTRACT_PATH}'], cwd=ROOT, capture_output=True,
+                          text=True, check=True).stdout
+
+
+def compile_contract(source, solc_version=SOLC_VERSION, name='EnergyTrading'):
+    """``(abi, bytecode)`` of contract ``name`` compiled from ``source`` with the optimizer on
+
+    Needs py-solc-x; the solc binary is downloaded on first use.
+    """
+    if solcx is None:
+        raise RuntimeError("py-solc-x is not installed (pip install py-solc-x), pass a compiled artifact instead")
+    if solc_version not in [str(version) for version in solcx.get_installed_solc_versions()]:
+        print(f"Installing solc {solc_version}...")
+        solcx.install_solc(solc_version)
+    output = solcx.compile_source(source, output_values=['abi', 'bin'], solc_version=solc_version,
+                                  optimize=True, optimize_runs=200)
+    contract = next(value for key, value in output.items() if key.endswith(f':{name}'))
+    return contract['abi'], '0x' + contract['bin']
+
+
+def load_artifact(path):
+    """``(abi, bytecode)`` from a Hardhat/Truffle artifact or any JSON with ``abi`` and ``bytecode``"""
+    with open(path) as f:
+        artifact = json.load(f)
+    bytecode = artifact['bytecode']
+    if isinstance(bytecode, dict):  # solc standard JSON output
+        bytecode = bytecode['object']
+    return artifact['abi'], bytecode if bytecode.startswith('0x') else '0x' + bytecode
+
+
+def build_contract(artifact=None, revision=None):
+    """``(abi, bytecode)`` from ``artifact`` if given, else compiled from the source (at ``revision``)"""
+    if artifact:
+        return load_artifact(artifact)
+    return compile_contract(read_source(revision))
@@ -0,0 +1,380 @@
+"""
+Incremental EnergyTrading event indexer backed by a local SQLite store
+"""
+
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process only
+    fcntl = None
+
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+from web3._utils.events import get_event_data
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    energy_amount INTEGER NOT NULL,
+    remaining_amount INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    is_buy_order INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    updated_block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_user ON orders (user);
+CREATE INDEX IF NOT EXISTS idx_orders_status_price ON orders (status, is_buy_order, price);
+CREATE TABLE IF NOT EXISTS price_levels (
+    is_buy_order INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    energy_amount INTEGER NOT NULL,
+    orders INTEGER NOT NULL,
+    PRIMARY KEY (is_buy_order, price)
+);
+-- Keep price_levels equal to the aggregate of active orders on every write
+CREATE TRIGGER IF NOT EXISTS orders_level_insert AFTER INSERT ON orders WHEN NEW.status = 'active'
+BEGIN
+    INSERT INTO price_levels VALUES (NEW.is_buy_order, NEW.price, NEW.remaining_amount, 1)
+    ON CONFLICT (is_buy_order, price) DO UPDATE SET
+        energy_amount = energy_amount + NEW.remaining_amount, orders = orders + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS orders_level_delete AFTER DELETE ON orders WHEN OLD.status = 'active'
+BEGIN
+    UPDATE price_levels SET energy_amount = energy_amount - OLD.remaining_amount, orders = orders - 1
+    WHERE is_buy_order = OLD.is_buy_order AND price = OLD.price;
+    DELETE FROM price_levels WHERE is_buy_order = OLD.is_buy_order AND price = OLD.price AND orders = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS orders_level_update AFTER UPDATE OF status, remaining_amount ON orders
+BEGIN
+    UPDATE price_levels SET energy_amount = energy_amount - OLD.remaining_amount, orders = orders - 1
+    WHERE OLD.status = 'active' AND is_buy_order = OLD.is_buy_order AND price = OLD.price;
+    DELETE FROM price_levels WHERE is_buy_order = OLD.is_buy_order AND price = OLD.price AND orders = 0;
+    INSERT INTO price_levels SELECT NEW.is_buy_order, NEW.price, NEW.remaining_amount, 1 WHERE NEW.status = 'active'
+    ON CONFLICT (is_buy_order, price) DO UPDATE SET
+        energy_amount = energy_amount + NEW.remaining_amount, orders = orders + 1;
+END;
+CREATE TABLE IF NOT EXISTS trades (
+    trade_id INTEGER PRIMARY KEY,
+    buyer TEXT NOT NULL,
+    seller TEXT NOT NULL,
+    energy_amount INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_buyer ON trades (buyer);
+CREATE INDEX IF NOT EXISTS idx_trades_seller ON trades (seller);
+CREATE INDEX IF NOT EXISTS idx_trades_price ON trades (price);
+CREATE INDEX IF NOT EXISTS idx_trades_block ON trades (block_number);
+CREATE TABLE IF NOT EXISTS blocks (
+    block_number INTEGER PRIMARY KEY,
+    block_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    block_number INTEGER NOT NULL
+);
+"""
+
+
+class EventIndexer:
+    """Mirrors OrderPlaced, TradeExecuted and OrderCancelled events into SQLite
+
+    ``sync()`` reads logs from the block after the checkpoint up to the chain
+    head in ranges of ``batch_blocks``. Hashes of the last ``reorg_depth``
+    indexed blocks are kept. If the chain no longer agrees with them, the
+    store is rewound to the fork point and re-indexed. After a trade the
+    buy and sell orders it names are re-read from the contract. RPC calls
+    happen outside the database lock, so queries never wait on the node.
+
+    Several processes may open the same database file (one per server
+    worker). Only the one holding ``<db_path>.lock`` syncs; the others
+    just read.
+    """
+
+    def __init__(self, web3_helper, db_path=':memory:', start_block=0, batch_blocks=2000, reorg_depth=12):
+        if not web3_helper.contract:
+            raise ValueError("Contract not loaded")
+        self.web3_helper = web3_helper
+        self.w3 = web3_helper.w3
+        self.contract = web3_helper.contract
+        self.start_block = start_block
+        self.batch_blocks = batch_blocks
+        self.reorg_depth = reorg_depth
+        self.reorgs = 0
+        self.last_sync_seconds = None
+        self._sync_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.db_path = db_path
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        if db_path != ':memory:':
+            # Readers in other processes don't block the writer
+            self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self._active_count = self._count_active()
+
+        # topic0 -> event ABI for the events we index
+        self._events = {}
+        for event_abi in self.contract.abi:
+            if event_abi.get('type') == 'event' and event_abi['name'] in ('OrderPlaced', 'TradeExecuted', 'OrderCancelled'):
+                self._events[event_abi_to_log_topic(event_abi)] = event_abi
+
+    def _query(self, sql, params=()):
+        with self._db_lock:
+            return [dict(row) for row in self.db.execute(sql, params)]
+
+    def _count_active(self):
+        """Active order total from the price level aggregates"""
+        return self.db.execute("SELECT COALESCE(SUM(orders), 0) FROM price_levels").fetchone()[0]
+
+    @property
+    def checkpoint(self):
+        """Last fully indexed block number, or None"""
+        rows = self._query("SELECT block_number FROM checkpoint WHERE id = 1")
+        return rows[0]['block_number'] if rows else None
+
+    def sync(self):
+        """Index every new block up to the chain head; returns logs processed"""
+        with self._sync_lock:
+            start = time.perf_counter()
+            self._handle_reorg()
+
+            checkpoint = self.checkpoint
+            from_block = self.start_block if checkpoint is None else checkpoint + 1
+            head = self.w3.eth.block_number
+            processed = 0
+
+            while from_block <= head:
+                to_block = min(from_block + self.batch_blocks - 1, head)
+                logs = self.w3.eth.get_logs({
+                    'address': self.contract.address,
+                    'fromBlock': from_block,
+                    'toBlock': to_block
+                })
+                processed += self._apply_logs(logs, from_block, to_block)
+                from_block = to_block + 1
+
+            self.last_sync_seconds = time.perf_counter() - start
+            return processed
+
+    def _apply_logs(self, logs, from_block, to_block):
+        """Write a range of logs and advance the checkpoint in one transaction"""
+        placed, trades, cancelled, filled = [], [], [], set()
+        for log in logs:
+            event_abi = self._events.get(bytes(log['topics'][0])) if log['topics'] else None
+            if event_abi is None:
+                continue
+            event = get_event_data(self.w3.codec, event_abi, log)
+            args = event['args']
+            tx_hash = log['transactionHash'].hex()
+            block_number = log['blockNumber']
+
+            if event['event'] == 'OrderPlaced':
+                placed.append((args['orderId'], args['user'], args['energyAmount'], args['energyAmount'],
+                               args['price'], int(args['isBuyOrder']), block_number, block_number, tx_hash))
+            elif event['event'] == 'TradeExecuted':
+                trades.append((args['tradeId'], args['buyer'], args['seller'], args['energyAmount'],
+                               args['price'], block_number, tx_hash))
+                filled.update((args['buyOrderId'], args['sellOrderId']))
+            else:
+                cancelled.append((block_number, args['orderId']))
+
+        # Each trade names the two orders it partly or fully filled; trades
+        # settled from the off-chain book name order 0
+        filled.difference_update(order_id for _, order_id in cancelled)
+        filled.discard(0)
+        refreshed = self._read_orders(sorted(filled), to_block) if filled else []
+
+        block_hashes = self._read_block_hashes(from_block, to_block)
+
+        with self._db_lock, self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO orders VALUES (?, ?, ?, ?, ?, ?, 'active', ?, ?, ?)", placed
+            )
+            self.db.executemany("INSERT OR REPLACE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?)", trades)
+            self.db.executemany(
+                "UPDATE orders SET status = 'cancelled', updated_block = ? WHERE order_id = ?", cancelled
+            )
+            self._write_refreshed(refreshed)
+            self.db.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?)", block_hashes)
+            self.db.execute("DELETE FROM blocks WHERE block_number <= ?", (to_block - self.reorg_depth,))
+            self.db.execute("INSERT OR REPLACE INTO checkpoint VALUES (1, ?)", (to_block,))
+            self._active_count = self._count_active()
+        return len(logs)
+
+    def _read_orders(self, order_ids, block_number):
+        """On-chain state of ``order_ids`` at ``block_number`` as order table updates"""
+        updates = []
+        for order_id, order in self.web3_helper.get_orders(order_ids, block_identifier=block_number).items():
+            if order is None:
+                continue
+            status = 'active' if order['isActive'] else 'filled'
+            updates.append((order['energyAmount'], status, block_number, order_id))
+        return updates
+
+    def _write_refreshed(self, updates):
+        self.db.executemany(
+            "UPDATE orders SET remaining_amount = ?, status = ?, updated_block = ? "
+            "WHERE order_id = ? AND status != 'cancelled'",
+            updates
+        )
+
+    def _read_block_hashes(self, from_block, to_block):
+        """Hashes of the newly indexed blocks within the reorg window"""
+        first = max(to_block - self.reorg_depth + 1, from_block)
+        return [(number, self.w3.eth.get_block(number)['hash'].hex()) for number in range(first, to_block + 1)]
+
+    def _handle_reorg(self):
+        """Rewind to the last block whose hash still matches the chain"""
+        stored = self._query("SELECT block_number, block_hash FROM blocks ORDER BY block_number DESC")
+        if not stored:
+            return
+
+        head = self.w3.eth.block_number
+        fork_point = stored[-1]['block_number'] - 1
+        for row in stored:
+            number = row['block_number']
+            if number <= head and self.w3.eth.get_block(number)['hash'].hex() == row['block_hash']:
+                fork_point = number
+                break
+
+        if fork_point == stored[0]['block_number']:
+            return
+
+        print(f"Chain reorganization detected, rewinding index to block {fork_point}")
+        self.reorgs += 1
+        stale = [row['order_id'] for row in self._query(
+            "SELECT order_id FROM orders WHERE updated_block > ? AND block_number <= ?", (fork_point, fork_point)
+        )]
+        refreshed = self._read_orders(stale, fork_point)
+
+        with self._db_lock, self.db:
+            self.db.execute("DELETE FROM orders WHERE block_number > ?", (fork_point,))
+            self.db.execute("DELETE FROM trades WHERE block_number > ?", (fork_point,))
+            self.db.execute("DELETE FROM blocks WHERE block_number > ?", (fork_point,))
+            # Cancellations in rewound blocks are undone; re-indexing re-applies them
+            self.db.execute(
+                "UPDATE orders SET status = 'active', updated_block = block_number WHERE updated_block > ?",
+                (fork_point,)
+            )
+            self._write_refreshed(refreshed)
+            self.db.execute("INSERT OR REPLACE INTO checkpoint VALUES (1, ?)", (fork_point,))
+            self._active_count = self._count_active()
+
+    def get_order_book(self, levels=10):
+        """Aggregated active quantity per price level for both sides"""
+        return {
+            'bids': self._price_levels(1, levels),
+            'asks': self._price_levels(0, levels)
+        }
+
+    def _price_levels(self, is_buy_order, levels):
+        """Best ``levels`` price levels of one side from the trigger-maintained aggregates"""
+        order = 'DESC' if is_buy_order else 'ASC'
+        return self._query(
+            f"SELECT price, energy_amount, orders FROM price_levels "
+            f"WHERE is_buy_order = ? ORDER BY price {order} LIMIT ?",
+            (is_buy_order, levels)
+        )
+
+    def better_price_levels(self, price, is_buy_order, limit=3):
+        """Indexed level prices on one side better than ``price``, nearest first (hints for placing an order)"""
+        if is_buy_order:
+            sql = "SELECT price FROM price_levels WHERE is_buy_order = 1 AND price > ? ORDER BY price ASC LIMIT ?"
+        else:
+            sql = "SELECT price FROM price_levels WHERE is_buy_order = 0 AND price < ? ORDER BY price DESC LIMIT ?"
+        return [row['price'] for row in self._query(sql, (price, limit))]
+
+    def get_orders(self, user=None, status=None, limit=100):
+        """Orders, optionally filtered by user and status, newest first"""
+        query = "SELECT * FROM orders"
+        clauses, params = [], []
+        if user:
+            # Events store checksummed addresses
+            clauses.append("user = ?")
+            params.append(to_checksum_address(user))
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY order_id DESC LIMIT ?"
+        params.append(limit)
+        return self._query(query, params)
+
+    def get_trades(self, user=None, limit=100):
+        """Trade history, optionally for one user, newest first"""
+        if user:
+            user = to_checksum_address(user)
+            return self._query(
+                "SELECT * FROM trades WHERE buyer = ? UNION SELECT * FROM trades WHERE seller = ? "
+                "ORDER BY trade_id DESC LIMIT ?",
+                (user, user, limit)
+            )
+        return self._query("SELECT * FROM trades ORDER BY trade_id DESC LIMIT ?", (limit,))
+
+    def get_active_orders_count(self):
+        """Count of active orders without looping over the chain"""
+        return self._active_count
+
+    @property
+    def is_writer(self):
+        """Whether this process holds the database's writer lock"""
+        return self._lock_file is not None or fcntl is None or self.db_path == ':memory:'
+
+    def _acquire_writer(self):
+        """Try to become the single process that syncs this database file"""
+        if self.is_writer:
+            return True
+        lock_file = open(self.db_path + '.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def start(self, interval=2.0):
+        """Sync in a background daemon thread every ``interval`` seconds
+
+        If another process holds the writer lock, the thread keeps retrying
+        it and refreshes the cached active order count in the meantime.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    if self._acquire_writer():
+                        self.sync()
+                    else:
+                        with self._db_lock:
+                            self._active_count = self._count_active()
+                except Exception as e:
+                    print(f"Error indexing events: {e}")
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=run, name='event-indexer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._lock_file:
+            self._lock_file.close()  # releases the writer lock
+            self._lock_file = None
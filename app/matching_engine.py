@@ -0,0 +1,218 @@
+"""
+Off-chain price-time priority order book mirroring EnergyTrading.sol
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+
+
+class OrderBook:
+    """Continuous double auction with the same semantics as EnergyTrading.sol
+
+    Bids and asks live in binary heaps keyed by price then time, so placing
+    and matching an order costs O(log n) in the number of resting orders.
+    Trades execute at the seller's price for the minimum of the two remaining
+    quantities, exactly like ``_matchOrders``. Cancelled or filled orders are
+    removed lazily and the heaps are compacted once stale entries dominate.
+    Resting quantity is also kept per price level, so ``depth`` reads only
+    the distinct prices instead of every resting order.
+
+    Resting orders are always kept; of the filled or cancelled orders and of
+    the trades only the newest ``history`` of each stay available to
+    ``get_order`` and ``get_trade``, so memory stays bounded.
+    """
+
+    def __init__(self, on_trade=None, history=100000):
+        self.orders = {}
+        self.trades = {}
+        self.history = history
+        self.order_counter = 0
+        self.trade_counter = 0
+        self.on_trade = on_trade
+        self._bids = []  # (-price, timestamp, order_id)
+        self._asks = []  # (price, timestamp, order_id)
+        self._bid_levels = {}  # price -> resting quantity
+        self._ask_levels = {}
+        self._active_count = 0
+        self._inactive = deque()  # ids of filled or cancelled orders, oldest first
+        self._lock = threading.Lock()
+
+    def place_order(self, user, energy_amount, price, is_buy_order, timestamp=None):
+        """Place a buy or sell order and match it against the opposite side
+
+        Returns ``(order_id, trades)`` where ``trades`` lists the trades
+        executed by this order.
+        """
+        if energy_amount <= 0:
+            raise ValueError("Energy amount must be greater than 0")
+        if price <= 0:
+            raise ValueError("Price must be greater than 0")
+
+        with self._lock:
+            self.order_counter += 1
+            order_id = self.order_counter
+            order = {
+                'orderId': order_id,
+                'user': user,
+                'energyAmount': energy_amount,
+                'price': price,
+                'isBuyOrder': is_buy_order,
+                'timestamp': int(time.time()) if timestamp is None else timestamp,
+                'isActive': True
+            }
+            self.orders[order_id] = order
+            self._active_count += 1
+
+            trades = self._match(order)
+
+            if order['isActive']:
+                if is_buy_order:
+                    heapq.heappush(self._bids, (-price, order['timestamp'], order_id))
+                else:
+                    heapq.heappush(self._asks, (price, order['timestamp'], order_id))
+                self._adjust_level(order, order['energyAmount'])
+
+        if self.on_trade:
+            for trade in trades:
+                self.on_trade(trade)
+
+        return order_id, trades
+
+    def cancel_order(self, order_id, user):
+        """Cancel a resting order owned by ``user``"""
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None or order['user'] != user:
+                raise PermissionError("Only order owner can cancel")
+            if not order['isActive']:
+                raise ValueError("Order is not active")
+
+            self._adjust_level(order, -order['energyAmount'])
+            self._deactivate(order)
+            self._maybe_compact()
+        return True
+
+    def get_order(self, order_id):
+        """Get order details"""
+        order = self.orders.get(order_id)
+        return dict(order) if order else None
+
+    def get_trade(self, trade_id):
+        """Get trade details"""
+        trade = self.trades.get(trade_id)
+        return dict(trade) if trade else None
+
+    def get_active_orders_count(self):
+        """Get count of active orders in O(1)"""
+        return self._active_count
+
+    def best_bid(self):
+        """Highest active bid order, or None"""
+        with self._lock:
+            return self._peek(self._bids)
+
+    def best_ask(self):
+        """Lowest active ask order, or None"""
+        with self._lock:
+            return self._peek(self._asks)
+
+    def depth(self, levels=10):
+        """Aggregate resting quantity per price level for the top ``levels``"""
+        with self._lock:
+            bids = [(price, self._bid_levels[price]) for price in heapq.nlargest(levels, self._bid_levels)]
+            asks = [(price, self._ask_levels[price]) for price in heapq.nsmallest(levels, self._ask_levels)]
+        return {
+            'bids': [{'price': price, 'energyAmount': amount} for price, amount in bids],
+            'asks': [{'price': price, 'energyAmount': amount} for price, amount in asks]
+        }
+
+    def _match(self, order):
+        """Match an incoming order against the best opposite orders"""
+        trades = []
+        book = self._asks if order['isBuyOrder'] else self._bids
+
+        while order['isActive']:
+            resting = self._peek(book)
+            if resting is None:
+                break
+
+            if order['isBuyOrder']:
+                buy_order, sell_order = order, resting
+            else:
+                buy_order, sell_order = resting, order
+
+            # Check if buy price >= sell price
+            if buy_order['price'] < sell_order['price']:
+                break
+
+            trade_amount = min(buy_order['energyAmount'], sell_order['energyAmount'])
+
+            # Execute trade at the seller's price
+            self.trade_counter += 1
+            trade = {
+                'tradeId': self.trade_counter,
+                'buyOrderId': buy_order['orderId'],
+                'sellOrderId': sell_order['orderId'],
+                'buyer': buy_order['user'],
+                'seller': sell_order['user'],
+                'energyAmount': trade_amount,
+                'price': sell_order['price'],
+                'timestamp': order['timestamp'],
+                'isCompleted': True,
+                'isCancelled': False
+            }
+            self.trades[self.trade_counter] = trade
+            self.trades.pop(self.trade_counter - self.history, None)
+            trades.append(trade)
+
+            # Update order amounts; only the resting order counts towards its level
+            self._adjust_level(resting, -trade_amount)
+            for matched in (buy_order, sell_order):
+                if matched['energyAmount'] == trade_amount:
+                    self._deactivate(matched)
+                else:
+                    matched['energyAmount'] -= trade_amount
+
+        self._maybe_compact()
+        return trades
+
+    def _deactivate(self, order):
+        """Mark an order inactive; its heap entry is discarded lazily"""
+        order['isActive'] = False
+        self._active_count -= 1
+        self._inactive.append(order['orderId'])
+        if len(self._inactive) > self.history:
+            del self.orders[self._inactive.popleft()]
+
+    def _peek(self, book):
+        """Return the best active order on one side, dropping stale entries"""
+        while book:
+            order = self.orders.get(book[0][2])
+            if order and order['isActive']:
+                return order
+            heapq.heappop(book)
+        return None
+
+    def _maybe_compact(self):
+        """Rebuild the heaps when inactive entries outnumber active ones"""
+        if len(self._bids) + len(self._asks) > 2 * self._active_count + 1024:
+            self._bids = [entry for entry in self._bids if self._is_active(entry[2])]
+            self._asks = [entry for entry in self._asks if self._is_active(entry[2])]
+            heapq.heapify(self._bids)
+            heapq.heapify(self._asks)
+
+    def _is_active(self, order_id):
+        """Whether an order is still resting; evicted orders are not"""
+        order = self.orders.get(order_id)
+        return bool(order and order['isActive'])
+
+    def _adjust_level(self, order, quantity):
+        """Add ``quantity`` (negative to remove) to the resting total at the order's price"""
+        levels = self._bid_levels if order['isBuyOrder'] else self._ask_levels
+        total = levels.get(order['price'], 0) + quantity
+        if total:
+            levels[order['price']] = total
+        else:
+            del levels[order['price']]
@@ -0,0 +1,280 @@
+"""
+Prometheus text-format metrics and an opt-in sampling profiler for slow requests
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from app.rpc_provider import LATENCY_BUCKETS, LatencyHistogram
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestMetrics:
+    """Per-route request counters, latency histograms and in-flight gauges
+
+    Also holds latency histograms for named hot-path operations (model
+    inference and the like), recorded with ``timed``. Safe to update from
+    the server's request threads.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests = Counter()  # (route, method, status) -> count
+        self.latency = {}          # (route, method) -> LatencyHistogram
+        self.in_flight = Counter()  # route -> requests being served
+        self.operations = {}       # (operation, labels) -> LatencyHistogram
+        self._lock = threading.Lock()
+
+    def start(self, route):
+        with self._lock:
+            self.in_flight[route] += 1
+
+    def finish(self, route, method, status, seconds):
+        with self._lock:
+            self.in_flight[route] -= 1
+            self.requests[(route, method, str(status))] += 1
+            histogram = self.latency.get((route, method))
+            if histogram is None:
+                histogram = self.latency[(route, method)] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.operations.get(key)
+            if histogram is None:
+                histogram = self.operations[key] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timed(self, name, **labels):
+        """Record the duration of the ``with`` block in the ``<name>_seconds`` histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self):
+        """Prometheus exposition lines for the request and operation metrics"""
+        with self._lock:
+            requests = sorted(self.requests.items())
+            latency = sorted(self.latency.items())
+            in_flight = sorted(self.in_flight.items())
+            operations = sorted(self.operations.items())
+        lines = metric_header('http_requests_total', 'counter', 'HTTP requests served')
+        lines += [sample('http_requests_total', count, route=route, method=method, status=status)
+                  for (route, method, status), count in requests]
+        lines += metric_header('http_request_duration_seconds', 'histogram', 'HTTP request latency')
+        for (route, method), histogram in latency:
+            lines += histogram_samples('http_request_duration_seconds', histogram, route=route, method=method)
+        lines += metric_header('http_requests_in_flight', 'gauge', 'HTTP requests being served')
+        lines += [sample('http_requests_in_flight', count, route=route) for route, count in in_flight]
+        names = sorted({operation for (operation, _), _ in operations})
+        for name in names:
+            metric = f'{name}_seconds'
+            lines += metric_header(metric, 'histogram', f'Duration of {name.replace("_", " ")}')
+            for (operation, labels), histogram in operations:
+                if operation == name:
+                    lines += histogram_samples(metric, histogram, **dict(labels))
+        return lines
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def sample(name, value, **labels):
+    """One exposition line; None values become NaN"""
+    if labels:
+        name += '{' + ','.join(f'{key}="{escape(val)}"' for key, val in labels.items()) + '}'
+    if value is None:
+        return f'{name} NaN'
+    if isinstance(value, bool):
+        value = int(value)
+    return f'{name} {value}'
+
+
+def metric_header(name, metric_type, help_text):
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+
+
+def histogram_samples(name, histogram, **labels):
+    """Cumulative ``le`` buckets, sum and count of a LatencyHistogram"""
+    return bucket_samples(name, zip(histogram.buckets + (float('inf'),), histogram.counts),
+                          histogram.total, histogram.count, **labels)
+
+
+def bucket_samples(name, bounds_and_counts, total, count, **labels):
+    lines, cumulative = [], 0
+    for bound, bucket_count in bounds_and_counts:
+        cumulative += bucket_count
+        le = '+Inf' if bound == float('inf') else repr(float(bound))
+        lines.append(sample(f'{name}_bucket', cumulative, **labels, le=le))
+    lines.append(sample(f'{name}_sum', total, **labels))
+    lines.append(sample(f'{name}_count', count, **labels))
+    return lines
+
+
+def render_rpc_stats(stats):
+    """Exposition lines for PooledHTTPProvider.stats()"""
+    lines = metric_header('rpc_requests_total', 'counter', 'JSON-RPC calls to the node')
+    lines += [sample('rpc_requests_total', entry['count'], method=method) for method, entry in sorted(stats.items())]
+    lines += metric_header('rpc_errors_total', 'counter', 'JSON-RPC calls that failed')
+    lines += [sample('rpc_errors_total', entry['errors'], method=method) for method, entry in sorted(stats.items())]
+    lines += metric_header('rpc_retries_total', 'counter', 'JSON-RPC read retries')
+    lines += [sample('rpc_retries_total', entry['retries'], method=method) for method, entry in sorted(stats.items())]
+    lines += metric_header('rpc_request_duration_seconds', 'histogram', 'JSON-RPC call latency')
+    for method, entry in sorted(stats.items()):
+        buckets = [(float(bound), count) for bound, count in entry['buckets'].items()]
+        lines += bucket_samples('rpc_request_duration_seconds', buckets, entry['mean_ms'] / 1000 * entry['count'],
+                                entry['count'], method=method)
+    return lines
+
+
+def render_cache_stats(caches):
+    """Exposition lines for ``{name: cache.stats()}`` of PredictionCache-like caches"""
+    lines = []
+    for metric, key, metric_type, help_text in (
+        ('cache_hits_total', 'hits', 'counter', 'Cache lookups served from the cache'),
+        ('cache_misses_total', 'misses', 'counter', 'Cache lookups that computed the value'),
+        ('cache_evictions_total', 'evictions', 'counter', 'Entries evicted to stay within the size limit'),
+        ('cache_entries', 'entries', 'gauge', 'Entries currently cached'),
+        ('cache_hit_ratio', 'hit_rate', 'gauge', 'Hits over lookups since start')
+    ):
+        lines += metric_header(metric, metric_type, help_text)
+        lines += [sample(metric, stats.get(key), cache=name) for name, stats in sorted(caches.items())]
+    return lines
+
+
+def fold_stack(frame):
+    """``outer;...;inner`` function names of a frame's stack, as flamegraph tools read them"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Samples the stacks of request threads and keeps those of slow requests
+
+    While enabled, a background thread reads every registered request
+    thread's stack each ``interval`` seconds. When a request that took at
+    least ``slow_seconds`` ends, its samples are written to ``output_dir``
+    as a folded-stack file (``frame;frame;frame count`` per line), ready
+    for flamegraph.pl, speedscope or inferno. Only the newest
+    ``max_profiles`` files are kept. Disabled, it costs a dict lookup per
+    request.
+    """
+
+    def __init__(self, output_dir, interval=0.005, slow_seconds=0.5, max_profiles=100):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.slow_seconds = slow_seconds
+        self.max_profiles = max_profiles
+        self.enabled = False
+        self.samples_taken = 0
+        self.profiles_written = 0
+        self._active = {}  # thread id -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def configure(self, enabled=None, interval=None, slow_seconds=None):
+        if interval is not None:
+            if interval <= 0:
+                raise ValueError("interval must be greater than 0")
+            self.interval = interval
+        if slow_seconds is not None:
+            self.slow_seconds = slow_seconds
+        if enabled is True:
+            self.enabled = True
+            self._ensure_sampler()
+        elif enabled is False and self.enabled:
+            self.enabled = False
+            self._stop.set()
+            if self._thread is not None and self._thread.is_alive():
+                self._thread.join()
+            with self._lock:
+                self._active.clear()
+
+    def _ensure_sampler(self):
+        # Started lazily: a thread started before a fork (gunicorn's preload) is gone in the workers
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._thread.start()
+
+    def begin(self):
+        """Start sampling the calling (request) thread"""
+        if self.enabled:
+            if self._thread is None or not self._thread.is_alive():
+                self._ensure_sampler()
+            with self._lock:
+                self._active[threading.get_ident()] = Counter()
+
+    def end(self, label, seconds):
+        """Stop sampling the calling thread; write its stacks if the request was slow
+
+        Returns the profile's path, or None.
+        """
+        if not self._active:
+            return None
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if not stacks or seconds < self.slow_seconds:
+            return None
+        return self._write(label, seconds, stacks)
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, stacks in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None and ident != own_ident:
+                        stacks[fold_stack(frame)] += 1
+                self.samples_taken += 1
+
+    def _write(self, label, seconds, stacks):
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_')
+        with self._lock:
+            self.profiles_written += 1
+            number = self.profiles_written
+        path = os.path.join(self.output_dir,
+                            f'{time.strftime("%Y%m%dT%H%M%S")}-{number}-{int(seconds * 1000)}ms-{name}.folded')
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        for old in self.profiles()[self.max_profiles:]:
+            os.remove(os.path.join(self.output_dir, old))
+        return path
+
+    def profiles(self):
+        """Saved profile file names, newest first"""
+        if not os.path.isdir(self.output_dir):
+            return []
+        names = [name for name in os.listdir(self.output_dir) if name.endswith('.folded')]
+        return sorted(names, key=lambda name: os.path.getmtime(os.path.join(self.output_dir, name)), reverse=True)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'interval_ms': self.interval * 1000,
+            'slow_ms': self.slow_seconds * 1000,
+            'output_dir': self.output_dir,
+            'samples_taken': self.samples_taken,
+            'profiles_written': self.profiles_written,
+            'profiles': self.profiles()[:20]
+        }
@@ -0,0 +1,183 @@
+"""
+Versioned in-process registry for the solar energy prediction model
+"""
+
+import threading
+import time
+
+from ml.solar_predictor import SolarEnergyPredictor
+
+# Typical weather used to warm up a freshly loaded model
+WARMUP_WEATHER = [25.0, 60.0, 3.0, 20.0, 600.0]
+
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when a prediction is requested before any model is published"""
+
+
+class ModelRegistry:
+    """Holds the live predictor and hot-swaps new versions atomically
+
+    Readers call ``current()`` and keep the returned predictor for the rest
+    of their request, so publishing a new version never blocks or disturbs
+    in-flight predictions. Loading and training are serialized by a lock
+    that readers never take. With ``engine`` set, every published predictor
+    is switched to that prediction engine.
+    """
+
+    def __init__(self, predictor_factory=SolarEnergyPredictor, engine=None):
+        self.predictor_factory = predictor_factory
+        self.engine = engine
+        self._active = (0, None)  # (version, predictor), replaced as a unit
+        self._swap_lock = threading.Lock()
+        self._retrain_lock = threading.Lock()
+        self._listeners = []
+        self.startup_seconds = None
+        self.warmup_seconds = None
+        self.first_request_seconds = None
+        self.request_count = 0
+        self.last_loaded_at = None
+        self.last_source = None
+        self.last_error = None
+
+    @property
+    def version(self):
+        return self._active[0]
+
+    @property
+    def is_ready(self):
+        return self._active[1] is not None
+
+    @property
+    def retraining(self):
+        return self._retrain_lock.locked()
+
+    def current(self):
+        """Return ``(version, predictor)`` for the live model"""
+        version, predictor = self._active
+        if predictor is None:
+            raise ModelNotReadyError("Model is not loaded yet")
+        return version, predictor
+
+    def add_listener(self, callback):
+        """Call ``callback(version)`` every time a new model is published"""
+        self._listeners.append(callback)
+
+    def startup(self, train_if_missing=True):
+        """Load the saved model (or train one), warm it up and publish it"""
+        start = time.perf_counter()
+        predictor = self.predictor_factory()
+        source = 'disk'
+        if not predictor.load_model():
+            if not train_if_missing:
+                raise ModelNotReadyError("No saved model found")
+            predictor.train_model()
+            source = 'trained'
+        version = self.publish(predictor, source)
+        self.startup_seconds = time.perf_counter() - start
+        return version
+
+    def publish(self, predictor, source='manual'):
+        """Warm up a trained predictor and make it the live version"""
+        if not predictor.is_trained:
+            raise ValueError("Model must be trained before publishing")
+        if self.engine and predictor.engine != self.engine:
+            predictor.set_engine(self.engine)
+
+        warmup_start = time.perf_counter()
+        predictor.predict_energy(*WARMUP_WEATHER)
+        predictor.predict_batch([WARMUP_WEATHER] * 8)
+        warmup_seconds = time.perf_counter() - warmup_start
+
+        with self._swap_lock:
+            version = self._active[0] + 1
+            self._active = (version, predictor)
+            self.warmup_seconds = warmup_seconds
+            self.last_loaded_at = time.time()
+            self.last_source = source
+
+        for callback in self._listeners:
+            callback(version)
+
+        print(f"Model version {version} published from {source}")
+        return version
+
+    def reload(self):
+        """Load the model saved on disk into a new version"""
+        predictor = self.predictor_factory()
+        if not predictor.load_model():
+            raise ModelNotReadyError("No saved model found")
+        return self.publish(predictor, 'disk')
+
+    def retrain(self, data=None, background=True, incremental=False):
+        """Train a new model off the request path and publish it when done
+
+        With ``incremental`` the live model is copied and grown with trees
+        fitted on ``data`` only (warm start) instead of refitting from
+        scratch. Returns the background thread, or the new version when
+        ``background`` is False. Only one retrain runs at a time.
+        """
+        if incremental:
+            _, live = self.current()
+        if not self._retrain_lock.acquire(blocking=False):
+            raise RuntimeError("A retrain is already in progress")
+
+        def run():
+            try:
+                if incremental and getattr(live, 'flat_only', False):
+                    # The flat export only predicts; grow the pickled forest it came from
+                    predictor = self.predictor_factory()
+                    if not predictor.load_model(model_format='joblib'):
+                        raise ModelNotReadyError("No saved joblib model to update")
+                    predictor.update_model(data if data is not None else predictor.generate_sample_data())
+                elif incremental:
+                    predictor = live.clone()
+                    predictor.update_model(data if data is not None else predictor.generate_sample_data())
+                else:
+                    predictor = self.predictor_factory()
+                    predictor.train_model(data)
+                self.last_error = None
+                return self.publish(predictor, 'updated' if incremental else 'retrained')
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error retraining model: {e}")
+            finally:
+                self._retrain_lock.release()
+
+        if not background:
+            return run()
+
+        thread = threading.Thread(target=run, name='model-retrain', daemon=True)
+        thread.start()
+        return thread
+
+    def set_engine(self, engine):
+        """Publish a copy of the live model using ``engine``; later versions use it too"""
+        _, live = self.current()
+        predictor = live.clone()
+        predictor.set_engine(engine)
+        self.engine = engine
+        return self.publish(predictor, 'engine')
+
+    def record_request(self, seconds):
+        """Record the latency of a prediction request"""
+        self.request_count += 1
+        if self.first_request_seconds is None:
+            self.first_request_seconds = seconds
+
+    def stats(self):
+        """Version and latency figures for the metrics endpoint"""
+        return {
+            'version': self.version,
+            'ready': self.is_ready,
+            'engine': getattr(self._active[1], 'engine', None),
+            'source': self.last_source,
+            'loaded_at': self.last_loaded_at,
+            'retraining': self.retraining,
+            'last_error': self.last_error,
+            'startup_seconds': self.startup_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'first_request_seconds': self.first_request_seconds,
+            'request_count': self.request_count,
+            'last_training': getattr(self._active[1], 'last_training_stats', None)
+        }
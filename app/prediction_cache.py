@@ -0,0 +1,132 @@
+"""
+Bounded LRU/TTL memo cache for single-row solar energy predictions
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from ml.solar_predictor import FEATURE_COLUMNS
+
+# Bucket width per feature; inputs falling in the same bucket share a prediction
+DEFAULT_QUANTIZATION = {
+    'temperature': 0.5,       # °C
+    'humidity': 1.0,          # %
+    'wind_speed': 0.5,        # m/s
+    'cloud_cover': 1.0,       # %
+    'solar_radiation': 10.0   # W/m²
+}
+
+
+class PredictionCache:
+    """Memoizes predictions keyed on quantized weather features
+
+    Each feature is snapped to a bucket of width ``quantization[name]``
+    (``0``/``None`` keeps it exact). The cache holds at most ``max_entries``
+    keys, evicting the least recently used one, and entries expire after
+    ``ttl_seconds``. Call ``invalidate()`` whenever the model changes.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=300, quantization=None):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.quantization = dict(DEFAULT_QUANTIZATION)
+        if quantization:
+            self.quantization.update(quantization)
+        self._steps = [self.quantization.get(name) or 0 for name in FEATURE_COLUMNS]
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, features, version=None):
+        """Quantize the five weather features into a hashable cache key
+
+        ``version`` is the model version that produced the value, so a result
+        computed by a model that was swapped out mid-request is never served.
+        """
+        return (version,) + tuple(
+            round(value / step) if step else value
+            for value, step in zip(features, self._steps)
+        )
+
+    def get(self, features, version=None):
+        """Return the cached prediction for ``features`` or None"""
+        key = self.make_key(features, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, features, value, version=None):
+        """Store a prediction, evicting the least recently used entry if full"""
+        key = self.make_key(features, version)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, features, compute, version=None):
+        """Return ``(value, cached)``, calling ``compute()`` on a miss"""
+        value = self.get(features, version)
+        if value is not None:
+            return value, True
+        value = compute()
+        self.put(features, value, version)
+        return value, False
+
+    def invalidate(self, *_):
+        """Drop every entry, e.g. after a new model version is published"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Counters for the status endpoint"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'quantization': self.quantization
+        }
+
+
+class ForecastCache(PredictionCache):
+    """Memoizes whole /forecast responses keyed on (site, issue time, series digest)
+
+    Dashboards poll the same forecast until the next issue, so the key is
+    the site, the forecast issue time and a digest of the hourly weather
+    sent with it; a changed series under the same issue time misses.
+    """
+
+    def make_key(self, key, version=None):
+        return (version,) + tuple(key)
+
+    def stats(self):
+        stats = super().stats()
+        del stats['quantization']
+        return stats
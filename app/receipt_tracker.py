@@ -0,0 +1,81 @@
+"""
+Background settlement tracking for orders submitted through /trade
+"""
+
+import threading
+from collections import OrderedDict
+
+from web3.exceptions import TransactionNotFound
+
+
+class ReceiptTracker:
+    """Records the order and trade ids produced by each submitted transaction
+
+    Hooks into the Web3Helper receipt poller, so receipts are decoded on the
+    poller's background thread and request handlers only read the results.
+    """
+
+    def __init__(self, web3_helper, max_history=10000):
+        self.web3_helper = web3_helper
+        self.max_history = max_history
+        self.results = OrderedDict()  # tx_hash -> decoded events
+        self._lock = threading.Lock()
+        web3_helper.receipt_poller.add_listener(self.handle_receipt)
+
+    def handle_receipt(self, tx_hash, receipt):
+        """Decode contract events from a mined transaction"""
+        try:
+            decoded = self.web3_helper.decode_order_events(receipt)
+        except Exception as e:
+            decoded = {'orders': [], 'trades': [], 'cancelled_order_ids': [], 'error': str(e)}
+
+        with self._lock:
+            self.results[tx_hash] = decoded
+            while len(self.results) > self.max_history:
+                self.results.popitem(last=False)
+
+    def get(self, tx_hash):
+        """Status of a submitted transaction with the ids it produced, or None"""
+        status = self.web3_helper.get_transaction_status(tx_hash)
+        if status is None:
+            status = self._lookup(tx_hash)
+            if status is None:
+                return None
+
+        decoded = self.results.get(tx_hash)
+        status['events_decoded'] = decoded is not None
+        status['order_ids'] = [order['orderId'] for order in decoded['orders']] if decoded else []
+        status['trades'] = decoded['trades'] if decoded else []
+        status['cancelled_order_ids'] = decoded['cancelled_order_ids'] if decoded else []
+        if decoded and 'error' in decoded:
+            status['decode_error'] = decoded['error']
+        return status
+
+    def _lookup(self, tx_hash):
+        """Status of a transaction this process didn't submit, read from the node
+
+        Covers requests served by another worker or before a restart.
+        """
+        w3 = self.web3_helper.w3
+        record = {'tx_hash': tx_hash, 'status': 'pending', 'submitted_at': None,
+                  'block_number': None, 'gas_used': None, 'confirmed_at': None}
+        try:
+            receipt = w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            receipt = None
+        except Exception:
+            return None
+
+        if receipt is None:
+            try:
+                w3.eth.get_transaction(tx_hash)  # known to the node but not mined yet
+            except Exception:
+                return None
+            return record
+
+        if tx_hash not in self.results:
+            self.handle_receipt(tx_hash, receipt)
+        record['status'] = 'confirmed' if receipt['status'] == 1 else 'failed'
+        record['block_number'] = receipt['blockNumber']
+        record['gas_used'] = receipt['gasUsed']
+        return record
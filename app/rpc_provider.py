@@ -0,0 +1,179 @@
+"""
+Shared, connection-pooled HTTP JSON-RPC provider with read retries and latency metrics
+"""
+
+import bisect
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+DEFAULT_RPC_URL = "http://127.0.0.1:7545"
+
+# Methods that only read node state and are safe to send again after a failure.
+# Anything else (eth_sendRawTransaction in particular) is never retried.
+READ_METHODS = frozenset({
+    'web3_clientVersion', 'net_version', 'eth_chainId', 'eth_blockNumber', 'eth_gasPrice',
+    'eth_getBalance', 'eth_getCode', 'eth_getStorageAt', 'eth_getTransactionCount',
+    'eth_call', 'eth_estimateGas', 'eth_getLogs', 'eth_getBlockByNumber', 'eth_getBlockByHash',
+    'eth_getBlockReceipts', 'eth_getTransactionByHash', 'eth_getTransactionReceipt',
+    'eth_feeHistory', 'eth_maxPriorityFeePerGas', 'eth_accounts'
+})
+
+# Answers that never change for an endpoint; web3's validation middleware
+# otherwise asks for eth_chainId before every eth_call
+CACHED_METHODS = frozenset({'eth_chainId', 'net_version'})
+
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# Upper bounds in seconds, Prometheus-style
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile, or None if empty"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+
+class PooledHTTPProvider(Web3.HTTPProvider):
+    """HTTPProvider over one keep-alive session with timeouts, read retries and per-method metrics
+
+    The session keeps up to ``pool_size`` connections open to the node and
+    callers beyond that wait for a free connection rather than opening new
+    sockets. Read methods are retried up to ``max_retries`` times with
+    exponential backoff on connection errors, timeouts and 429/5xx replies.
+    The chain id is fetched once and then answered locally.
+    """
+
+    def __init__(self, endpoint_uri=DEFAULT_RPC_URL, pool_size=10, timeout=10.0, max_retries=3, backoff=0.1):
+        super().__init__(endpoint_uri, request_kwargs={'timeout': timeout})
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._cached = {}  # method -> result for CACHED_METHODS
+        self._metrics = {}  # method -> {'latency': LatencyHistogram, 'errors': int, 'retries': int}
+        self._metrics_lock = threading.Lock()
+
+    def make_request(self, method, params):
+        if method in self._cached:
+            return {'jsonrpc': '2.0', 'id': 0, 'result': self._cached[method]}
+        response = self._post(method, self.encode_rpc_request(method, params), method in READ_METHODS)
+        decoded = self.decode_rpc_response(response.content)
+        if method in CACHED_METHODS and 'result' in decoded:
+            self._cached[method] = decoded['result']
+        return decoded
+
+    def make_batch_request(self, calls):
+        """POST a JSON-RPC batch; retried only if every call in it is a read"""
+        method = 'batch:' + (calls[0]['method'] if calls else 'empty')
+        retryable = all(call['method'] in READ_METHODS for call in calls)
+        body = self._post(method, calls, retryable, as_json=True).json()
+        # A node rejecting the whole batch answers with a single error object
+        if isinstance(body, dict):
+            raise ValueError(body.get('error', body))
+        return body
+
+    def _post(self, method, payload, retryable, as_json=False):
+        """Send one HTTP request, retrying reads, and record its latency"""
+        attempts = 1 + (self.max_retries if retryable else 0)
+        start = time.perf_counter()
+        for attempt in range(attempts):
+            try:
+                if as_json:
+                    response = self.session.post(self.endpoint_uri, json=payload, **self.get_request_kwargs())
+                else:
+                    response = self.session.post(self.endpoint_uri, data=payload, **self.get_request_kwargs())
+                if response.status_code in RETRY_STATUS_CODES and attempt + 1 < attempts:
+                    raise requests.HTTPError(f"{response.status_code} from node", response=response)
+                response.raise_for_status()
+                self._record(method, time.perf_counter() - start, retries=attempt)
+                return response
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                retry = attempt + 1 < attempts and (
+                    not isinstance(e, requests.HTTPError) or e.response.status_code in RETRY_STATUS_CODES
+                )
+                if not retry:
+                    self._record(method, time.perf_counter() - start, retries=attempt, error=True)
+                    raise
+                time.sleep(min(self.backoff * 2 ** attempt, 2.0))
+
+    def _record(self, method, seconds, retries=0, error=False):
+        with self._metrics_lock:
+            entry = self._metrics.get(method)
+            if entry is None:
+                entry = self._metrics[method] = {'latency': LatencyHistogram(), 'errors': 0, 'retries': 0}
+            entry['latency'].observe(seconds)
+            entry['retries'] += retries
+            entry['errors'] += int(error)
+
+    def stats(self):
+        """Per-method call counts, errors, retries and latency percentiles"""
+        with self._metrics_lock:
+            return {
+                method: {
+                    'count': entry['latency'].count,
+                    'errors': entry['errors'],
+                    'retries': entry['retries'],
+                    'mean_ms': entry['latency'].total / entry['latency'].count * 1000,
+                    'p50_ms': entry['latency'].percentile(0.5) * 1000,
+                    'p95_ms': entry['latency'].percentile(0.95) * 1000,
+                    'p99_ms': entry['latency'].percentile(0.99) * 1000,
+                    'buckets': dict(zip([str(b) for b in entry['latency'].buckets] + ['+Inf'],
+                                        entry['latency'].counts))
+                }
+                for method, entry in self._metrics.items()
+            }
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(rpc_url=None, pool_size=None, timeout=None, max_retries=None):
+    """Shared PooledHTTPProvider for ``rpc_url``, created on first use
+
+    Unset arguments come from BLOCKCHAIN_RPC_URL, RPC_POOL_SIZE, RPC_TIMEOUT
+    and RPC_MAX_RETRIES. Every caller asking for the same URL gets the same
+    provider, so connections and metrics are shared process-wide.
+    """
+    rpc_url = rpc_url or os.environ.get('BLOCKCHAIN_RPC_URL', DEFAULT_RPC_URL)
+    with _providers_lock:
+        provider = _providers.get(rpc_url)
+        if provider is None:
+            provider = _providers[rpc_url] = PooledHTTPProvider(
+                rpc_url,
+                pool_size=pool_size or int(os.environ.get('RPC_POOL_SIZE', 10)),
+                timeout=timeout or float(os.environ.get('RPC_TIMEOUT', 10)),
+                max_retries=max_retries if max_retries is not None else int(os.environ.get('RPC_MAX_RETRIES', 3))
+            )
+        return provider
@@ -1,20 +1,138 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, g, request, jsonify, render_template_string
 from flask_cors import CORS
+from eth_account import Account
+from web3 import Web3
 import sys
 import os
+import threading
+import time
+import hashlib
+import json
+from collections import deque
+from functools import partial
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ml.solar_predictor import SolarEnergyPredictor
+from ml.solar_predictor import FEATURE_COLUMNS, SITE_MODELS_DIR, SolarEnergyPredictor
+from ml.vpp_optimizer import DEFAULT_BUY_PRICE, DEFAULT_CAPACITY, DEFAULT_EFFICIENCY, DEFAULT_SELL_PRICE, \
+    VPPOptimizer
 from app.web3_helper import Web3Helper
+from app.matching_engine import OrderBook
+from app.call_auction import CallAuction
+from app.model_registry import ModelRegistry, ModelNotReadyError
+from app.prediction_cache import ForecastCache, PredictionCache
+from app.site_registry import SiteModelRegistry
+from app.receipt_tracker import ReceiptTracker
+from app.event_indexer import EventIndexer
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics, SamplingProfiler, \
+    render_cache_stats, render_rpc_stats, metric_header, sample
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize components
-predictor = SolarEnergyPredictor()
+# Initialize components; the model is loaded once at startup, not per request.
+# Retraining fits trees on TRAIN_N_JOBS cores (-1: all of them); MODEL_FORMAT=flat
+# maps the saved FlatForest export instead of unpickling the sklearn model, and
+# PREDICT_ENGINE=lockstep predicts with NumPy instead of sklearn
+predictor_factory = partial(SolarEnergyPredictor, n_jobs=int(os.environ.get('TRAIN_N_JOBS', -1)),
+                            model_format=os.environ.get('MODEL_FORMAT', 'joblib'))
+model_registry = ModelRegistry(
+    predictor_factory=predictor_factory,
+    engine=os.environ.get('PREDICT_ENGINE') or None
+)
+
+# Per-site models (models/sites/<site>), loaded on first use; at most
+# SITE_MODELS_RESIDENT stay in memory and sites without one use the shared model
+site_registry = SiteModelRegistry(
+    root=os.environ.get('SITE_MODELS_DIR', SITE_MODELS_DIR),
+    max_resident=int(os.environ.get('SITE_MODELS_RESIDENT', 16)),
+    predictor_factory=predictor_factory,
+    engine=os.environ.get('PREDICT_ENGINE') or None
+)
 web3_helper = None
+receipt_tracker = None
+event_indexer = None
+
+# Local SQLite mirror of contract events, used by the /chain read endpoints
+EVENT_INDEX_DB = os.environ.get(
+    'EVENT_INDEX_DB',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'events.sqlite3')
+)
+
+# Memoized /predict results, dropped whenever a new model version is published
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+)
+model_registry.add_listener(prediction_cache.invalidate)
+
+# Memoized /forecast results per (site, issue time); dashboards poll the same forecast
+forecast_cache = ForecastCache(
+    max_entries=int(os.environ.get('FORECAST_CACHE_SIZE', 1000)),
+    ttl_seconds=float(os.environ.get('FORECAST_CACHE_TTL', 3600))
+)
+model_registry.add_listener(forecast_cache.invalidate)
+
+# Request and hot-path metrics served at /metrics (per process under gunicorn)
+request_metrics = RequestMetrics()
+
+# Opt-in profiler: with PROFILER_ENABLED=1 (or POST /debug/profiler), stacks of
+# requests slower than PROFILER_SLOW_MS are written to PROFILE_DIR as folded stacks
+profiler = SamplingProfiler(
+    output_dir=os.environ.get(
+        'PROFILE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'profiles')
+    ),
+    interval=float(os.environ.get('PROFILER_INTERVAL_MS', 5)) / 1000,
+    slow_seconds=float(os.environ.get('PROFILER_SLOW_MS', 500)) / 1000
+)
+if os.environ.get('PROFILER_ENABLED') == '1':
+    profiler.enabled = True  # the sampler thread starts with the first request in each process
+
+# Upper bound on rows accepted by /predict/batch in a single request
+MAX_BATCH_ROWS = 100000
+
+# Longest horizon accepted by /forecast, in hours
+MAX_FORECAST_HOURS = 168
+
+# Upper bound on prosumers scheduled by /vpp/optimize in a single request
+MAX_VPP_PROSUMERS = 100000
+# Charge levels of the /vpp/optimize DP; its time and memory grow with the square
+MAX_VPP_LEVELS = 201
+
+# Frontend HourlyWeather field -> predictor feature
+FORECAST_FIELD_ALIASES = {
+    'solarIrradiance': 'solar_radiation',
+    'cloudCover': 'cloud_cover',
+    'windSpeed': 'wind_speed',
+    'time': 'timestamp'
+}
+
+# For demo purposes, use placeholder values
+# In production, you'd get these from user authentication
+DEMO_PRIVATE_KEY = os.environ.get(
+    'PRIVATE_KEY', "0x1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef"
+)
+DEMO_ACCOUNT_ADDRESS = Account.from_key(DEMO_PRIVATE_KEY).address
+
+# Off-chain order book; matched trades are queued until /orderbook/settle records
+# them on-chain. New orders are refused while PENDING_SETTLEMENTS_MAX trades wait
+PENDING_SETTLEMENTS_MAX = int(os.environ.get('PENDING_SETTLEMENTS_MAX', 100000))
+pending_settlements = deque()
+failed_settlements = []
+settlement_lock = threading.Lock()
+order_book = OrderBook(on_trade=pending_settlements.append,
+                       history=int(os.environ.get('ORDER_BOOK_HISTORY', 100000)))
+
+# Call auction clearing each AUCTION_INTERVAL_SECONDS settlement interval at one
+# price; cleared intervals wait here for their settleAuction transaction, and
+# move to the failed list when the node refuses it
+auction_settlements = deque()
+failed_auction_settlements = []
+call_auction = CallAuction(
+    interval_seconds=int(os.environ.get('AUCTION_INTERVAL_SECONDS', 900)),
+    on_settlement=auction_settlements.append
+)
 
 # HTML template for the interface
 HTML_TEMPLATE = '''
@@ -266,7 +384,7 @@ HTML_TEMPLATE = '''
                     resultDiv.innerHTML = `
                         <div class="result">
                             <h4>Order Placed Successfully!</h4>
-                            <p><strong>Order ID:</strong> ${result.order_id}</p>
+                            <p><strong>Order ID:</strong> ${result.order_id ?? 'pending confirmation'}</p>
                             <p><strong>User Type:</strong> ${data.user_type}</p>
                             <p><strong>Energy Amount:</strong> ${data.energy_amount} kWh</p>
                             <p><strong>Price:</strong> ${data.price} Wei/kWh</p>
@@ -304,6 +422,46 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+def model_not_ready_response(e):
+    """Response for prediction requests that arrive before startup finishes"""
+    return jsonify({
+        'success': False,
+        'error': str(e)
+    }), 503
+
+def predictor_for(site=None):
+    """``(model_version, predictor)`` of the site's own model, else of the shared live model
+
+    Site model versions read ``<site>/<version>`` so cached results of
+    different models never mix.
+    """
+    if site:
+        entry = site_registry.get(site)
+        if entry is not None:
+            version, predictor = entry
+            return f"{site}/{version}", predictor
+    return model_registry.current()
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_start = time.perf_counter()
+    request_metrics.start(g.metrics_route)
+    profiler.begin()
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'metrics_start' not in g:
+        return
+    seconds = time.perf_counter() - g.metrics_start
+    request_metrics.finish(g.metrics_route, request.method, g.get('metrics_status', 500), seconds)
+    profiler.end(f"{request.method} {g.metrics_route}", seconds)
+
 @app.route('/')
 def index():
     """Main page with the trading interface"""
@@ -312,6 +470,7 @@ def index():
 @app.route('/predict', methods=['POST'])
 def predict_energy():
     """Predict solar energy output based on weather data"""
+    start = time.perf_counter()
     try:
         data = request.get_json()
         
@@ -322,22 +481,21 @@ def predict_energy():
         cloud_cover = float(data.get('cloud_cover', 20))
         solar_radiation = float(data.get('solar_radiation', 600))
         
-        # Load or train model
-        if not predictor.is_trained:
-            try:
-                predictor.load_model()
-            except:
-                # If no saved model, train a new one
-                predictor.train_model()
-        
-        # Make prediction
-        prediction = predictor.predict_energy(
-            temperature, humidity, wind_speed, cloud_cover, solar_radiation
-        )
+        # Make prediction with the site's model, or the live shared version
+        model_version, predictor = predictor_for(data.get('site'))
+        features = (temperature, humidity, wind_speed, cloud_cover, solar_radiation)
+        def compute():
+            with request_metrics.timed('model_inference', operation='predict_energy', engine=predictor.engine):
+                return predictor.predict_energy(*features)
+
+        prediction, cached = prediction_cache.get_or_compute(features, compute, model_version)
+        model_registry.record_request(time.perf_counter() - start)
         
         return jsonify({
             'success': True,
             'prediction': prediction,
+            'cached': cached,
+            'model_version': model_version,
             'weather_data': {
                 'temperature': temperature,
                 'humidity': humidity,
@@ -347,6 +505,168 @@ def predict_energy():
             }
         })
         
+    except ModelNotReadyError as e:
+        return model_not_ready_response(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_energy_batch():
+    """Predict solar energy output for many weather rows in one vectorized call
+
+    Accepts either ``features`` (a list of rows ordered as ``feature_order``)
+    or ``weather_data`` (a list of objects keyed by feature name). Returns the
+    predictions as a flat array in input order.
+    """
+    start = time.perf_counter()
+    try:
+        data = request.get_json()
+        
+        if 'features' in data:
+            rows = data['features']
+        elif 'weather_data' in data:
+            rows = [[float(item[name]) for name in FEATURE_COLUMNS] for item in data['weather_data']]
+        else:
+            raise ValueError("Request must contain 'features' or 'weather_data'")
+        
+        if len(rows) > MAX_BATCH_ROWS:
+            raise ValueError(f"Batch too large: {len(rows)} rows (max {MAX_BATCH_ROWS})")
+        
+        # Make predictions for the whole block with the site's or the live shared model
+        model_version, predictor = predictor_for(data.get('site'))
+        with request_metrics.timed('model_inference', operation='predict_batch', engine=predictor.engine):
+            predictions = predictor.predict_batch(rows)
+        model_registry.record_request(time.perf_counter() - start)
+        
+        return jsonify({
+            'success': True,
+            'model_version': model_version,
+            'count': len(predictions),
+            'feature_order': FEATURE_COLUMNS,
+            'predictions': predictions.tolist()
+        })
+        
+    except ModelNotReadyError as e:
+        return model_not_ready_response(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/forecast', methods=['POST'])
+def forecast_energy():
+    """Forecast hourly and daily energy for a site from an hourly weather series
+
+    Accepts ``{"site": ..., "issued_at": ..., "hourly": [...]}`` where each
+    hourly entry uses the predictor's feature names or the frontend's
+    HourlyWeather fields (``hour``, ``solarIrradiance``, ``cloudCover``...);
+    missing wind speed defaults as in /predict. The site's own model is used
+    when it has one. Results are cached per site and issue time until the
+    model changes.
+    """
+    start = time.perf_counter()
+    try:
+        data = request.get_json()
+        site = str(data.get('site', 'default'))
+        hourly = data.get('hourly')
+        if not hourly:
+            raise ValueError("Request must contain a non-empty 'hourly' weather series")
+        if len(hourly) > MAX_FORECAST_HOURS:
+            raise ValueError(f"Forecast too long: {len(hourly)} hours (max {MAX_FORECAST_HOURS})")
+        # Default issue time: the current hour, so polls within the hour share a result
+        issued_at = data.get('issued_at') or time.strftime('%Y-%m-%dT%H:00:00')
+
+        model_version, predictor = predictor_for(site)
+        digest = hashlib.sha1(json.dumps(hourly, sort_keys=True).encode()).hexdigest()
+
+        def compute():
+            weather = [{FORECAST_FIELD_ALIASES.get(name, name): value for name, value in item.items()}
+                       for item in hourly]
+            for item in weather:
+                item.setdefault('wind_speed', 3)
+            with request_metrics.timed('model_inference', operation='forecast_series', engine=predictor.engine):
+                hours, days = predictor.forecast_series(weather, start=issued_at)
+            return {
+                'hourly': [{'timestamp': row.timestamp.isoformat(), 'hour': int(row.hour),
+                            'energy_kwh': float(row.energy_kwh)} for row in hours.itertuples()],
+                'daily': [{'date': row.date.isoformat(), 'energy_kwh': float(row.energy_kwh),
+                           'hours': int(row.hours)} for row in days.itertuples()],
+                'total_kwh': float(hours['energy_kwh'].sum())
+            }
+
+        forecast, cached = forecast_cache.get_or_compute((site, issued_at, digest), compute, model_version)
+        model_registry.record_request(time.perf_counter() - start)
+
+        return jsonify({
+            'success': True,
+            'site': site,
+            'issued_at': issued_at,
+            'model_version': model_version,
+            'cached': cached,
+            **forecast
+        })
+
+    except ModelNotReadyError as e:
+        return model_not_ready_response(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/vpp/optimize', methods=['POST'])
+def optimize_vpp():
+    """Cost-minimizing battery schedules for many prosumers' predicted generation and load
+
+    ``generation`` and ``load`` are (prosumers x hours) kWh, for example
+    /forecast output. Battery parameters and prices default to the
+    frontend's VPP config; prices may be given per hour. Returns each
+    prosumer's cost with and without the battery and, unless
+    ``include_schedules`` is false, the hourly battery, charge and grid
+    schedules.
+    """
+    try:
+        data = request.get_json()
+        
+        generation, load = data['generation'], data['load']
+        if len(generation) > MAX_VPP_PROSUMERS:
+            raise ValueError(f"Too many prosumers: {len(generation)} (max {MAX_VPP_PROSUMERS})")
+        if generation and len(generation[0]) > MAX_FORECAST_HOURS:
+            raise ValueError(f"Horizon too long: {len(generation[0])} hours (max {MAX_FORECAST_HOURS})")
+        levels = int(data.get('levels', 21))
+        if not 2 <= levels <= MAX_VPP_LEVELS:
+            raise ValueError(f"levels must be between 2 and {MAX_VPP_LEVELS}")
+        
+        optimizer = VPPOptimizer(
+            capacity=data.get('capacity', DEFAULT_CAPACITY),
+            max_power=data.get('max_power'),
+            efficiency=float(data.get('efficiency', DEFAULT_EFFICIENCY)),
+            initial_soc=data.get('initial_soc', 0.5),
+            terminal_soc=data.get('terminal_soc'),
+            levels=levels
+        )
+        with request_metrics.timed('vpp_optimization'):
+            result = optimizer.optimize(generation, load, data.get('buy_price', DEFAULT_BUY_PRICE),
+                                        data.get('sell_price', DEFAULT_SELL_PRICE))
+        
+        response = {
+            'success': True,
+            'prosumers': len(result['cost']),
+            'total_cost': float(result['cost'].sum()),
+            'total_baseline_cost': float(result['baseline_cost'].sum()),
+            'hourly_grid': result['grid'].sum(axis=0).tolist(),
+            'cost': result['cost'].tolist(),
+            'baseline_cost': result['baseline_cost'].tolist()
+        }
+        if data.get('include_schedules', True):
+            for key in ('battery', 'soc', 'grid'):
+                response[key] = result[key].astype(float).round(4).tolist()
+        return jsonify(response)
+        
     except Exception as e:
         return jsonify({
             'success': False,
@@ -367,10 +687,8 @@ def place_trade_order():
         # Determine if it's a buy or sell order
         is_buy_order = (user_type == 'buyer')
         
-        # For demo purposes, use placeholder values
-        # In production, you'd get these from user authentication
-        account_address = "0x742d35Cc6634C0532925a3b8D4C9db96C4b4d8b6"
-        private_key = "0x1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef"
+        account_address = DEMO_ACCOUNT_ADDRESS
+        private_key = DEMO_PRIVATE_KEY
         
         if web3_helper is None:
             return jsonify({
@@ -378,18 +696,25 @@ def place_trade_order():
                 'error': 'Blockchain connection not available'
             }), 500
         
-        # Place order on blockchain
+        # Where the order's price level goes in the contract's sorted list; the
+        # index spares the hintPrice call when it is running
+        levels = event_indexer.better_price_levels(price, is_buy_order, limit=1) if event_indexer else None
+        hint_price = web3_helper.find_hint_price(price, is_buy_order, levels)
+        
+        # Submit order to blockchain; settlement is tracked in the background
         tx_hash = web3_helper.place_order(
-            account_address, private_key, energy_amount, price, is_buy_order
+            account_address, private_key, energy_amount, price, is_buy_order, hint_price=hint_price
         )
         
         if tx_hash:
             return jsonify({
                 'success': True,
-                'order_id': 'DEMO_001',  # Placeholder
+                'order_id': None,  # Known once the OrderPlaced event is mined
                 'tx_hash': tx_hash,
-                'message': f'Order placed successfully for {energy_amount} kWh at {price} Wei/kWh'
-            })
+                'status': 'pending',
+                'status_url': f'/trade/{tx_hash}',
+                'message': f'Order submitted for {energy_amount} kWh at {price} Wei/kWh'
+            }), 202
         else:
             return jsonify({
                 'success': False,
@@ -402,18 +727,438 @@ def place_trade_order():
             'error': str(e)
         }), 400
 
+@app.route('/trade/<tx_hash>')
+def trade_status(tx_hash):
+    """Settlement status of an order submitted through /trade"""
+    if receipt_tracker is None:
+        return jsonify({
+            'success': False,
+            'error': 'Blockchain connection not available'
+        }), 500
+    
+    status = receipt_tracker.get(tx_hash.lower())
+    if status is None:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown transaction {tx_hash}'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'order_id': status['order_ids'][0] if status['order_ids'] else None,
+        **status
+    })
+
+@app.route('/orderbook/orders', methods=['POST'])
+def place_book_order():
+    """Match a buy or sell order against the off-chain order book"""
+    if len(pending_settlements) >= PENDING_SETTLEMENTS_MAX:
+        return jsonify({
+            'success': False,
+            'error': f"{len(pending_settlements)} matched trades are waiting for settlement, try again later"
+        }), 503
+    
+    try:
+        data = request.get_json()
+        
+        # Trades are settled on-chain, so both sides need a valid address
+        user = Web3.to_checksum_address(data.get('user', DEMO_ACCOUNT_ADDRESS))
+        user_type = data.get('user_type', 'buyer')
+        energy_amount = int(float(data.get('energy_amount', 10)))
+        price = int(data.get('price', 1000000000000000))
+        
+        order_id, trades = order_book.place_order(
+            user, energy_amount, price, user_type == 'buyer'
+        )
+        
+        return jsonify({
+            'success': True,
+            'order_id': order_id,
+            'order': order_book.get_order(order_id),
+            'trades': trades
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/orderbook/orders/<int:order_id>', methods=['DELETE'])
+def cancel_book_order(order_id):
+    """Cancel a resting order in the off-chain order book"""
+    try:
+        data = request.get_json(silent=True) or {}
+        order_book.cancel_order(order_id, Web3.to_checksum_address(data.get('user', DEMO_ACCOUNT_ADDRESS)))
+        return jsonify({'success': True, 'order_id': order_id})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/orderbook')
+def get_order_book():
+    """Aggregated depth of the off-chain order book"""
+    levels = request.args.get('levels', 10, type=int)
+    return jsonify({
+        'success': True,
+        'active_orders': order_book.get_active_orders_count(),
+        'pending_settlements': len(pending_settlements),
+        'depth': order_book.depth(levels)
+    })
+
+@app.route('/orderbook/settlements')
+def get_pending_settlements():
+    """Trades matched off-chain that still need to be settled on-chain, and those that failed to"""
+    return jsonify({
+        'success': True,
+        'trades': list(pending_settlements),
+        'failed': failed_settlements
+    })
+
+@app.route('/orderbook/settle', methods=['POST'])
+def settle_book_trades():
+    """Record queued off-chain trades on-chain through settleTrades
+
+    Meant to be called on a schedule. Trades leave the queue once their
+    transaction is mined successfully. A chunk that reverts, or that the
+    node refuses, stays at the head of the queue for the next call; a
+    single trade the node refuses moves to the failed list instead, so it
+    can't hold up the trades behind it.
+    """
+    if web3_helper is None or not web3_helper.contract:
+        return jsonify({
+            'success': False,
+            'error': 'Contract not loaded'
+        }), 503
+    
+    try:
+        with settlement_lock:
+            trades = list(pending_settlements)
+            settled, retry = [], []
+            for tx_hash, chunk in web3_helper.settle_trades(DEMO_ACCOUNT_ADDRESS, DEMO_PRIVATE_KEY, trades,
+                                                            wait=True):
+                if tx_hash is not None and web3_helper.w3.eth.get_transaction_receipt(tx_hash)['status'] == 1:
+                    settled.append({'trade_ids': [trade['tradeId'] for trade in chunk], 'tx_hash': tx_hash})
+                elif tx_hash is None and len(chunk) == 1:
+                    failed_settlements.append(chunk[0])
+                else:
+                    retry.extend(chunk)
+            # Only this route takes trades off the queue, so its head is still the snapshot
+            for _ in trades:
+                pending_settlements.popleft()
+            pending_settlements.extendleft(reversed(retry))
+        
+        return jsonify({
+            'success': True,
+            'settled': settled,
+            'failed': len(failed_settlements),
+            'pending_settlements': len(pending_settlements)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/auction/orders', methods=['POST'])
+def submit_auction_order():
+    """Add a buy or sell order to the current call-auction interval"""
+    try:
+        data = request.get_json()
+        
+        # Fills are settled on-chain, so the user needs a valid address
+        user = Web3.to_checksum_address(data.get('user', DEMO_ACCOUNT_ADDRESS))
+        user_type = data.get('user_type', 'buyer')
+        energy_amount = int(float(data.get('energy_amount', 10)))
+        price = int(data.get('price', 1000000000000000))
+        
+        order_id, interval = call_auction.submit_order(user, energy_amount, price, user_type == 'buyer')
+        
+        return jsonify({
+            'success': True,
+            'order_id': order_id,
+            'interval_id': interval,
+            'clears_at': (interval + 1) * call_auction.interval_seconds
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/auction/orders/<int:order_id>', methods=['GET', 'DELETE'])
+def auction_order(order_id):
+    """Look up or withdraw a call-auction order"""
+    if request.method == 'GET':
+        order = call_auction.get_order(order_id)
+        if order is None:
+            return jsonify({
+                'success': False,
+                'error': f'Unknown order {order_id}'
+            }), 404
+        return jsonify({'success': True, 'order': order})
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        call_auction.cancel_order(order_id, Web3.to_checksum_address(data.get('user', DEMO_ACCOUNT_ADDRESS)))
+        return jsonify({'success': True, 'order_id': order_id})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/auction')
+def get_auction():
+    """Intervals collecting orders and cleared intervals awaiting settlement"""
+    return jsonify({
+        'success': True,
+        'interval_seconds': call_auction.interval_seconds,
+        'current_interval': call_auction.interval_of(time.time()),
+        'pending_orders': call_auction.pending(),
+        'pending_settlements': [settlement['intervalId'] for settlement in auction_settlements],
+        'failed_settlements': [settlement['intervalId'] for settlement in failed_auction_settlements]
+    })
+
+@app.route('/auction/intervals')
+def get_auction_settlements():
+    """Cleared intervals awaiting settlement, and those whose settlement the node refused"""
+    return jsonify({
+        'success': True,
+        'pending': [settlement['intervalId'] for settlement in auction_settlements],
+        'failed': [{'interval_id': settlement['intervalId'], 'tx_hashes': settlement['txHashes']}
+                   for settlement in failed_auction_settlements]
+    })
+
+@app.route('/auction/intervals/<int:interval>')
+def get_auction_result(interval):
+    """Clearing result of one interval"""
+    result = call_auction.get_result(interval)
+    if result is None:
+        return jsonify({
+            'success': False,
+            'error': f'Interval {interval} has not cleared'
+        }), 404
+    return jsonify({'success': True, 'result': result})
+
+@app.route('/auction/clear', methods=['POST'])
+def clear_auction():
+    """Clear ended intervals (or ``interval``) and settle each one on chain
+
+    Meant to be called by a scheduler at every interval boundary. Each
+    settlement goes in one transaction, or in parts when it doesn't fit the
+    gas budget, and waits for its receipts. One the node refuses or that
+    reverts moves to the failed list (see /auction/intervals), so it can't
+    hold up the intervals after it. It stays queued instead when the node
+    is unreachable, or when some of its parts are already settled and the
+    contract won't take another interval until the rest are. Without a
+    loaded contract every settlement stays queued for a later call. The
+    contract only accepts intervals after its last settled one, so an
+    explicit ``interval`` at or below it is refused and queued settlements
+    that fell behind it are dropped.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        contract_loaded = web3_helper is not None and web3_helper.contract
+        last_settled = web3_helper.contract.functions.lastSettledInterval().call() if contract_loaded else None
+        if data.get('interval') is not None:
+            interval = int(data['interval'])
+            if last_settled is not None and interval <= last_settled:
+                raise ValueError(f"Interval {interval} is not after the last settled interval {last_settled}")
+            results = [call_auction.clear(interval)]
+        else:
+            results = call_auction.clear_due()
+        
+        settled, dropped, failed, retry = [], [], [], None
+        if contract_loaded:
+            while auction_settlements:
+                settlement = auction_settlements[0]
+                if settlement['intervalId'] <= last_settled:
+                    dropped.append(auction_settlements.popleft()['intervalId'])
+                    continue
+                tx_hashes = web3_helper.settle_auction(DEMO_ACCOUNT_ADDRESS, DEMO_PRIVATE_KEY, settlement, wait=True)
+                confirmed = 0
+                for tx_hash in tx_hashes:
+                    if tx_hash is None or web3_helper.w3.eth.get_transaction_receipt(tx_hash)['status'] != 1:
+                        break
+                    confirmed += 1
+                if 'parts' in settlement:
+                    del settlement['parts'][:confirmed]
+                if confirmed == len(tx_hashes) and not settlement.get('parts'):
+                    auction_settlements.popleft()
+                    last_settled = settlement['intervalId']
+                    settled.append({'interval_id': last_settled, 'tx_hashes': tx_hashes})
+                    continue
+                
+                entry = {'interval_id': settlement['intervalId'], 'tx_hashes': tx_hashes}
+                if not web3_helper.w3.is_connected() or \
+                        web3_helper.contract.functions.openInterval().call() == settlement['intervalId']:
+                    retry = entry
+                    break
+                failed.append(entry)
+                failed_auction_settlements.append(dict(auction_settlements.popleft(), txHashes=tx_hashes))
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'settled': settled,
+            'dropped': dropped,
+            'failed': failed,
+            'retry': retry,
+            'pending_settlements': len(auction_settlements)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+def indexer_unavailable_response():
+    """503 response for /chain reads when no event indexer is running"""
+    return jsonify({
+        'success': False,
+        'error': 'Event index not available'
+    }), 503
+
+@app.route('/chain/orderbook')
+def get_chain_order_book():
+    """On-chain order book depth served from the event index"""
+    if event_indexer is None:
+        return indexer_unavailable_response()
+    
+    levels = request.args.get('levels', 10, type=int)
+    return jsonify({
+        'success': True,
+        'indexed_block': event_indexer.checkpoint,
+        'active_orders': event_indexer.get_active_orders_count(),
+        'depth': event_indexer.get_order_book(levels)
+    })
+
+@app.route('/chain/orders')
+def get_chain_orders():
+    """On-chain orders, optionally filtered by user and status"""
+    if event_indexer is None:
+        return indexer_unavailable_response()
+    
+    try:
+        return jsonify({
+            'success': True,
+            'indexed_block': event_indexer.checkpoint,
+            'orders': event_indexer.get_orders(
+                user=request.args.get('user'),
+                status=request.args.get('status'),
+                limit=request.args.get('limit', 100, type=int)
+            )
+        })
+    except ValueError as e:
+        # Not an address
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/chain/trades')
+def get_chain_trades():
+    """On-chain trade history, optionally for one user"""
+    if event_indexer is None:
+        return indexer_unavailable_response()
+    
+    try:
+        return jsonify({
+            'success': True,
+            'indexed_block': event_indexer.checkpoint,
+            'trades': event_indexer.get_trades(
+                user=request.args.get('user'),
+                limit=request.args.get('limit', 100, type=int)
+            )
+        })
+    except ValueError as e:
+        # Not an address
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/status/ml')
 def ml_status():
     """Check ML model status"""
     try:
-        if predictor.is_trained:
-            status = "Model trained and ready"
+        if model_registry.is_ready:
+            status = f"Model version {model_registry.version} trained and ready"
         else:
             status = "Model not trained"
-        return jsonify({'status': status})
+        return jsonify({
+            'status': status,
+            'model': model_registry.stats(),
+            'cache': prediction_cache.stats(),
+            'forecast_cache': forecast_cache.stats(),
+            'sites': site_registry.stats()
+        })
     except Exception as e:
         return jsonify({'status': f'Error: {str(e)}'})
 
+@app.route('/model/reload', methods=['POST'])
+def reload_model():
+    """Load the model saved on disk and hot-swap it in"""
+    try:
+        version = model_registry.reload()
+        return jsonify({'success': True, 'model_version': version})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/sites/<site>/model/reload', methods=['POST'])
+def reload_site_model(site):
+    """Drop a site's resident model so its next request loads the one on disk"""
+    try:
+        site_registry.reload(site)
+        return jsonify({'success': True, 'site': site})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/model/engine', methods=['POST'])
+def set_prediction_engine():
+    """Switch the prediction engine (``{"engine": "sklearn" | "lockstep"}``) without reloading"""
+    try:
+        data = request.get_json(silent=True) or {}
+        # Sites switch all-or-nothing and are switched back if the shared model refuses the engine
+        previous = site_registry.set_engine(data.get('engine'))
+        try:
+            version = model_registry.set_engine(data.get('engine'))
+        except Exception:
+            site_registry.restore_engine(previous)
+            raise
+        return jsonify({'success': True, 'engine': data.get('engine'), 'model_version': version})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/model/retrain', methods=['POST'])
+def retrain_model():
+    """Retrain the model in the background; it is swapped in when ready
+    
+    ``{"incremental": true}`` grows the live forest instead of refitting it.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        model_registry.retrain(incremental=bool(data.get('incremental')))
+        return jsonify({
+            'success': True,
+            'message': 'Retraining started',
+            'model_version': model_registry.version
+        }), 202
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+
 @app.route('/status/blockchain')
 def blockchain_status():
     """Check blockchain connection status"""
@@ -422,10 +1167,56 @@ def blockchain_status():
             status = f"Connected to block {web3_helper.w3.eth.block_number}"
         else:
             status = "Not connected"
-        return jsonify({'status': status})
+        return jsonify({
+            'status': status,
+            'rpc': web3_helper.get_rpc_stats() if web3_helper else {}
+        })
     except Exception as e:
         return jsonify({'status': f'Error: {str(e)}'})
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics: requests, model inference, RPC calls, caches and site models"""
+    lines = request_metrics.render()
+    lines += metric_header('model_version', 'gauge', 'Live model version (0 before startup)')
+    lines.append(sample('model_version', model_registry.version))
+    lines += metric_header('model_predictions_total', 'counter', 'Prediction requests served by the live model')
+    lines.append(sample('model_predictions_total', model_registry.request_count))
+    lines += render_cache_stats({'prediction': prediction_cache.stats(), 'forecast': forecast_cache.stats()})
+    sites = site_registry.stats()
+    for name, key, metric_type, help_text in (
+        ('site_models_resident', 'resident', 'gauge', 'Site models held in memory'),
+        ('site_models_resident_bytes', 'resident_bytes', 'gauge', 'Approximate bytes of resident site models'),
+        ('site_model_loads_total', 'loads', 'counter', 'Site model loads from disk'),
+        ('site_model_evictions_total', 'evictions', 'counter', 'Site models evicted to stay within the limit')
+    ):
+        lines += metric_header(name, metric_type, help_text)
+        lines.append(sample(name, sites[key]))
+    lines += render_rpc_stats(web3_helper.get_rpc_stats() if web3_helper else {})
+    lines += metric_header('profiler_enabled', 'gauge', 'Whether the sampling profiler is on')
+    lines.append(sample('profiler_enabled', profiler.enabled))
+    lines += metric_header('profiler_profiles_written_total', 'counter', 'Slow-request profiles written')
+    lines.append(sample('profiler_profiles_written_total', profiler.profiles_written))
+    return Response('\n'.join(lines) + '\n', content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/debug/profiler', methods=['GET', 'POST'])
+def profiler_settings():
+    """Profiler status and saved profiles; POST ``{"enabled", "slow_ms", "interval_ms"}`` to change it"""
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            profiler.configure(
+                enabled=data.get('enabled'),
+                interval=float(data['interval_ms']) / 1000 if 'interval_ms' in data else None,
+                slow_seconds=float(data['slow_ms']) / 1000 if 'slow_ms' in data else None
+            )
+        return jsonify({'success': True, 'profiler': profiler.stats()})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
@@ -435,15 +1226,48 @@ def health_check():
         'version': '1.0.0'
     })
 
-if __name__ == '__main__':
+def init_blockchain():
+    """Connect to the node and start settlement tracking and event indexing
+    
+    Runs once per serving process: background threads don't survive a fork,
+    so under gunicorn this is called in each worker after it starts.
+    """
+    global web3_helper, receipt_tracker, event_indexer
     try:
         # Initialize blockchain connection
         web3_helper = Web3Helper()
+        receipt_tracker = ReceiptTracker(web3_helper)
+        web3_helper.start_receipt_poller()
         print("Blockchain connection established")
+        
+        # Mirror contract events locally so chain reads don't hit the node
+        if os.environ.get('CONTRACT_ADDRESS'):
+            web3_helper.load_contract(os.environ['CONTRACT_ADDRESS'])
+            event_indexer = EventIndexer(web3_helper, db_path=EVENT_INDEX_DB)
+            event_indexer.start()
     except Exception as e:
         print(f"Warning: Could not connect to blockchain: {e}")
         web3_helper = None
+        receipt_tracker = None
+        event_indexer = None
+
+def shutdown():
+    """Stop background threads so the process can exit cleanly"""
+    profiler.configure(enabled=False)
+    if event_indexer:
+        event_indexer.stop()
+    if web3_helper:
+        web3_helper.receipt_poller.stop()
+
+if __name__ == '__main__':
+    # Development server; for production use gunicorn -c gunicorn.conf.py app.wsgi:application
+    init_blockchain()
+    
+    # Load and warm up the model before accepting requests
+    model_registry.startup()
+    print(f"Model ready in {model_registry.startup_seconds:.2f}s")
     
+    port = int(os.environ.get('PORT', 5000))
     print("Starting P2P Energy Trading System...")
-    print("Access the system at: http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    print(f"Access the system at: http://localhost:{port}")
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=port)
@@ -0,0 +1,145 @@
+"""
+Per-site solar energy predictors, loaded lazily and kept in a bounded LRU
+"""
+
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from ml.solar_predictor import SITE_MODELS_DIR, SolarEnergyPredictor, site_model_dir
+
+
+class SiteModelRegistry:
+    """Predictors keyed by site (prosumer) id, loaded from disk on first use
+
+    Each site's model lives in its own model directory under ``root``
+    (``root/<site>``, as written by ``save_model``). At most ``max_resident``
+    site models stay in memory; the least recently used one is evicted and
+    loaded again when next asked for. Concurrent first requests for a site
+    load it once, and requests for resident sites never wait on a load.
+    With ``engine`` set, every loaded predictor is switched to that engine.
+    """
+
+    def __init__(self, root=SITE_MODELS_DIR, max_resident=16, predictor_factory=SolarEnergyPredictor, engine=None):
+        if max_resident <= 0:
+            raise ValueError("max_resident must be greater than 0")
+        self.root = root
+        self.max_resident = max_resident
+        self.predictor_factory = predictor_factory
+        self.engine = engine
+        self._resident = OrderedDict()  # site -> (version, predictor, nbytes)
+        self._versions = Counter()      # bumped by reload() so caches never serve a replaced model
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.load_counts = Counter()
+        self.load_seconds = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.unknown = 0
+        self.evictions = 0
+
+    def model_dir(self, site):
+        return site_model_dir(site, self.root)
+
+    def get(self, site):
+        """Return ``(version, predictor)`` for ``site``, or None when it has no saved model"""
+        with self._lock:
+            entry = self._resident.get(site)
+            if entry is not None:
+                self._resident.move_to_end(site)
+                self.hits += 1
+                return entry[0], entry[1]
+
+        if not os.path.isdir(self.model_dir(site)):
+            with self._lock:
+                self.unknown += 1
+            return None
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(site, threading.Lock())
+
+        with load_lock:
+            # Another request may have loaded the site while we waited
+            with self._lock:
+                entry = self._resident.get(site)
+                if entry is not None:
+                    self._resident.move_to_end(site)
+                    self.hits += 1
+                    return entry[0], entry[1]
+                self.misses += 1
+            start = time.perf_counter()
+            predictor = self.predictor_factory()
+            if not predictor.load_model(self.model_dir(site)):
+                return None
+            if self.engine and predictor.engine != self.engine:
+                predictor.set_engine(self.engine)
+            load_seconds = time.perf_counter() - start
+
+            with self._lock:
+                version = self._versions[site] + 1
+                self._resident[site] = (version, predictor, predictor.nbytes)
+                self.load_counts[site] += 1
+                self.load_seconds += load_seconds
+                while len(self._resident) > self.max_resident:
+                    self._resident.popitem(last=False)
+                    self.evictions += 1
+            return version, predictor
+
+    def set_engine(self, engine):
+        """Switch resident predictors to ``engine``; later loads use it too
+
+        If any predictor refuses the engine, the ones already switched go
+        back and the error is raised. Returns what ``restore_engine`` needs
+        to undo the switch.
+        """
+        with self._lock:
+            predictors = [predictor for _, predictor, _ in self._resident.values()]
+        switched = []
+        try:
+            for predictor in predictors:
+                previous = predictor.engine
+                predictor.set_engine(engine)
+                switched.append((predictor, previous))
+        except Exception:
+            self.restore_engine((self.engine, switched))
+            raise
+        previous, self.engine = self.engine, engine
+        return previous, switched
+
+    def restore_engine(self, state):
+        """Undo a ``set_engine`` call given its return value"""
+        engine, switched = state
+        for predictor, previous in switched:
+            predictor.set_engine(previous)
+        self.engine = engine
+
+    def reload(self, site):
+        """Drop the resident copy of ``site`` so the next request loads what is on disk"""
+        self.model_dir(site)  # validates the site name
+        with self._lock:
+            self._resident.pop(site, None)
+            self._versions[site] += 1
+
+    def stats(self):
+        """Residency, load and eviction counters for the status endpoint"""
+        with self._lock:
+            resident = {site: {'version': version, 'nbytes': nbytes}
+                        for site, (version, _, nbytes) in self._resident.items()}
+        loads = sum(self.load_counts.values())
+        lookups = self.hits + self.misses
+        return {
+            'resident': len(resident),
+            'max_resident': self.max_resident,
+            'resident_bytes': sum(entry['nbytes'] for entry in resident.values()),
+            'sites': resident,
+            'loads': loads,
+            'load_counts': dict(self.load_counts),
+            'load_seconds': self.load_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'unknown': self.unknown,
+            'evictions': self.evictions,
+            'eviction_rate': self.evictions / loads if loads else 0.0
+        }
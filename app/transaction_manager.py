@@ -0,0 +1,257 @@
+"""
+Local nonce tracking, gas price caching and bulk receipt polling for Web3Helper
+"""
+
+import threading
+import time
+
+from web3.exceptions import MethodUnavailable
+
+try:
+    # Only needed by web3 versions without eth.get_block_receipts (requirements pin 6.11.3)
+    from web3._utils.method_formatters import receipt_formatter
+except ImportError:
+    receipt_formatter = None
+
+
+class NonceManager:
+    """Hands out sequential nonces per account without an RPC per transaction
+
+    The first nonce for an account is read from the node's pending count;
+    after that nonces are allocated locally. Call ``reset(address)`` after a
+    failed submission so the next allocation resynchronizes with the node.
+    """
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._nonces = {}
+        self._lock = threading.Lock()
+
+    def next_nonce(self, address):
+        """Allocate the next nonce for ``address``"""
+        with self._lock:
+            if address not in self._nonces:
+                self._nonces[address] = self.w3.eth.get_transaction_count(address, 'pending')
+            nonce = self._nonces[address]
+            self._nonces[address] = nonce + 1
+            return nonce
+
+    def reset(self, address):
+        """Forget the local nonce so it is re-read from the node next time"""
+        with self._lock:
+            self._nonces.pop(address, None)
+
+
+class GasPriceCache:
+    """Caches ``eth_gasPrice`` and refreshes it at most every ``refresh_seconds``"""
+
+    def __init__(self, w3, refresh_seconds=15):
+        self.w3 = w3
+        self.refresh_seconds = refresh_seconds
+        self._price = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the cached gas price, refreshing it if stale"""
+        with self._lock:
+            if self._price is None or time.monotonic() - self._fetched_at >= self.refresh_seconds:
+                self._price = self.w3.eth.gas_price
+                self._fetched_at = time.monotonic()
+            return self._price
+
+    def invalidate(self):
+        """Force a refresh on the next call"""
+        with self._lock:
+            self._price = None
+
+
+def _method_not_found(error):
+    """True for a JSON-RPC "method not found" error (code -32601)"""
+    if isinstance(error, MethodUnavailable):
+        return True
+    detail = error.args[0] if error.args else None
+    return isinstance(detail, dict) and detail.get('code') == -32601
+
+
+def _hex(value):
+    """Normalize a transaction hash to a 0x-prefixed hex string"""
+    return value.hex() if hasattr(value, 'hex') else value
+
+
+class ReceiptPoller:
+    """Resolves the status of submitted transactions in bulk
+
+    Each poll reads the latest block number once. Only when new blocks have
+    arrived does it look at them: with one ``eth_getBlockReceipts`` call per
+    block where the node supports it, otherwise by fetching the block's
+    transaction hashes and requesting receipts just for the tracked ones.
+    Transactions still pending after ``stale_after`` seconds are checked
+    individually in case their block was missed.
+    """
+
+    def __init__(self, w3, interval=1.0, stale_after=60.0, max_history=10000):
+        self.w3 = w3
+        self.interval = interval
+        self.stale_after = stale_after
+        self.max_history = max_history
+        self.transactions = {}  # tx_hash -> status record
+        self._pending = set()
+        self._listeners = []
+        self._last_block = None
+        self._block_receipts_supported = True
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def track(self, tx_hash):
+        """Start tracking a transaction hash (call before broadcasting it)"""
+        with self._lock:
+            if not self._pending:
+                # Nothing in flight: start scanning from the current head
+                self._last_block = self.w3.eth.block_number
+            self.transactions[tx_hash] = {
+                'tx_hash': tx_hash,
+                'status': 'pending',
+                'submitted_at': time.time(),
+                'block_number': None,
+                'gas_used': None,
+                'confirmed_at': None
+            }
+            self._pending.add(tx_hash)
+
+    def forget(self, tx_hash):
+        """Stop tracking a transaction that was never broadcast"""
+        with self._lock:
+            self._pending.discard(tx_hash)
+            self.transactions.pop(tx_hash, None)
+
+    def add_listener(self, callback):
+        """Call ``callback(tx_hash, receipt)`` when a transaction is mined"""
+        self._listeners.append(callback)
+
+    def get_status(self, tx_hash):
+        """Return the status record for ``tx_hash`` or None if untracked"""
+        record = self.transactions.get(tx_hash)
+        return dict(record) if record else None
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def poll_once(self):
+        """Resolve every tracked transaction mined since the last poll"""
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending = set(self._pending)
+            from_block = self._last_block
+
+        latest = self.w3.eth.block_number
+        receipts = []
+        found = []
+        if from_block is None or latest > from_block:
+            start = latest if from_block is None else from_block + 1
+            for number in range(start, latest + 1):
+                block_receipts = self._get_block_receipts(number)
+                if block_receipts is not None:
+                    for receipt in block_receipts:
+                        tx_hash = _hex(receipt['transactionHash'])
+                        if tx_hash in pending:
+                            receipts.append((tx_hash, receipt))
+                    continue
+                block = self.w3.eth.get_block(number)
+                for tx in block['transactions']:
+                    tx_hash = _hex(tx)
+                    if tx_hash in pending:
+                        found.append(tx_hash)
+
+        # Fall back to a direct lookup for transactions pending too long
+        now = time.time()
+        resolved = set(found) | {tx_hash for tx_hash, _ in receipts}
+        with self._lock:
+            # forget() may have dropped some of them meanwhile
+            records = {h: self.transactions.get(h) for h in pending - resolved}
+        stale = [h for h, record in records.items()
+                 if record is not None and now - record['submitted_at'] >= self.stale_after]
+
+        for tx_hash in found + stale:
+            try:
+                receipts.append((tx_hash, self.w3.eth.get_transaction_receipt(tx_hash)))
+            except Exception:
+                continue  # still pending or dropped
+
+        with self._lock:
+            self._last_block = latest
+            for tx_hash, receipt in receipts:
+                record = self.transactions.get(tx_hash)
+                if record is None:
+                    continue
+                record['status'] = 'confirmed' if receipt['status'] == 1 else 'failed'
+                record['block_number'] = receipt['blockNumber']
+                record['gas_used'] = receipt['gasUsed']
+                record['confirmed_at'] = time.time()
+                self._pending.discard(tx_hash)
+            self._prune()
+
+        for tx_hash, receipt in receipts:
+            for callback in self._listeners:
+                try:
+                    callback(tx_hash, receipt)
+                except Exception as e:
+                    print(f"Error in receipt listener: {e}")
+
+        return len(receipts)
+
+    def _get_block_receipts(self, number):
+        """All receipts of a block in one call, or None to look the block up instead
+
+        Only a "method not found" answer turns the bulk call off for good;
+        other errors (timeouts, dropped connections) fall back for this
+        block alone.
+        """
+        if not self._block_receipts_supported:
+            return None
+        get_block_receipts = getattr(self.w3.eth, 'get_block_receipts', None)
+        if get_block_receipts is None and receipt_formatter is None:
+            self._block_receipts_supported = False
+            return None
+        try:
+            if get_block_receipts is not None:
+                return list(get_block_receipts(number))
+            raw = self.w3.manager.request_blocking('eth_getBlockReceipts', [hex(number)])
+        except Exception as e:
+            if _method_not_found(e):
+                self._block_receipts_supported = False
+            return None
+        return [receipt_formatter(receipt) for receipt in raw or []]
+
+    def _prune(self):
+        """Drop the oldest resolved records beyond ``max_history``"""
+        excess = len(self.transactions) - self.max_history
+        if excess <= 0:
+            return
+        for tx_hash in [h for h in self.transactions if h not in self._pending][:excess]:
+            del self.transactions[tx_hash]
+
+    def start(self):
+        """Poll in a background daemon thread every ``interval`` seconds"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='receipt-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Error polling receipts: {e}")
+            self._stop.wait(self.interval)
@@ -1,17 +1,60 @@
 from web3 import Web3
+from web3.logs import DISCARD
+from web3._utils.abi import get_abi_input_types, get_abi_output_types
+from eth_utils import function_abi_to_4byte_selector
+from concurrent.futures import ThreadPoolExecutor
+import bisect
+import itertools
 import json
-import os
+import requests
+
+from app.call_auction import settlement_parts
+from app.transaction_manager import NonceManager, GasPriceCache, ReceiptPoller
+from app.rpc_provider import PooledHTTPProvider, get_provider
+
+# placeOrder matches at most this many resting orders (the contract's DEFAULT_MAX_MATCHES)
+DEFAULT_MAX_MATCHES = 8
+
+# placeOrderWithLimit gas limit upper bounds, so a single order needs no
+# estimate_gas round-trip: a resting order with a new price level found after
+# the contract's full 32-level walk, plus per match the trade record, the fill
+# and the payment to a possibly empty account. Unused gas is not charged, so
+# these only need to be safe, not tight; tests/test_contract.py checks them.
+PLACE_ORDER_GAS = 220000
+MATCH_GAS = 135000
+# In placeOrders the 21000 base cost and the calldata head are paid once per transaction
+BATCH_BASE_GAS = 40000
+BATCH_ORDER_GAS = PLACE_ORDER_GAS - 21000
+# Other batch gas limits are the node's estimate_gas, taken once per transaction
+# to size its chunk, plus this headroom: the estimate runs against the current
+# state, and submissions mined first can change it
+GAS_MARGIN = 1.25
+# Gas per batch transaction, under Ganache's default 6721975 block gas limit
+DEFAULT_GAS_BUDGET = 6000000
 
 class Web3Helper:
-    def __init__(self, rpc_url="http://127.0.0.1:7545"):
-        """Initialize Web3 connection to local blockchain"""
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+    def __init__(self, rpc_url=None, provider=None, gas_price_refresh=15, receipt_poll_interval=1.0):
+        """Initialize Web3 connection to local blockchain
+        
+        Without an explicit ``provider`` the shared pooled provider for
+        ``rpc_url`` (default: BLOCKCHAIN_RPC_URL or Ganache) is used.
+        """
+        provider = provider or get_provider(rpc_url)
+        rpc_url = getattr(provider, 'endpoint_uri', type(provider).__name__)
+        self.w3 = Web3(provider)
         self.contract = None
         self.contract_address = None
         
         if not self.w3.is_connected():
             raise ConnectionError(f"Failed to connect to {rpc_url}")
         
+        # Local transaction state so submissions don't need extra RPC round-trips
+        self.chain_id = self.w3.eth.chain_id
+        self.nonce_manager = NonceManager(self.w3)
+        self.gas_price_cache = GasPriceCache(self.w3, gas_price_refresh)
+        self.receipt_poller = ReceiptPoller(self.w3, receipt_poll_interval)
+        self._batch_session = requests.Session()
+        
         print(f"Connected to blockchain at {rpc_url}")
         print(f"Current block number: {self.w3.eth.block_number}")
     
@@ -41,13 +84,13 @@ class Web3Helper:
             transaction = contract.constructor().build_transaction({
                 'from': account_address,
                 'gas': gas_estimate,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(account_address)
+                'gasPrice': self.gas_price_cache.get(),
+                'nonce': self.nonce_manager.next_nonce(account_address),
+                'chainId': self.chain_id
             })
             
             # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            tx_hash = self.send_transaction(transaction, private_key)
             
             # Wait for transaction receipt
             tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
@@ -74,53 +117,352 @@ class Web3Helper:
         self.contract = self.w3.eth.contract(address=contract_address, abi=contract_abi)
         print(f"Contract loaded at: {contract_address}")
     
-    def place_order(self, account_address, private_key, energy_amount, price, is_buy_order):
-        """Place a buy or sell order"""
+    def place_order(self, account_address, private_key, energy_amount, price, is_buy_order, wait=False,
+                    max_matches=DEFAULT_MAX_MATCHES, hint_price=None):
+        """Place a buy or sell order
+
+        Returns the transaction hash as soon as the node accepts it; the
+        receipt poller resolves its status. Pass ``wait=True`` to block
+        until the transaction is mined.
+
+        The order fills at most ``max_matches`` resting orders, which bounds
+        its gas limit to ``PLACE_ORDER_GAS + max_matches * MATCH_GAS``; an
+        unfilled remainder that still crosses the book is cancelled.
+        ``hint_price`` is an existing price level on the order's side, better
+        than ``price``, where the contract starts looking for the order's
+        place (needed deeper than 32 levels from the best price). By default
+        ``find_hint_price`` picks it; 0 means no hint.
+        """
         if not self.contract:
             raise ValueError("Contract not loaded")
         
         try:
-            # Build transaction
-            transaction = self.contract.functions.placeOrder(
+            if hint_price is None:
+                hint_price = self.find_hint_price(price, is_buy_order)
+            call = self.contract.functions.placeOrderWithLimit(
                 energy_amount,
                 price,
-                is_buy_order
-            ).build_transaction({
+                is_buy_order,
+                max_matches,
+                hint_price
+            )
+            # Build transaction from locally cached nonce, gas price and chain id
+            transaction = call.build_transaction({
                 'from': account_address,
-                'gas': 200000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(account_address)
+                'gas': PLACE_ORDER_GAS + max_matches * MATCH_GAS,
+                'gasPrice': self.gas_price_cache.get(),
+                'nonce': self.nonce_manager.next_nonce(account_address),
+                'chainId': self.chain_id
             })
             
             # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            tx_hash = self.send_transaction(transaction, private_key, wait=wait)
             
-            # Wait for transaction receipt
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            
-            print(f"Order placed successfully! Transaction hash: {tx_hash.hex()}")
-            return tx_hash.hex()
+            print(f"Order submitted! Transaction hash: {tx_hash}")
+            return tx_hash
             
         except Exception as e:
             print(f"Error placing order: {e}")
             return None
     
+    def find_hint_price(self, price, is_buy_order, levels=None):
+        """The existing level on the order's side nearest to ``price`` and better than it, or 0
+
+        ``levels`` are indexed level prices of that side, nearest to
+        ``price`` first (e.g. ``EventIndexer.better_price_levels``); the
+        nearest is used without an RPC, since the contract ignores a hint
+        that is no longer a level and walks from the best price instead.
+        Without them the contract's ``hintPrice`` view finds it in one call.
+        """
+        if levels:
+            return levels[0]
+        return self.contract.functions.hintPrice(is_buy_order, price).call()
+
+    def price_levels(self, is_buy_order, until=None):
+        """Prices of one side's levels, best first, read by walking the contract's level list
+
+        With ``until`` the walk stops at the first level that isn't better
+        than that price, so it only reads the levels an order at ``until``
+        would rest behind.
+        """
+        functions = self.contract.functions
+        price = (functions.bestBid() if is_buy_order else functions.bestAsk()).call()
+        prices = []
+        while price and (until is None or (price > until if is_buy_order else price < until)):
+            prices.append(price)
+            price = functions.getPriceLevel(is_buy_order, price).call()[1]
+        return prices
+
+    def place_orders(self, account_address, private_key, orders, max_matches=1, gas_budget=DEFAULT_GAS_BUDGET,
+                     wait=False):
+        """Place many ``(energy_amount, price, is_buy_order)`` orders through placeOrders
+
+        Each order fills at most ``max_matches`` resting orders and gets the
+        nearest better level on its side as its hint price, from one walk of
+        the book per side. Like ``place_order``, every order is given the
+        fixed gas bound for its match cap, so orders are split into chunks of
+        ``orders_per_transaction`` without an estimate_gas call. Returns
+        ``(tx_hash, orders)`` per chunk in submission order (the hash is None
+        where submission failed); a chunk's order ids are consecutive.
+        """
+        if not self.contract:
+            raise ValueError("Contract not loaded")
+        
+        orders = list(orders)
+        size = self.orders_per_transaction(max_matches, gas_budget)
+        hints = self._hint_prices(orders)
+        chunks = []
+        for i in range(0, len(orders), size):
+            chunk = orders[i:i + size]
+            amounts, prices, sides = (list(column) for column in zip(*chunk))
+            call = self.contract.functions.placeOrders(amounts, prices, sides, hints[i:i + size], max_matches)
+            gas = BATCH_BASE_GAS + len(chunk) * (BATCH_ORDER_GAS + max_matches * MATCH_GAS)
+            chunks.append((self._send_batch(call, account_address, private_key, gas, wait), chunk))
+        print(f"{len(orders)} orders submitted in {len(chunks)} transaction(s)")
+        return chunks
+    
+    @staticmethod
+    def orders_per_transaction(max_matches, gas_budget=DEFAULT_GAS_BUDGET):
+        """Orders that fit one placeOrders transaction of at most ``gas_budget`` gas"""
+        size = (gas_budget - BATCH_BASE_GAS) // (BATCH_ORDER_GAS + max_matches * MATCH_GAS)
+        if size < 1:
+            raise ValueError(f"A gas budget of {gas_budget} doesn't fit one order matching up to "
+                             f"{max_matches} resting orders")
+        return size
+    
+    def cancel_orders(self, account_address, private_key, order_ids, gas_budget=DEFAULT_GAS_BUDGET, wait=False):
+        """Cancel many orders through cancelOrders, chunked to fit ``gas_budget`` by estimate
+
+        Orders that are already filled or cancelled are skipped by the
+        contract. Returns ``(tx_hash, order_ids)`` per chunk (the hash is
+        None where submission failed).
+        """
+        if not self.contract:
+            raise ValueError("Contract not loaded")
+        
+        return self._send_chunks(self.contract.functions.cancelOrders, list(order_ids),
+                                 account_address, private_key, gas_budget, wait)
+    
+    def settle_auction(self, account_address, private_key, settlement, gas_budget=DEFAULT_GAS_BUDGET, wait=False):
+        """Settle one cleared call-auction interval, in one settleAuction transaction if it fits
+
+        ``settlement`` is a ``CallAuction`` settlement (intervalId,
+        clearingPrice, buyers/boughtAmounts, sellers/soldAmounts). When its
+        estimated gas exceeds ``gas_budget`` its fills are split into
+        balanced parts (``settlement_parts``), kept in
+        ``settlement['parts']``, and settled in order through
+        settleAuctionPart, each part once the one before is mined. A retry
+        sends only the parts still listed, so the caller removes each part
+        once its transaction is confirmed. Returns the transaction hashes in
+        submission order; the last one is None where the node refused the
+        transaction, and the parts after it are not sent.
+        """
+        if not self.contract:
+            raise ValueError("Contract not loaded")
+        
+        if 'parts' not in settlement:
+            try:
+                call = self.contract.functions.settleAuction(
+                    settlement['intervalId'], settlement['clearingPrice'],
+                    settlement['buyers'], settlement['boughtAmounts'],
+                    settlement['sellers'], settlement['soldAmounts']
+                )
+                gas = self.estimate_gas(call, account_address)
+                if gas <= gas_budget:
+                    return [self._send_batch(call, account_address, private_key, gas, wait)]
+                # Shrink the parts in proportion until the first one fits
+                size = len(settlement['buyers']) + len(settlement['sellers'])
+                parts = None
+                while gas > gas_budget and size > 2:
+                    size = max(2, min(size - 1, size * gas_budget // gas))
+                    parts = settlement_parts(settlement, size)
+                    gas = self.estimate_gas(self._auction_part_call(settlement, parts, 0), account_address)
+            except Exception as e:
+                print(f"Error submitting settleAuction: {e}")
+                return [None]
+            if gas > gas_budget:
+                print(f"Error submitting settleAuction: one buyer and one seller need {gas} gas, "
+                      f"more than the budget of {gas_budget}")
+                return [None]
+            settlement['parts'] = parts
+        
+        parts = settlement['parts']
+        tx_hashes = []
+        for i in range(len(parts)):
+            try:
+                call = self._auction_part_call(settlement, parts, i)
+                gas = self.estimate_gas(call, account_address)
+            except Exception as e:
+                print(f"Error submitting settleAuctionPart: {e}")
+                tx_hashes.append(None)
+                break
+            last = i == len(parts) - 1
+            tx_hash = self._send_batch(call, account_address, private_key, gas, wait or not last)
+            tx_hashes.append(tx_hash)
+            if tx_hash is None or (not last and self.w3.eth.get_transaction_receipt(tx_hash)['status'] != 1):
+                break
+        return tx_hashes
+    
+    def _auction_part_call(self, settlement, parts, i):
+        """settleAuctionPart call for ``parts[i]``; the parts after it are still due"""
+        buyer_count, users, amounts = parts[i]
+        return self.contract.functions.settleAuctionPart(
+            settlement['intervalId'], len(parts) - 1 - i, settlement['clearingPrice'], buyer_count, users, amounts
+        )
+    
+    def settle_trades(self, account_address, private_key, trades, gas_budget=DEFAULT_GAS_BUDGET, wait=False):
+        """Record trades matched off-chain (``OrderBook`` trade dicts) through settleTrades
+
+        Trades are chunked to fit ``gas_budget`` by estimate. Returns
+        ``(tx_hash, trades)`` per chunk in submission order (the hash is
+        None where submission failed).
+        """
+        if not self.contract:
+            raise ValueError("Contract not loaded")
+
+        def call(chunk):
+            return self.contract.functions.settleTrades(
+                [trade['buyer'] for trade in chunk], [trade['seller'] for trade in chunk],
+                [trade['energyAmount'] for trade in chunk], [trade['price'] for trade in chunk]
+            )
+
+        return self._send_chunks(call, list(trades), account_address, private_key, gas_budget, wait)
+
+    def estimate_gas(self, call, account_address):
+        """Gas limit for a contract call: the node's estimate plus ``GAS_MARGIN``"""
+        return int(call.estimate_gas({'from': account_address}) * GAS_MARGIN)
+    
+    def _hint_prices(self, orders):
+        """Hint price per ``(energy_amount, price, is_buy_order)`` order from one walk of each side"""
+        hints = []
+        levels = {}
+        for side in {order[2] for order in orders}:
+            prices = [order[1] for order in orders if order[2] == side]
+            # Only levels better than the side's worst order price can be hints
+            levels[side] = sorted(self.price_levels(side, until=min(prices) if side else max(prices)))
+        for _, price, is_buy_order in orders:
+            side = levels[is_buy_order]
+            if is_buy_order:
+                i = bisect.bisect_right(side, price)
+                hints.append(side[i] if i < len(side) else 0)
+            else:
+                i = bisect.bisect_left(side, price)
+                hints.append(side[i - 1] if i else 0)
+        return hints
+    
+    def _send_chunks(self, call, items, account_address, private_key, gas_budget, wait):
+        """Submit ``items`` through ``call(chunk)`` in as few transactions as fit ``gas_budget``
+
+        A chunk whose estimate is over the budget is shrunk in proportion
+        and estimated again; one the node can't estimate (over the block gas
+        limit, or an item reverts) is halved. The size that fit is tried
+        first for the next chunk. Returns ``(tx_hash, chunk)`` pairs.
+        """
+        sent = []
+        start, size = 0, len(items)
+        while start < len(items):
+            chunk = items[start:start + size]
+            batch_call = call(chunk)
+            try:
+                gas = self.estimate_gas(batch_call, account_address)
+            except Exception as e:
+                if len(chunk) > 1:
+                    size = len(chunk) // 2
+                    continue
+                print(f"Error submitting {batch_call.fn_name}: {e}")
+                gas = None
+            if gas is not None and gas > gas_budget:
+                if len(chunk) == 1:
+                    raise ValueError(f"One {batch_call.fn_name} item needs {gas} gas, more than the budget "
+                                     f"of {gas_budget}")
+                size = max(1, min(len(chunk) - 1, len(chunk) * gas_budget // gas))
+                continue
+            tx_hash = self._send_batch(batch_call, account_address, private_key, gas, wait) if gas else None
+            sent.append((tx_hash, chunk))
+            start += len(chunk)
+        return sent
+    
+    def _send_batch(self, call, account_address, private_key, gas, wait):
+        """Submit one batch call; returns its transaction hash, or None if it was rejected"""
+        try:
+            transaction = call.build_transaction({
+                'from': account_address,
+                'gas': gas,
+                'gasPrice': self.gas_price_cache.get(),
+                'nonce': self.nonce_manager.next_nonce(account_address),
+                'chainId': self.chain_id
+            })
+            return self.send_transaction(transaction, private_key, wait=wait)
+        except Exception as e:
+            print(f"Error submitting {call.fn_name}: {e}")
+            return None
+    
+    def send_transaction(self, transaction, private_key, wait=False):
+        """Sign and broadcast a transaction, tracking it with the receipt poller
+
+        Missing ``nonce``, ``gasPrice`` and ``chainId`` fields are filled from
+        the local caches. Returns the transaction hash as a hex string.
+        """
+        account_address = transaction['from']
+        transaction = dict(transaction)
+        transaction.setdefault('chainId', self.chain_id)
+        transaction.setdefault('gasPrice', self.gas_price_cache.get())
+        if 'nonce' not in transaction:
+            transaction['nonce'] = self.nonce_manager.next_nonce(account_address)
+        
+        # Any failure before the node accepts the transaction leaves its nonce unused
+        tx_hash = None
+        try:
+            signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
+            tx_hash = signed_txn.hash.hex()
+            
+            # Track before broadcasting so a fast block can't be missed
+            self.receipt_poller.track(tx_hash)
+            self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        except Exception:
+            if tx_hash is not None:
+                self.receipt_poller.forget(tx_hash)
+            self.nonce_manager.reset(account_address)
+            raise
+        
+        if wait:
+            self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            self.receipt_poller.poll_once()
+        
+        return tx_hash
+    
+    def decode_order_events(self, receipt):
+        """Decode OrderPlaced, TradeExecuted and OrderCancelled logs from a receipt"""
+        if not self.contract:
+            raise ValueError("Contract not loaded")
+        
+        events = self.contract.events
+        return {
+            'orders': [dict(event['args']) for event in events.OrderPlaced().process_receipt(receipt, errors=DISCARD)],
+            'trades': [dict(event['args']) for event in events.TradeExecuted().process_receipt(receipt, errors=DISCARD)],
+            'cancelled_order_ids': [event['args']['orderId'] for event in events.OrderCancelled().process_receipt(receipt, errors=DISCARD)]
+        }
+    
+    def start_receipt_poller(self):
+        """Resolve submitted transactions in a background thread"""
+        self.receipt_poller.start()
+    
+    def get_rpc_stats(self):
+        """Per-method RPC latency and error figures, if the provider records them"""
+        provider = self.w3.provider
+        return provider.stats() if isinstance(provider, PooledHTTPProvider) else {}
+    
+    def get_transaction_status(self, tx_hash):
+        """Get the tracked status of a submitted transaction"""
+        return self.receipt_poller.get_status(tx_hash)
+    
     def get_order(self, order_id):
         """Get order details"""
         if not self.contract:
             raise ValueError("Contract not loaded")
         
         try:
-            order = self.contract.functions.getOrder(order_id).call()
-            return {
-                'user': order[0],
-                'energyAmount': order[1],
-                'price': order[2],
-                'isBuyOrder': order[3],
-                'timestamp': order[4],
-                'isActive': order[5]
-            }
+            return self._format_order(self.contract.functions.getOrder(order_id).call())
         except Exception as e:
             print(f"Error getting order: {e}")
             return None
@@ -131,20 +473,126 @@ class Web3Helper:
             raise ValueError("Contract not loaded")
         
         try:
-            trade = self.contract.functions.getTrade(trade_id).call()
-            return {
-                'buyer': trade[0],
-                'seller': trade[1],
-                'energyAmount': trade[2],
-                'price': trade[3],
-                'timestamp': trade[4],
-                'isCompleted': trade[5],
-                'isCancelled': trade[6]
-            }
+            return self._format_trade(self.contract.functions.getTrade(trade_id).call())
         except Exception as e:
             print(f"Error getting trade: {e}")
             return None
     
+    def get_orders(self, order_ids, chunk_size=500, max_concurrency=4, block_identifier='latest'):
+        """Get many orders with batched JSON-RPC calls
+        
+        Returns ``{order_id: order}``; ids whose call fails map to None.
+        """
+        results = self._batch_call('getOrder', order_ids, chunk_size, max_concurrency, block_identifier)
+        return {order_id: self._format_order(values) if values is not None else None
+                for order_id, values in results.items()}
+    
+    def get_trades(self, trade_ids, chunk_size=500, max_concurrency=4, block_identifier='latest'):
+        """Get many trades with batched JSON-RPC calls
+        
+        Returns ``{trade_id: trade}``; ids whose call fails map to None.
+        """
+        results = self._batch_call('getTrade', trade_ids, chunk_size, max_concurrency, block_identifier)
+        return {trade_id: self._format_trade(values) if values is not None else None
+                for trade_id, values in results.items()}
+    
+    def _batch_call(self, fn_name, ids, chunk_size, max_concurrency, block_identifier):
+        """Run ``fn_name(id)`` for every id, ``chunk_size`` eth_calls per HTTP request
+        
+        Up to ``max_concurrency`` batch requests are in flight at once. All
+        calls read the same block so the results are a consistent snapshot.
+        Providers other than HTTP fall back to one call per id.
+        """
+        if not self.contract:
+            raise ValueError("Contract not loaded")
+        
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        if block_identifier == 'latest':
+            block_identifier = self.w3.eth.block_number
+        
+        function = self.contract.get_function_by_name(fn_name)
+        
+        if not isinstance(self.w3.provider, Web3.HTTPProvider):
+            results = {}
+            for item_id in ids:
+                try:
+                    results[item_id] = function(item_id).call(block_identifier=block_identifier)
+                except Exception:
+                    results[item_id] = None
+            return results
+        
+        # Encode calldata directly; contract.encodeABI costs ~1ms per call
+        selector = '0x' + function_abi_to_4byte_selector(function.abi).hex()
+        input_types = get_abi_input_types(function.abi)
+        output_types = get_abi_output_types(function.abi)
+        
+        def decode(result):
+            try:
+                return self.w3.codec.decode(output_types, bytes.fromhex(result[2:]))
+            except Exception:
+                return None
+        
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+        calls = [{
+            'jsonrpc': '2.0',
+            'id': request_id,
+            'method': 'eth_call',
+            'params': [{
+                'to': self.contract_address,
+                'data': selector + self.w3.codec.encode(input_types, [item_id]).hex()
+            }, block]
+        } for request_id, item_id in enumerate(ids)]
+        chunks = [calls[i:i + chunk_size] for i in range(0, len(calls), chunk_size)]
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(chunks)))) as pool:
+            responses = list(itertools.chain.from_iterable(pool.map(self._post_batch, chunks)))
+        
+        results = dict.fromkeys(ids)
+        for response in responses:
+            if 'result' in response and isinstance(response.get('id'), int) and response['id'] < len(ids):
+                results[ids[response['id']]] = decode(response['result'])
+        return results
+    
+    def _post_batch(self, payload):
+        """POST one JSON-RPC batch to the HTTP provider's endpoint"""
+        if isinstance(self.w3.provider, PooledHTTPProvider):
+            return self.w3.provider.make_batch_request(payload)
+        
+        request_kwargs = dict(self.w3.provider.get_request_kwargs())
+        request_kwargs.setdefault('timeout', 30)
+        response = self._batch_session.post(self.w3.provider.endpoint_uri, json=payload, **request_kwargs)
+        response.raise_for_status()
+        body = response.json()
+        # A node rejecting the whole batch answers with a single error object
+        if isinstance(body, dict):
+            raise ValueError(body.get('error', body))
+        return body
+    
+    @staticmethod
+    def _format_order(order):
+        return {
+            'user': order[0],
+            'energyAmount': order[1],
+            'price': order[2],
+            'isBuyOrder': order[3],
+            'timestamp': order[4],
+            'isActive': order[5]
+        }
+    
+    @staticmethod
+    def _format_trade(trade):
+        return {
+            'buyer': trade[0],
+            'seller': trade[1],
+            'energyAmount': trade[2],
+            'price': trade[3],
+            'timestamp': trade[4],
+            'isCompleted': trade[5],
+            'isCancelled': trade[6]
+        }
+    
     def get_active_orders_count(self):
         """Get count of active orders"""
         if not self.contract:
@@ -166,6 +614,62 @@ class Web3Helper:
                 "stateMutability": "nonpayable",
                 "type": "constructor"
             },
+            {
+                "anonymous": False,
+                "inputs": [
+                    {
+                        "indexed": False,
+                        "internalType": "uint256",
+                        "name": "intervalId",
+                        "type": "uint256"
+                    },
+                    {
+                        "indexed": False,
+                        "internalType": "address",
+                        "name": "user",
+                        "type": "address"
+                    },
+                    {
+                        "indexed": False,
+                        "internalType": "bool",
+                        "name": "isBuyer",
+                        "type": "bool"
+                    },
+                    {
+                        "indexed": False,
+                        "internalType": "uint256",
+                        "name": "energyAmount",
+                        "type": "uint256"
+                    }
+                ],
+                "name": "AuctionFill",
+                "type": "event"
+            },
+            {
+                "anonymous": False,
+                "inputs": [
+                    {
+                        "indexed": False,
+                        "internalType": "uint256",
+                        "name": "intervalId",
+                        "type": "uint256"
+                    },
+                    {
+                        "indexed": False,
+                        "internalType": "uint256",
+                        "name": "clearingPrice",
+                        "type": "uint256"
+                    },
+                    {
+                        "indexed": False,
+                        "internalType": "uint256",
+                        "name": "energyAmount",
+                        "type": "uint256"
+                    }
+                ],
+                "name": "AuctionSettled",
+                "type": "event"
+            },
             {
                 "anonymous": False,
                 "inputs": [
@@ -186,6 +690,10 @@ class Web3Helper:
                         "indexed": False,
                         "internalType": "uint256",
                         "name": "orderId",
+                        "type": "uint256"
+                    },
+                    {
+                        "indexed": False,
                         "internalType": "address",
                         "name": "user",
                         "type": "address"
@@ -240,15 +748,53 @@ class Web3Helper:
                         "type": "uint256"
                     },
                     {
-                        "indexed False,
+                        "indexed": False,
                         "internalType": "uint256",
                         "name": "price",
                         "type": "uint256"
+                    },
+                    {
+                        "indexed": False,
+                        "internalType": "uint256",
+                        "name": "buyOrderId",
+                        "type": "uint256"
+                    },
+                    {
+                        "indexed": False,
+                        "internalType": "uint256",
+                        "name": "sellOrderId",
+                        "type": "uint256"
                     }
                 ],
                 "name": "TradeExecuted",
                 "type": "event"
             },
+            {
+                "inputs": [],
+                "name": "bestAsk",
+                "outputs": [
+                    {
+                        "internalType": "uint96",
+                        "name": "",
+                        "type": "uint96"
+                    }
+                ],
+                "stateMutability": "view",
+                "type": "function"
+            },
+            {
+                "inputs": [],
+                "name": "bestBid",
+                "outputs": [
+                    {
+                        "internalType": "uint96",
+                        "name": "",
+                        "type": "uint96"
+                    }
+                ],
+                "stateMutability": "view",
+                "type": "function"
+            },
             {
                 "inputs": [
                     {
@@ -262,6 +808,25 @@ class Web3Helper:
                 "stateMutability": "nonpayable",
                 "type": "function"
             },
+            {
+                "inputs": [
+                    {
+                        "internalType": "uint256[]",
+                        "name": "_orderIds",
+                        "type": "uint256[]"
+                    }
+                ],
+                "name": "cancelOrders",
+                "outputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "cancelled",
+                        "type": "uint256"
+                    }
+                ],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
             {
                 "inputs": [],
                 "name": "getActiveOrdersCount",
@@ -319,6 +884,69 @@ class Web3Helper:
                 "stateMutability": "view",
                 "type": "function"
             },
+            {
+                "inputs": [
+                    {
+                        "internalType": "bool",
+                        "name": "_isBuyOrder",
+                        "type": "bool"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_price",
+                        "type": "uint256"
+                    }
+                ],
+                "name": "getPriceLevel",
+                "outputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "better",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "worse",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "head",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "tail",
+                        "type": "uint256"
+                    }
+                ],
+                "stateMutability": "view",
+                "type": "function"
+            },
+            {
+                "inputs": [
+                    {
+                        "internalType": "bool",
+                        "name": "_isBuyOrder",
+                        "type": "bool"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_price",
+                        "type": "uint256"
+                    }
+                ],
+                "name": "hintPrice",
+                "outputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "better",
+                        "type": "uint256"
+                    }
+                ],
+                "stateMutability": "view",
+                "type": "function"
+            },
             {
                 "inputs": [
                     {
@@ -337,7 +965,7 @@ class Web3Helper:
                     {
                         "internalType": "address",
                         "name": "seller",
-                        "type": "type": "address"
+                        "type": "address"
                     },
                     {
                         "internalType": "uint256",
@@ -368,6 +996,58 @@ class Web3Helper:
                 "stateMutability": "view",
                 "type": "function"
             },
+            {
+                "inputs": [],
+                "name": "lastSettledInterval",
+                "outputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "",
+                        "type": "uint256"
+                    }
+                ],
+                "stateMutability": "view",
+                "type": "function"
+            },
+            {
+                "inputs": [],
+                "name": "openInterval",
+                "outputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "",
+                        "type": "uint256"
+                    }
+                ],
+                "stateMutability": "view",
+                "type": "function"
+            },
+            {
+                "inputs": [],
+                "name": "openPartsLeft",
+                "outputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "",
+                        "type": "uint256"
+                    }
+                ],
+                "stateMutability": "view",
+                "type": "function"
+            },
+            {
+                "inputs": [],
+                "name": "operator",
+                "outputs": [
+                    {
+                        "internalType": "address",
+                        "name": "",
+                        "type": "address"
+                    }
+                ],
+                "stateMutability": "view",
+                "type": "function"
+            },
             {
                 "inputs": [
                     {
@@ -387,6 +1067,194 @@ class Web3Helper:
                     }
                 ],
                 "name": "placeOrder",
+                "outputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "",
+                        "type": "uint256"
+                    }
+                ],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
+            {
+                "inputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "_energyAmount",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_price",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "bool",
+                        "name": "_isBuyOrder",
+                        "type": "bool"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_maxMatches",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_hintPrice",
+                        "type": "uint256"
+                    }
+                ],
+                "name": "placeOrderWithLimit",
+                "outputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "",
+                        "type": "uint256"
+                    }
+                ],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
+            {
+                "inputs": [
+                    {
+                        "internalType": "uint256[]",
+                        "name": "_energyAmounts",
+                        "type": "uint256[]"
+                    },
+                    {
+                        "internalType": "uint256[]",
+                        "name": "_prices",
+                        "type": "uint256[]"
+                    },
+                    {
+                        "internalType": "bool[]",
+                        "name": "_isBuyOrders",
+                        "type": "bool[]"
+                    },
+                    {
+                        "internalType": "uint256[]",
+                        "name": "_hintPrices",
+                        "type": "uint256[]"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_maxMatches",
+                        "type": "uint256"
+                    }
+                ],
+                "name": "placeOrders",
+                "outputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "firstOrderId",
+                        "type": "uint256"
+                    }
+                ],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
+            {
+                "inputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "_intervalId",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_clearingPrice",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "address[]",
+                        "name": "_buyers",
+                        "type": "address[]"
+                    },
+                    {
+                        "internalType": "uint256[]",
+                        "name": "_boughtAmounts",
+                        "type": "uint256[]"
+                    },
+                    {
+                        "internalType": "address[]",
+                        "name": "_sellers",
+                        "type": "address[]"
+                    },
+                    {
+                        "internalType": "uint256[]",
+                        "name": "_soldAmounts",
+                        "type": "uint256[]"
+                    }
+                ],
+                "name": "settleAuction",
+                "outputs": [],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
+            {
+                "inputs": [
+                    {
+                        "internalType": "uint256",
+                        "name": "_intervalId",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_partsLeft",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_clearingPrice",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "uint256",
+                        "name": "_buyerCount",
+                        "type": "uint256"
+                    },
+                    {
+                        "internalType": "address[]",
+                        "name": "_users",
+                        "type": "address[]"
+                    },
+                    {
+                        "internalType": "uint256[]",
+                        "name": "_amounts",
+                        "type": "uint256[]"
+                    }
+                ],
+                "name": "settleAuctionPart",
+                "outputs": [],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
+            {
+                "inputs": [
+                    {
+                        "internalType": "address[]",
+                        "name": "_buyers",
+                        "type": "address[]"
+                    },
+                    {
+                        "internalType": "address[]",
+                        "name": "_sellers",
+                        "type": "address[]"
+                    },
+                    {
+                        "internalType": "uint256[]",
+                        "name": "_energyAmounts",
+                        "type": "uint256[]"
+                    },
+                    {
+                        "internalType": "uint256[]",
+                        "name": "_prices",
+                        "type": "uint256[]"
+                    }
+                ],
+                "name": "settleTrades",
                 "outputs": [],
                 "stateMutability": "nonpayable",
                 "type": "function"
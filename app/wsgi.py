@@ -0,0 +1,28 @@
+"""
+WSGI entry point for production serving
+
+    gunicorn -c gunicorn.conf.py app.wsgi:application
+
+With ``preload_app`` the model is loaded and warmed up once in the gunicorn
+master and shared copy-on-write with every forked worker. Blockchain
+clients and their background threads are started per worker by the
+``post_worker_init`` hook in gunicorn.conf.py.
+"""
+
+import gc
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.server import app, model_registry
+
+model_registry.startup()
+print(f"Model ready in {model_registry.startup_seconds:.2f}s")
+
+# Keep the preloaded model out of later collections so the garbage
+# collector doesn't touch (and un-share) its pages in the workers
+gc.freeze()
+
+application = app
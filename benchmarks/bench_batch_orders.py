@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Batch vs single order submission: gas per order and orders/sec
+
+Submits the same orders once through place_order (one transaction each)
+and once through place_orders (placeOrders, chunked by gas budget) on an
+in-process eth-tester chain, and reports orders/sec until every receipt is
+resolved, transactions sent and gas used per order.
+
+With py-solc-x installed (or --artifact) EnergyTrading is deployed, so the gas
+figures are the contract's. Without it (or with --stub) a stub contract that
+answers every call with zeros stands in: orders/sec then measures the
+client and node round trips only, and gas is not reported.
+Requires: pip install "web3[tester]" (and py-solc-x for gas)
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import EthereumTesterProvider
+
+from app.web3_helper import Web3Helper
+from app.contract_compiler import build_contract, solcx
+
+# Runtime returning 512 zero bytes for any call, and the init code deploying it
+STUB_INIT = '0x6006600c60003960066000f3' + '6102006000f3'
+
+MID_PRICE = 1000000
+
+
+def deploy(stub, artifact=None):
+    """``(helper, account, key)`` with EnergyTrading (or the stub) deployed on a fresh chain"""
+    provider = EthereumTesterProvider()
+    helper = Web3Helper(provider=provider)
+    account = helper.w3.eth.accounts[0]
+    key = provider.ethereum_tester.backend.account_keys[0].to_hex()
+    bytecode = STUB_INIT if stub else build_contract(artifact)[1]
+    tx_hash = helper.send_transaction({'from': account, 'data': bytecode, 'gas': 5000000}, key, wait=True)
+    helper.load_contract(helper.w3.eth.get_transaction_receipt(tx_hash).contractAddress)
+    # Matches pay sellers from the contract's balance
+    helper.send_transaction({'from': account, 'to': helper.contract_address, 'value': 10 ** 23, 'gas': 50000},
+                            key, wait=True)
+    return helper, account, key
+
+
+def order_flow(n_orders, seed=42):
+    """Buys and sells around MID_PRICE; about a third of them cross the spread"""
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(n_orders):
+        is_buy = rng.random() < 0.5
+        offset = rng.randint(-20, 40) * 10
+        orders.append((rng.randint(1, 50), MID_PRICE - offset if is_buy else MID_PRICE + offset, is_buy))
+    return orders
+
+
+def resolve(helper, tx_hashes):
+    """Wait for every receipt; total gas used"""
+    while helper.receipt_poller.pending_count:
+        helper.receipt_poller.poll_once()
+    return sum(helper.w3.eth.get_transaction_receipt(tx_hash)['gasUsed'] for tx_hash in tx_hashes)
+
+
+def run_single(stub, artifact, orders, max_matches):
+    helper, account, key = deploy(stub, artifact)
+    start = time.perf_counter()
+    tx_hashes = [helper.place_order(account, key, amount, price, is_buy, max_matches=max_matches)
+                 for amount, price, is_buy in orders]
+    gas = resolve(helper, tx_hashes)
+    return time.perf_counter() - start, len(tx_hashes), gas
+
+
+def run_batch(stub, artifact, orders, max_matches, gas_budget):
+    helper, account, key = deploy(stub, artifact)
+    start = time.perf_counter()
+    chunks = helper.place_orders(account, key, orders, max_matches=max_matches, gas_budget=gas_budget)
+    tx_hashes = [tx_hash for tx_hash, _ in chunks]
+    gas = resolve(helper, tx_hashes)
+    return time.perf_counter() - start, len(tx_hashes), gas
+
+
+def main():
+    """Run the batch submission benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--max-matches', type=int, default=1)
+    parser.add_argument('--gas-budget', type=int, default=6000000, help='gas limit per batch transaction')
+    parser.add_argument('--artifact', help='compiled contract JSON (abi, bytecode) instead of compiling the source')
+    parser.add_argument('--stub', action='store_true', help='use the stub contract even if solc is available')
+    args = parser.parse_args()
+    stub = args.stub or (solcx is None and not args.artifact)
+    if stub:
+        print("Using the stub contract: gas per order is not measured")
+
+    print(f"\n{'orders':>7} {'mode':>7} {'txs':>6} {'orders/s':>10} {'gas/order':>10}")
+    for n_orders in args.orders:
+        orders = order_flow(n_orders)
+        for mode, run in (('single', lambda: run_single(stub, args.artifact, orders, args.max_matches)),
+                          ('batch', lambda: run_batch(stub, args.artifact, orders, args.max_matches, args.gas_budget))):
+            with contextlib.redirect_stdout(io.StringIO()):  # Web3Helper prints every submission
+                seconds, transactions, gas = run()
+            gas_per_order = '-' if stub else f"{gas / n_orders:,.0f}"
+            print(f"{n_orders:>7} {mode:>7} {transactions:>6} {n_orders / seconds:>10,.1f} {gas_per_order:>10}")
+
+
+if __name__ == "__main__":
+    main()
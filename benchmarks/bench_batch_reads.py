@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Order read throughput: one eth_call per id vs batched JSON-RPC
+
+Runs against benchmarks/stand_in_node.py (a JSON-RPC server in its own
+process answering getOrder calls with synthetic orders) so both paths pay
+the same simulated network round trip per HTTP request (--latency-ms).
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.web3_helper import Web3Helper
+from benchmarks.stand_in_node import start_node
+
+CONTRACT_ADDRESS = "0x" + "11" * 20
+
+
+def connect(port, latency, http_requests):
+    """Start the stand-in node and connect a Web3Helper to it"""
+    node = start_node(port, latency, http_requests)
+    for _ in range(100):
+        try:
+            return node, Web3Helper(rpc_url=f"http://127.0.0.1:{port}")
+        except Exception:
+            time.sleep(0.05)
+    raise RuntimeError("Stand-in node did not start")
+
+
+def timed(fn, http_requests):
+    """Run ``fn`` and return (seconds, HTTP requests made)"""
+    http_requests.value = 0
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start, http_requests.value
+
+
+def main():
+    """Run the batched read benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ids', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='simulated round trip per HTTP request')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8547)
+    parser.add_argument('--sequential-max', type=int, default=1000,
+                        help='largest id count to read one call at a time')
+    args = parser.parse_args()
+
+    http_requests = multiprocessing.Value('i', 0)
+    node, helper = connect(args.port, args.latency_ms / 1000, http_requests)
+    helper.load_contract(CONTRACT_ADDRESS)
+
+    print(f"\n{'ids':>7} {'per-call reads/s':>17} {'requests':>9} "
+          f"{'batched reads/s':>16} {'requests':>9} {'concurrent reads/s':>19} {'requests':>9}")
+    for n_ids in args.ids:
+        ids = list(range(1, n_ids + 1))
+        if n_ids <= args.sequential_max:
+            seconds, requests = timed(lambda: [helper.get_order(i) for i in ids], http_requests)
+            sequential = f"{n_ids / seconds:>17,.0f} {requests:>9}"
+        else:
+            sequential = f"{'-':>17} {'-':>9}"
+
+        batched, batched_requests = timed(
+            lambda: helper.get_orders(ids, chunk_size=args.chunk_size, max_concurrency=1), http_requests)
+        concurrent, concurrent_requests = timed(
+            lambda: helper.get_orders(ids, chunk_size=args.chunk_size, max_concurrency=args.concurrency),
+            http_requests)
+        print(f"{n_ids:>7} {sequential} {n_ids / batched:>16,.0f} {batched_requests:>9} "
+              f"{n_ids / concurrent:>19,.0f} {concurrent_requests:>9}")
+
+    node.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Clearing time of the call auction for one interval's orders
+
+Fills one settlement interval with seeded random orders from a pool of
+prosumer addresses, then times submitting them, clearing the interval at
+its uniform price (NumPy) and netting the fills into the single settlement
+transaction. For comparison, the same orders are matched one by one in the
+continuous OrderBook. With py-solc-x installed (or --artifact), the
+settlement's gas is estimated against EnergyTrading deployed on an
+in-process eth-tester chain; otherwise it is not reported.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+from web3 import Web3
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.call_auction import CallAuction
+from app.contract_compiler import build_contract, solcx
+from app.matching_engine import OrderBook
+
+
+def order_flow(n_orders, n_users, rng):
+    """``(user, amount, price, is_buy)`` orders around a 1000 wei/kWh mid price"""
+    # Checksummed, as settleAuction's address arguments must be
+    users = [Web3.to_checksum_address(f"0x{i:040x}") for i in range(1, n_users + 1)]
+    orders = []
+    for _ in range(n_orders):
+        is_buy = rng.random() < 0.5
+        price = rng.randint(950, 1050) + (-20 if is_buy else 20) * (rng.random() < 0.5)
+        orders.append((rng.choice(users), rng.randint(1, 50), price, is_buy))
+    return orders
+
+
+def bench_auction(orders):
+    """``(submit seconds, clear result, settlement)`` for one interval holding all ``orders``"""
+    settlements = []
+    auction = CallAuction(interval_seconds=900, on_settlement=settlements.append)
+    start = time.perf_counter()
+    for user, amount, price, is_buy in orders:
+        auction.submit_order(user, amount, price, is_buy, timestamp=900)
+    submit_time = time.perf_counter() - start
+    return submit_time, auction.clear(1), settlements[0] if settlements else None
+
+
+def settlement_gas(helper, settlement):
+    """Estimated gas of the settlement's settleAuction call, or a note why there is none"""
+    if helper is None or settlement is None:
+        return '-'
+    call = helper.contract.functions.settleAuction(
+        settlement['intervalId'], settlement['clearingPrice'],
+        settlement['buyers'], settlement['boughtAmounts'],
+        settlement['sellers'], settlement['soldAmounts']
+    )
+    try:
+        return f"{call.estimate_gas({'from': helper.w3.eth.accounts[0]}):,}"
+    except Exception:
+        return 'over limit'
+
+
+def deploy(artifact=None):
+    """Web3Helper with a funded EnergyTrading on an in-process eth-tester chain"""
+    from web3 import EthereumTesterProvider
+    from app.web3_helper import Web3Helper
+    provider = EthereumTesterProvider()
+    helper = Web3Helper(provider=provider)
+    account = helper.w3.eth.accounts[0]
+    key = provider.ethereum_tester.backend.account_keys[0].to_hex()
+    tx_hash = helper.send_transaction({'from': account, 'data': build_contract(artifact)[1], 'gas': 5000000},
+                                      key, wait=True)
+    helper.load_contract(helper.w3.eth.get_transaction_receipt(tx_hash).contractAddress)
+    # settleAuction pays sellers from the contract's balance
+    helper.send_transaction({'from': account, 'to': helper.contract_address, 'value': 10 ** 23, 'gas': 50000},
+                            key, wait=True)
+    return helper
+
+
+def bench_continuous(orders):
+    """``(seconds, trades)`` matching ``orders`` one by one in the OrderBook"""
+    book = OrderBook()
+    start = time.perf_counter()
+    trades = 0
+    for i, (user, amount, price, is_buy) in enumerate(orders):
+        trades += len(book.place_order(user, amount, price, is_buy, timestamp=i)[1])
+    return time.perf_counter() - start, trades
+
+
+def main():
+    """Run the call auction benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='orders per interval')
+    parser.add_argument('--users', type=int, default=1000, help='distinct addresses placing orders')
+    parser.add_argument('--no-continuous', action='store_true', help='skip the OrderBook comparison')
+    parser.add_argument('--artifact', help='compiled contract JSON (abi, bytecode) instead of compiling the source')
+    parser.add_argument('--no-gas', action='store_true', help='skip the settlement gas estimate')
+    args = parser.parse_args()
+    rng = random.Random(42)
+    helper = None
+    if not args.no_gas and (solcx is not None or args.artifact):
+        with contextlib.redirect_stdout(io.StringIO()):  # Web3Helper prints its connection
+            helper = deploy(args.artifact)
+
+    print(f"{'orders':>8} {'submit/s':>10} {'clear ms':>9} {'price':>6} {'volume':>9} {'filled':>7} "
+          f"{'buyers':>7} {'sellers':>7} {'settle gas':>11} {'book ms':>9} {'trades':>7}")
+    for n_orders in args.orders:
+        orders = order_flow(n_orders, args.users, rng)
+        submit_time, result, settlement = bench_auction(orders)
+        gas = settlement_gas(helper, settlement)
+        book_ms, trades = '-', '-'
+        if not args.no_continuous:
+            seconds, trades = bench_continuous(orders)
+            book_ms = f"{seconds * 1000:.1f}"
+        print(f"{n_orders:>8} {n_orders / submit_time:>10.0f} {result['seconds'] * 1000:>9.1f} "
+              f"{result['clearingPrice']:>6} {result['energyAmount']:>9} {result['filledOrders']:>7} "
+              f"{result['buyers']:>7} {result['sellers']:>7} {gas:>11} {book_ms:>9} {trades:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Query latency benchmark for the SQLite event index at increasing history size
+
+Rows are written straight into the store (no chain needed) so the figures
+isolate query cost. Requires: pip install "web3[tester]"
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import EthereumTesterProvider
+
+from app.web3_helper import Web3Helper
+from app.event_indexer import EventIndexer
+
+USERS = [f"0x{i:040x}" for i in range(1, 1001)]
+
+
+def populate(indexer, n_orders, rng):
+    """Insert synthetic orders (20% still active) and one trade per two orders"""
+    orders, trades = [], []
+    for order_id in range(1, n_orders + 1):
+        status = 'active' if rng.random() < 0.2 else rng.choice(['filled', 'cancelled'])
+        amount = rng.randint(1, 50)
+        orders.append((order_id, rng.choice(USERS), amount, amount, rng.randint(900, 1100),
+                       order_id % 2, status, order_id // 10, order_id // 10, '0x'))
+        if order_id % 2 == 0:
+            trades.append((order_id // 2, rng.choice(USERS), rng.choice(USERS), amount,
+                           rng.randint(900, 1100), order_id // 10, '0x'))
+    with indexer.db:
+        indexer.db.executemany("INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", orders)
+        indexer.db.executemany("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?)", trades)
+    indexer.db.execute("ANALYZE")
+
+
+def time_query(fn, repeat=200):
+    """Median latency of ``fn`` in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+
+def main():
+    """Run the event index query benchmark"""
+    helper = Web3Helper(provider=EthereumTesterProvider())
+    helper.load_contract("0x" + "11" * 20)
+    rng = random.Random(42)
+
+    print(f"\n{'orders':>9} {'book ms':>9} {'user orders ms':>15} {'user trades ms':>15} {'recent trades ms':>17} {'active count ms':>16}")
+    for n_orders in (10000, 100000, 1000000):
+        indexer = EventIndexer(helper)
+        populate(indexer, n_orders, rng)
+        user = rng.choice(USERS)
+        print(f"{n_orders:>9} "
+              f"{time_query(lambda: indexer.get_order_book(10)):>9.3f} "
+              f"{time_query(lambda: indexer.get_orders(user=user, limit=50)):>15.3f} "
+              f"{time_query(lambda: indexer.get_trades(user=user, limit=50)):>15.3f} "
+              f"{time_query(lambda: indexer.get_trades(limit=50)):>17.3f} "
+              f"{time_query(lambda: indexer.get_active_orders_count(), repeat=20):>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
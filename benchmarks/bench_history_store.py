@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+History storage benchmark: CSV vs the columnar HistoryStore
+
+For each row count, writes hourly sample readings once as CSV (what
+train_model used to do) and once into a HistoryStore, then compares size
+on disk, write time, a full load of the training columns and a one-week
+time-range query.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from ml.history_store import HistoryStore
+from ml.solar_predictor import FEATURE_COLUMNS, TARGET_COLUMN, SolarEnergyPredictor
+
+
+def timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def main():
+    """Run the history storage benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000, 5000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    columns = FEATURE_COLUMNS + [TARGET_COLUMN]
+    print(f"\n{'rows':>9} {'format':>7} {'size MB':>8} {'write s':>8} {'load s':>8} {'week query ms':>14}")
+    for n_rows in args.rows:
+        data = SolarEnergyPredictor().generate_sample_data(n_rows)
+        # A week in the middle of the history
+        week_start = data['timestamp'].iloc[n_rows // 2]
+        week_end = week_start + np.timedelta64(7, 'D')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'history.csv')
+            store = HistoryStore(os.path.join(tmp, 'store'))
+
+            csv_write, _ = timed(lambda: data.to_csv(csv_path, index=False), 1)
+            csv_load, loaded = timed(lambda: pd.read_csv(csv_path, usecols=columns), args.repeat)
+
+            def csv_week():
+                frame = pd.read_csv(csv_path, parse_dates=['timestamp'])
+                return frame[(frame['timestamp'] >= week_start) & (frame['timestamp'] < week_end)]
+            csv_query, csv_rows = timed(csv_week, args.repeat)
+
+            store_write, _ = timed(lambda: store.write(data, site='bench', mode='overwrite'), 1)
+            store_load, stored = timed(lambda: store.read(columns), args.repeat)
+            store_query, store_rows = timed(lambda: store.read(start=week_start, end=week_end), args.repeat)
+            assert len(stored) == len(loaded) and len(store_rows) == len(csv_rows) == 168
+
+            for label, size, write, load, query in (
+                ('csv', os.path.getsize(csv_path), csv_write, csv_load, csv_query),
+                ('store', directory_size(store.root), store_write, store_load, store_query)
+            ):
+                print(f"{n_rows:>9} {label:>7} {size / 2 ** 20:>8.1f} {write:>8.2f} {load:>8.3f} {query * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the off-chain OrderBook at increasing book depth
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.matching_engine import OrderBook
+
+USERS = [f"0x{i:040x}" for i in range(1, 101)]
+
+
+def build_book(n_resting, rng):
+    """Fill a book with non-crossing bids (<= 1000) and asks (>= 1001)"""
+    book = OrderBook()
+    for i in range(n_resting):
+        if i % 2:
+            book.place_order(rng.choice(USERS), rng.randint(1, 50), rng.randint(900, 1000), True, timestamp=i)
+        else:
+            book.place_order(rng.choice(USERS), rng.randint(1, 50), rng.randint(1001, 1100), False, timestamp=i)
+    return book
+
+
+def bench_matching(book, n_orders, rng):
+    """Send aggressive orders that cross the spread; return (seconds, trades)"""
+    start = time.perf_counter()
+    trades = 0
+    for i in range(n_orders):
+        is_buy = i % 2 == 0
+        price = 1100 if is_buy else 900
+        _, executed = book.place_order(rng.choice(USERS), rng.randint(1, 50), price, is_buy)
+        trades += len(executed)
+    return time.perf_counter() - start, trades
+
+
+def bench_cancel(book, n_cancels, rng):
+    """Cancel random resting orders; return seconds"""
+    candidates = [o for o in rng.sample(range(1, book.order_counter + 1), n_cancels * 2)
+                  if book.orders[o]['isActive']][:n_cancels]
+    start = time.perf_counter()
+    for order_id in candidates:
+        book.cancel_order(order_id, book.orders[order_id]['user'])
+    return time.perf_counter() - start, len(candidates)
+
+
+def main():
+    """Run the matching engine benchmark"""
+    rng = random.Random(42)
+    print(f"{'resting':>9} {'build s':>8} {'orders/s':>10} {'matches/s':>10} {'cancels/s':>10}")
+    for n_resting in (10000, 100000, 1000000):
+        start = time.perf_counter()
+        book = build_book(n_resting, rng)
+        build_time = time.perf_counter() - start
+
+        elapsed, trades = bench_matching(book, 10000, rng)
+        cancel_time, cancelled = bench_cancel(book, 10000, rng)
+        print(f"{n_resting:>9} {build_time:>8.2f} {10000 / elapsed:>10,.0f} "
+              f"{trades / elapsed:>10,.0f} {cancelled / cancel_time:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
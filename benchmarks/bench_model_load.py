@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Model artifact benchmark: pickled sklearn forest vs memory-mapped FlatForest
+
+Trains and saves one forest, then for each format starts --workers fresh
+interpreter processes (like gunicorn workers without preload) that load the
+model and predict. Reports load time, the resident and proportional set
+size each worker gains from the model (PSS splits shared pages between the
+processes mapping them), and single-row and batch predict latency.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from ml.solar_predictor import FEATURE_COLUMNS, SolarEnergyPredictor
+
+
+def memory_mb():
+    """(RSS, PSS) of this process in MB, from /proc/self/smaps_rollup"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                fields[parts[0]] = int(parts[1]) / 1024
+    return fields['Rss:'], fields['Pss:']
+
+
+def worker(model_dir, model_format, weather, barrier, results):
+    warnings.simplefilter('ignore')  # sklearn's feature-name warning on every call
+    sys.stdout = open(os.devnull, 'w')
+    barrier.wait()  # measure the baseline once every worker has started
+    baseline_rss, baseline_pss = memory_mb()
+    start = time.perf_counter()
+    predictor = SolarEnergyPredictor(model_format=model_format)
+    predictor.load_model(model_dir)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for row in weather[:200]:
+        predictor.predict_energy(*row)
+    single_ms = (time.perf_counter() - start) / 200 * 1000
+    start = time.perf_counter()
+    predictor.predict_batch(weather)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    barrier.wait()  # every worker has the model resident before memory is read
+    rss, pss = memory_mb()
+    results.put((load_seconds, rss - baseline_rss, pss - baseline_pss, single_ms, batch_ms))
+    barrier.wait()
+
+
+def main():
+    """Run the model artifact benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=20000, help='training rows')
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as model_dir:
+        predictor = SolarEnergyPredictor(n_estimators=args.trees)
+        predictor.train_model(predictor.generate_sample_data(args.rows), save_data=False, save=False)
+        predictor.save_model(model_dir)
+        weather = predictor.generate_sample_data(args.batch, seed=7)[FEATURE_COLUMNS].to_numpy()
+
+        pickle_mb = sum(os.path.getsize(os.path.join(model_dir, name))
+                        for name in ('solar_model.pkl', 'solar_scaler.pkl')) / 2 ** 20
+        flat_dir = os.path.join(model_dir, 'solar_forest')
+        flat_mb = sum(os.path.getsize(os.path.join(flat_dir, name)) for name in os.listdir(flat_dir)) / 2 ** 20
+
+        print(f"\n{args.trees} trees on {args.rows} rows, {args.workers} workers")
+        print(f"{'format':>7} {'file MB':>8} {'load s':>8} {'RSS+ MB':>8} {'PSS+ MB':>8} "
+              f"{'single ms':>10} {f'batch {args.batch} ms':>14}")
+        for model_format, size in (('joblib', pickle_mb), ('flat', flat_mb)):
+            barrier = context.Barrier(args.workers)
+            results = context.Queue()
+            processes = [context.Process(target=worker, args=(model_dir, model_format, weather, barrier, results))
+                         for _ in range(args.workers)]
+            for process in processes:
+                process.start()
+            stats = np.array([results.get() for _ in processes])
+            for process in processes:
+                process.join()
+            load, rss, pss, single, batch = stats.mean(axis=0)
+            print(f"{model_format:>7} {size:>8.1f} {load:>8.3f} {rss:>8.1f} {pss:>8.1f} {single:>10.3f} {batch:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark: per-row predict_energy vs vectorized predict_batch
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.solar_predictor import SolarEnergyPredictor, FEATURE_COLUMNS
+
+
+def trained_predictor(n_samples=1000):
+    """Fit a predictor in memory without writing data or model files"""
+    predictor = SolarEnergyPredictor()
+    data = predictor.generate_sample_data(n_samples)
+    X = predictor.scaler.fit_transform(data[FEATURE_COLUMNS])
+    predictor.model.fit(X, data['energy_output'])
+    predictor.is_trained = True
+    return predictor
+
+
+def bench_per_row(predictor, rows):
+    """Score rows one at a time through predict_energy"""
+    start = time.perf_counter()
+    for row in rows:
+        predictor.predict_energy(*row)
+    return time.perf_counter() - start
+
+
+def bench_batch(predictor, rows):
+    """Score all rows in a single predict_batch call"""
+    start = time.perf_counter()
+    predictor.predict_batch(rows)
+    return time.perf_counter() - start
+
+
+def main():
+    """Run the prediction throughput benchmark"""
+    print("🤖 Training benchmark model...")
+    predictor = trained_predictor()
+    weather = predictor.generate_sample_data(100000)[FEATURE_COLUMNS].to_numpy()
+
+    print(f"\n{'rows':>8} {'per-row rows/s':>16} {'batch rows/s':>14} {'speedup':>9}")
+    for n_rows in (48, 1000, 10000, 100000):
+        rows = weather[:n_rows]
+        # The per-row path is slow; time a sample and extrapolate for large N
+        sample = rows[:min(n_rows, 500)]
+        per_row_rate = len(sample) / bench_per_row(predictor, sample)
+        batch_rate = n_rows / bench_batch(predictor, rows)
+        print(f"{n_rows:>8} {per_row_rate:>16,.0f} {batch_rate:>14,.0f} {batch_rate / per_row_rate:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
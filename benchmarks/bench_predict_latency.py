@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Single-prediction latency: sklearn engine vs the NumPy lockstep engine
+
+Times predict_energy one row at a time (the /predict path) with each
+engine, for forests of several sizes, and reports p50/p99 latency.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from ml.solar_predictor import FEATURE_COLUMNS, SolarEnergyPredictor
+
+
+def single_latencies(predictor, rows):
+    latencies = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        predictor.predict_energy(*row)
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def main():
+    """Run the prediction latency benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--trees', type=int, nargs='+', default=[10, 100, 300])
+    parser.add_argument('--rows', type=int, default=1000, help='training rows')
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore')  # sklearn's feature-name warning on every call
+
+    print(f"\n{'trees':>6} {'engine':>9} {'p50 us':>9} {'p99 us':>9}")
+    for n_trees in args.trees:
+        predictor = SolarEnergyPredictor(n_estimators=n_trees)
+        predictor.train_model(predictor.generate_sample_data(args.rows), save_data=False, save=False)
+        weather = predictor.generate_sample_data(args.calls, seed=7)[FEATURE_COLUMNS].to_numpy()
+
+        for engine in ('sklearn', 'lockstep'):
+            predictor.set_engine(engine)
+            single_latencies(predictor, weather[:50])  # warm up
+            latencies = np.sort(single_latencies(predictor, weather)) * 1e6
+            print(f"{n_trees:>6} {engine:>9} {latencies[len(latencies) // 2]:>9.0f} "
+                  f"{latencies[int(len(latencies) * 0.99)]:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Streaming training benchmark: peak memory vs history file size
+
+Writes synthetic weather/production CSVs of each --rows size (chunk by
+chunk, so the writer never holds the file), then trains on each in a fresh
+process with train_streaming and, up to --max-in-memory-rows, with the
+whole file loaded into pandas for comparison. Streaming peak RSS should
+stay flat as the file grows.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from ml.solar_predictor import SolarEnergyPredictor, TrainingMonitor
+
+WRITE_CHUNK_ROWS = 500000
+
+
+def write_history(path, n_rows):
+    generator = SolarEnergyPredictor()
+    for seed, start in enumerate(range(0, n_rows, WRITE_CHUNK_ROWS)):
+        chunk = generator.generate_sample_data(min(WRITE_CHUNK_ROWS, n_rows - start), seed=seed)
+        chunk.to_csv(path, mode='a', header=start == 0, index=False)
+
+
+def run(mode, path, args, results):
+    predictor = SolarEnergyPredictor(n_estimators=args.trees, max_samples=args.max_samples,
+                                     min_samples_leaf=args.min_samples_leaf)
+    if mode == 'streaming':
+        predictor.train_streaming(path, chunksize=args.chunksize, trees_per_chunk=args.trees_per_chunk, save=False)
+        results.put(predictor.last_training_stats)
+    else:
+        # Count the CSV load too: that is where the whole-file approach pays
+        with TrainingMonitor() as monitor:
+            predictor.train_model(pd.read_csv(path), save_data=False, save=False)
+        results.put(dict(predictor.last_training_stats, **monitor.stats))
+
+
+def measure(mode, path, args):
+    """Train in a fresh process so each peak RSS starts from the same baseline"""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run, args=(mode, path, args, results))
+    process.start()
+    stats = results.get()
+    process.join()
+    return stats
+
+
+def main():
+    """Run the streaming training benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000, 5000000])
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--trees-per-chunk', type=int, default=10)
+    parser.add_argument('--max-samples', type=int, default=50000, help='bootstrap rows per tree')
+    parser.add_argument('--min-samples-leaf', type=int, default=5)
+    parser.add_argument('--max-in-memory-rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    print(f"\n{'rows':>10} {'file MB':>8} {'mode':>10} {'trees':>6} {'wall s':>8} {'peak RSS MB':>12} {'r2':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            path = os.path.join(tmp, f'history_{n_rows}.csv')
+            write_history(path, n_rows)
+            size_mb = os.path.getsize(path) / 2 ** 20
+
+            modes = ['streaming'] + (['in-memory'] if n_rows <= args.max_in_memory_rows else [])
+            for mode in modes:
+                stats = measure(mode, path, args)
+                print(f"{n_rows:>10} {size_mb:>8.0f} {mode:>10} {stats['n_estimators']:>6} "
+                      f"{stats['wall_seconds']:>8.2f} {stats['peak_rss_mb']:>12.0f} {stats['r2']:>7.3f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generation throughput: rows/sec to a history store and to CSV
+
+Generates the same multi-site history once per output format and process
+count and reports rows/sec and bytes per row. Generation alone (no output)
+is timed too, as the ceiling the writers approach.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.synthetic_data import OUTPUT_FORMATS, SyntheticDataGenerator
+
+
+def main():
+    """Run the synthetic data benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000000, help='rows per run (CSV runs use a tenth)')
+    parser.add_argument('--sites', type=int, default=10)
+    parser.add_argument('--interval', type=int, nargs='+', default=[3600, 60], help='seconds between readings')
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    print(f"\n{'interval s':>10} {'format':>9} {'procs':>6} {'rows':>11} {'rows/s':>12} {'bytes/row':>10}")
+    for interval in args.interval:
+        generator = SyntheticDataGenerator(args.sites, interval_seconds=interval)
+        rows_per_site = args.rows // args.sites
+
+        start = time.perf_counter()
+        for task in generator.tasks(rows_per_site, 1000000):
+            generator.task_columns(*task)
+        rate = rows_per_site * args.sites / (time.perf_counter() - start)
+        print(f"{interval:>10} {'generate':>9} {1:>6} {rows_per_site * args.sites:>11} {rate:>12,.0f} {'-':>10}")
+
+        for output_format in OUTPUT_FORMATS:
+            n = rows_per_site if output_format == 'store' else max(rows_per_site // 10, 1)
+            for processes in sorted(set(args.processes)):
+                with tempfile.TemporaryDirectory() as tmp:
+                    path = os.path.join(tmp, 'synthetic' if output_format == 'store' else 'synthetic.csv')
+                    stats = generator.write(path, n, output_format, processes=processes)
+                print(f"{interval:>10} {output_format:>9} {processes:>6} {stats['rows']:>11} "
+                      f"{stats['rows_per_second']:>12,.0f} {stats['bytes'] / stats['rows']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
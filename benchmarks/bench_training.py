@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Training benchmark: serial vs all-core refits and warm-start growth
+
+For each dataset size, fits the forest from scratch on one core and on all
+cores, then grows it with --new-trees trees fitted on a further 10% of
+fresh rows. Reports wall-clock, CPU time and peak resident memory per run.
+Fully grown trees on millions of rows need tens of GB, so each tree sees a
+bootstrap sample of at most --max-samples rows (the setting to use for
+nightly retrains on months of telemetry).
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.solar_predictor import SolarEnergyPredictor
+
+
+def make_predictor(args):
+    return SolarEnergyPredictor(
+        n_estimators=args.trees,
+        max_samples=args.max_samples,
+        min_samples_leaf=args.min_samples_leaf
+    )
+
+
+def main():
+    """Run the training benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--new-trees', type=int, default=20)
+    parser.add_argument('--max-samples', type=int, default=100000, help='bootstrap rows per tree')
+    parser.add_argument('--min-samples-leaf', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"\nCPU cores: {os.cpu_count()}")
+    print(f"{'rows':>10} {'run':>14} {'trees':>6} {'wall s':>8} {'cpu s':>8} {'peak RSS MB':>12} {'r2':>7}")
+    for n_rows in args.rows:
+        generator = SolarEnergyPredictor()
+        data = generator.generate_sample_data(n_rows + n_rows // 10)
+        initial, fresh = data.iloc[:n_rows], data.iloc[n_rows:]
+
+        runs = []
+        for label, n_jobs in (('refit 1 core', 1), ('refit all', -1)):
+            predictor = make_predictor(args)
+            predictor.train_model(initial, n_jobs=n_jobs, save_data=False, save=False)
+            runs.append((label, predictor.last_training_stats))
+
+        predictor.update_model(fresh, n_new_estimators=args.new_trees, n_jobs=-1, save=False)
+        runs.append(('warm start', predictor.last_training_stats))
+
+        for label, stats in runs:
+            print(f"{n_rows:>10} {label:>14} {stats['n_estimators']:>6} {stats['wall_seconds']:>8.2f} "
+                  f"{stats['cpu_seconds']:>8.2f} {stats['peak_rss_mb']:>12.0f} {stats['r2']:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Transaction submission benchmark against an in-process eth-tester chain
+
+Compares the original per-order pattern (eth_gasPrice + eth_getTransactionCount
++ send + blocking receipt wait) with Web3Helper.send_transaction (local nonce,
+cached gas price, fire-and-forget, bulk receipt polling).
+
+eth-tester mines every transaction into its own block and, without solc,
+EnergyTrading cannot be deployed here, so both paths submit plain value
+transfers; the per-order RPC pattern being measured is identical to
+place_order's. eth-tester's own receipt lookups are slow and grow with the
+chain, so RPC calls per order and the --latency-ms run (which adds a fixed
+delay per call, like a remote node) are the figures to compare.
+Requires: pip install "web3[tester]"
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import EthereumTesterProvider
+
+from app.web3_helper import Web3Helper
+
+
+def rpc_counter(calls, latency):
+    """Middleware that counts RPC calls per method and adds fixed latency"""
+    def middleware(make_request, w3):
+        def inner(method, params):
+            calls[method] += 1
+            if latency:
+                time.sleep(latency)
+            return make_request(method, params)
+        return inner
+    return middleware
+
+
+def legacy_submit(w3, sender, private_key, recipient, n_orders):
+    """One gas price + nonce lookup and a blocking receipt wait per order"""
+    start = time.perf_counter()
+    for _ in range(n_orders):
+        transaction = {
+            'from': sender,
+            'to': recipient,
+            'value': 1,
+            'gas': 21000,
+            'gasPrice': w3.eth.gas_price,
+            'nonce': w3.eth.get_transaction_count(sender),
+            'chainId': w3.eth.chain_id
+        }
+        signed_txn = w3.eth.account.sign_transaction(transaction, private_key)
+        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        w3.eth.wait_for_transaction_receipt(tx_hash)
+    return time.perf_counter() - start
+
+
+def pipelined_submit(helper, sender, private_key, recipient, n_orders):
+    """Fire-and-forget submission, then one bulk receipt poll"""
+    start = time.perf_counter()
+    for _ in range(n_orders):
+        helper.send_transaction({'from': sender, 'to': recipient, 'value': 1, 'gas': 21000}, private_key)
+    submitted = time.perf_counter() - start
+    while helper.receipt_poller.pending_count:
+        helper.receipt_poller.poll_once()
+    return submitted, time.perf_counter() - start
+
+
+def main():
+    """Run the submission benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='simulated per-RPC latency')
+    args = parser.parse_args()
+
+    provider = EthereumTesterProvider()
+    helper = Web3Helper(provider=provider)
+    w3 = helper.w3
+    calls = Counter()
+    w3.middleware_onion.add(rpc_counter(calls, args.latency_ms / 1000))
+    keys = provider.ethereum_tester.backend.account_keys
+    sender, recipient = w3.eth.accounts[0], w3.eth.accounts[1]
+    private_key = keys[0].to_hex()
+
+    print(f"\n{'orders':>7} {'legacy orders/s':>16} {'rpc/order':>10} "
+          f"{'submit orders/s':>16} {'resolved orders/s':>18} {'rpc/order':>10}")
+    for n_orders in args.orders:
+        calls.clear()
+        legacy = legacy_submit(w3, sender, private_key, recipient, n_orders)
+        legacy_calls = sum(calls.values()) / n_orders
+
+        helper.nonce_manager.reset(sender)
+        calls.clear()
+        submitted, resolved = pipelined_submit(helper, sender, private_key, recipient, n_orders)
+        pipelined_calls = sum(calls.values()) / n_orders
+        print(f"{n_orders:>7} {n_orders / legacy:>16,.1f} {legacy_calls:>10.1f} "
+              f"{n_orders / submitted:>16,.1f} {n_orders / resolved:>18,.1f} {pipelined_calls:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Solve time of the VPP battery scheduler at 1k-100k prosumers
+
+Builds seeded generation (a clear-sky day scaled per prosumer and dimmed
+by random cloud) and load profiles over the horizon, then times the DP
+optimizer and the greedy hour-by-hour rule on the same input with a
+time-of-use buy price (evening peak), both ending the horizon with at
+least their starting charge. Reports the total cost of both against no
+battery at all.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from ml.vpp_optimizer import VPPOptimizer
+
+
+def profiles(n_prosumers, hours, rng):
+    """``(generation, load, buy_price)`` in kWh and $/kWh"""
+    hour = np.arange(hours) % 24
+    sun = np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None)
+    generation = sun * rng.uniform(1, 5, (n_prosumers, 1)) * rng.uniform(0.3, 1, (n_prosumers, hours))
+    load = rng.uniform(0.2, 0.8, (n_prosumers, hours)) + 1.2 * ((hour >= 17) & (hour < 22))
+    buy_price = np.where((hour >= 17) & (hour < 21), 0.5, 0.3)
+    return generation, load, buy_price
+
+
+def main():
+    """Run the VPP optimizer benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--prosumers', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--hours', type=int, default=48)
+    parser.add_argument('--levels', type=int, default=21, help='charge levels of the DP')
+    parser.add_argument('--sell-price', type=float, default=0.1)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+    optimizer = VPPOptimizer(levels=args.levels)
+
+    print(f"{'prosumers':>10} {'dp s':>8} {'prosumers/s':>12} {'greedy s':>9} "
+          f"{'no battery $':>13} {'greedy $':>10} {'dp $':>10} {'dp saving':>10}")
+    for n_prosumers in args.prosumers:
+        generation, load, buy_price = profiles(n_prosumers, args.hours, rng)
+        start = time.perf_counter()
+        optimal = optimizer.optimize(generation, load, buy_price, args.sell_price)
+        dp_time = time.perf_counter() - start
+        start = time.perf_counter()
+        greedy = optimizer.greedy(generation, load, buy_price, args.sell_price)
+        greedy_time = time.perf_counter() - start
+
+        baseline = optimal['baseline_cost'].sum()
+        saving = (greedy['cost'].sum() - optimal['cost'].sum()) / abs(greedy['cost'].sum())
+        print(f"{n_prosumers:>10} {dp_time:>8.2f} {n_prosumers / dp_time:>12.0f} {greedy_time:>9.2f} "
+              f"{baseline:>13,.0f} {greedy['cost'].sum():>10,.0f} {optimal['cost'].sum():>10,.0f} "
+              f"{saving:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
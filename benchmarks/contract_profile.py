@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Gas and latency profile of EnergyTrading under a synthetic order flow
+
+Deploys the contract on an in-process eth-tester chain (py-evm, no network)
+and replays a seeded flow of placeOrder and cancelOrder calls with the given
+size, buy/sell mix and cancel rate, sampling getActiveOrdersCount along the
+way. Every call is recorded with the book depth (active orders) it ran at,
+its gas and its wall time:
+
+    python benchmarks/contract_profile.py --orders 2000 --buy-ratio 0.6
+    python benchmarks/contract_profile.py --revision <rev> --output old
+    python benchmarks/contract_profile.py --compare old.json
+
+writes <output>.csv (one row per call) and <output>.json (mean/max gas and
+mean wall time per operation and depth bucket). --compare prints the gas
+ratio per operation and bucket against an earlier JSON, so two versions of
+the contract can be compared on the same flow. Calls that fail (out of gas,
+reverted) are recorded with status "failed".
+Requires: pip install py-solc-x "web3[tester]" (or --artifact with a compiled contract)
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import Web3, EthereumTesterProvider
+from web3.logs import DISCARD
+
+from app.contract_compiler import build_contract
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'results')
+
+MID_PRICE = 1000000
+TICK = 10
+BLOCK_GAS = 29000000
+CSV_COLUMNS = ('step', 'operation', 'depth', 'gas', 'seconds', 'trades', 'status')
+
+
+def deploy(abi, bytecode):
+    """``(w3, contract)``: a fresh eth-tester chain with the contract deployed and funded to pay sellers"""
+    w3 = Web3(EthereumTesterProvider())
+    w3.eth.default_account = w3.eth.accounts[0]
+    tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor().transact()
+    contract = w3.eth.contract(address=w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress, abi=abi)
+    w3.eth.send_transaction({'to': contract.address, 'value': 10 ** 21})
+    return w3, contract
+
+
+def order_flow(n_orders, buy_ratio, cancel_ratio, cross_ratio, levels, seed):
+    """Seeded list of ``('place', amount, price, is_buy)`` and ``('cancel',)`` actions
+
+    Resting prices fall within ``levels`` ticks of the mid price on their own
+    side; ``cross_ratio`` of the orders are priced through the spread.
+    """
+    rng = random.Random(seed)
+    actions = []
+    for _ in range(n_orders):
+        if actions and rng.random() < cancel_ratio:
+            actions.append(('cancel',))
+        is_buy = rng.random() < buy_ratio
+        ticks = rng.randint(1, levels)
+        if rng.random() < cross_ratio:
+            ticks = -rng.randint(1, 3)
+        price = MID_PRICE - ticks * TICK if is_buy else MID_PRICE + ticks * TICK
+        actions.append(('place', rng.randint(1, 50), price, is_buy))
+    return actions
+
+
+class FlowReplayer:
+    """Sends the flow's calls one by one and records each call's cost"""
+
+    def __init__(self, w3, contract, seed):
+        self.w3 = w3
+        self.contract = contract
+        self.users = w3.eth.accounts[1:]
+        self.rng = random.Random(seed)
+        self.live = []  # (order id, owner) of orders that may still be resting
+        self.rows = []
+
+    def depth(self):
+        return self.contract.functions.getActiveOrdersCount().call()
+
+    def transact(self, step, operation, call, sender, depth):
+        start = time.perf_counter()
+        try:
+            tx_hash = call.transact({'from': sender, 'gas': BLOCK_GAS})
+            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        except Exception:
+            receipt = None
+        seconds = time.perf_counter() - start
+        if receipt is None or receipt['status'] != 1:
+            self.rows.append((step, operation, depth, receipt['gasUsed'] if receipt else None, seconds, 0, 'failed'))
+            return None
+        trades = len(self.contract.events.TradeExecuted().process_receipt(receipt, errors=DISCARD))
+        self.rows.append((step, operation, depth, receipt['gasUsed'], seconds, trades, 'ok'))
+        return receipt
+
+    def place(self, step, amount, price, is_buy, depth):
+        sender = self.rng.choice(self.users)
+        receipt = self.transact(step, 'placeOrder', self.contract.functions.placeOrder(amount, price, is_buy),
+                                sender, depth)
+        if receipt is not None:
+            for event in self.contract.events.OrderPlaced().process_receipt(receipt, errors=DISCARD):
+                self.live.append((event['args']['orderId'], sender))
+
+    def cancel(self, step, depth):
+        # Pick a random order that is still resting; filled ones are dropped on the way
+        while self.live:
+            index = self.rng.randrange(len(self.live))
+            order_id, owner = self.live[index]
+            self.live[index] = self.live[-1]
+            self.live.pop()
+            if self.contract.functions.getOrder(order_id).call()[5]:
+                self.transact(step, 'cancelOrder', self.contract.functions.cancelOrder(order_id), owner, depth)
+                return
+
+    def sample_count(self, step, depth):
+        call = self.contract.functions.getActiveOrdersCount()
+        start = time.perf_counter()
+        try:
+            gas = call.estimate_gas({'gas': BLOCK_GAS})
+            call.call()
+            status = 'ok'
+        except Exception:
+            gas, status = None, 'failed'
+        self.rows.append((step, 'getActiveOrdersCount', depth, gas, time.perf_counter() - start, 0, status))
+
+    def replay(self, actions, sample_every):
+        for step, action in enumerate(actions):
+            depth = self.depth()
+            if action[0] == 'place':
+                self.place(step, *action[1:], depth)
+            else:
+                self.cancel(step, depth)
+            if step % sample_every == 0:
+                self.sample_count(step, depth)
+        return self.rows
+
+
+def summarize(rows, bucket):
+    """``{operation: [{depth, calls, failed, gas_mean, gas_max, seconds_mean}]}`` per depth bucket"""
+    groups = defaultdict(list)
+    for step, operation, depth, gas, seconds, trades, status in rows:
+        groups[(operation, depth // bucket * bucket)].append((gas, seconds, status))
+    curves = defaultdict(list)
+    for (operation, depth), calls in sorted(groups.items()):
+        gas = [g for g, _, status in calls if status == 'ok']
+        curves[operation].append({
+            'depth': depth,
+            'calls': len(calls),
+            'failed': sum(status != 'ok' for _, _, status in calls),
+            'gas_mean': sum(gas) / len(gas) if gas else None,
+            'gas_max': max(gas) if gas else None,
+            'seconds_mean': sum(seconds for _, seconds, _ in calls) / len(calls)
+        })
+    return dict(curves)
+
+
+def format_gas(gas):
+    return f"{gas:,.0f}" if gas is not None else '-'
+
+
+def compare(curves, baseline):
+    """Print mean gas per operation and depth bucket against an earlier profile"""
+    print(f"\n{'operation':<22} {'depth':>7} {'before':>10} {'after':>10} {'ratio':>7}")
+    for operation, points in curves.items():
+        before = {point['depth']: point for point in baseline['curves'].get(operation, [])}
+        for point in points:
+            old = before.get(point['depth'], {}).get('gas_mean')
+            new = point['gas_mean']
+            ratio = f"{new / old:.2f}" if old and new else '-'
+            print(f"{operation:<22} {point['depth']:>7} {format_gas(old):>10} {format_gas(new):>10} {ratio:>7}")
+
+
+def main():
+    """Run the contract profile"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=1000, help='orders placed')
+    parser.add_argument('--buy-ratio', type=float, default=0.5, help='share of buy orders')
+    parser.add_argument('--cancel-ratio', type=float, default=0.1, help='chance of a cancel before each order')
+    parser.add_argument('--cross-ratio', type=float, default=0.2, help='share of orders priced through the spread')
+    parser.add_argument('--levels', type=int, default=30, help='price levels per side resting orders use')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sample-every', type=int, default=10, help='steps between getActiveOrdersCount samples')
+    parser.add_argument('--bucket', type=int, default=50, help='depth bucket width of the summary')
+    parser.add_argument('--artifact', help='compiled contract JSON (abi, bytecode) instead of compiling the source')
+    parser.add_argument('--revision', help='profile the contract at this git revision')
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'contract_profile'),
+                        help='output path without extension (default: benchmarks/results/contract_profile)')
+    parser.add_argument('--compare', help='earlier profile JSON to compare against')
+    args = parser.parse_args()
+
+    abi, bytecode = build_contract(args.artifact, args.revision)
+    w3, contract = deploy(abi, bytecode)
+    actions = order_flow(args.orders, args.buy_ratio, args.cancel_ratio, args.cross_ratio, args.levels, args.seed)
+
+    start = time.perf_counter()
+    rows = FlowReplayer(w3, contract, args.seed).replay(actions, args.sample_every)
+    elapsed = time.perf_counter() - start
+    curves = summarize(rows, args.bucket)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(f'{args.output}.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(rows)
+    with open(f'{args.output}.json', 'w') as f:
+        json.dump({
+            'contract': args.artifact or args.revision or 'working tree',
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+            'seconds': elapsed,
+            'curves': curves
+        }, f, indent=2)
+
+    print(f"\n{'operation':<22} {'depth':>7} {'calls':>6} {'failed':>6} {'gas mean':>10} {'gas max':>10} {'ms':>8}")
+    for operation, points in curves.items():
+        for point in points:
+            print(f"{operation:<22} {point['depth']:>7} {point['calls']:>6} {point['failed']:>6} "
+                  f"{format_gas(point['gas_mean']):>10} {format_gas(point['gas_max']):>10} "
+                  f"{point['seconds_mean'] * 1000:>8.2f}")
+    print(f"\n{len(rows)} calls in {elapsed:.1f} s; written to {args.output}.csv and {args.output}.json")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(curves, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Gas per EnergyTrading call as the order book deepens
+
+Compiles contracts/EnergyTrading.sol, deploys it on an in-process
+eth-tester chain and fills the book with resting orders on both sides. At
+each depth it estimates the gas of placing an order that rests, placing one
+that fills a resting order, cancelling an order and getActiveOrdersCount.
+Pass --baseline with a git revision to measure that revision's contract as
+well; depths its calls no longer fit in a block are reported as "-".
+Requires: pip install py-solc-x "web3[tester]" (or --artifact with a compiled contract)
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.contract_compiler import build_contract
+
+MID_PRICE = 1000000
+OPERATIONS = ('placeOrder (rests)', 'placeOrder (fills 1)', 'cancelOrder', 'getActiveOrdersCount')
+
+
+def deploy(abi, bytecode):
+    """``(w3, contract)``: a fresh eth-tester chain with the contract deployed and funded to pay sellers"""
+    from web3 import Web3, EthereumTesterProvider
+    w3 = Web3(EthereumTesterProvider())
+    w3.eth.default_account = w3.eth.accounts[0]
+    tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor().transact()
+    contract = w3.eth.contract(address=w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress, abi=abi)
+    w3.eth.send_transaction({'to': contract.address, 'value': 10 ** 23})
+    return w3, contract
+
+
+class BookBuilder:
+    """Grows a book of resting bids below and asks above MID_PRICE, one price level per order"""
+
+    def __init__(self, w3, contract):
+        self.w3 = w3
+        self.contract = contract
+        self.accounts = w3.eth.accounts
+        self.depth = 0
+        self.hinted = any(item.get('name') == 'placeOrderWithLimit' for item in contract.abi)
+
+    def place(self, amount, price, is_buy, hint=0):
+        if self.hinted:
+            return self.contract.functions.placeOrderWithLimit(amount, price, is_buy, 8, hint)
+        return self.contract.functions.placeOrder(amount, price, is_buy)
+
+    def grow(self, depth):
+        """Add resting orders until ``depth``; False once an order no longer fits in a block"""
+        while self.depth < depth:
+            level = self.depth // 2 + 1
+            is_buy = self.depth % 2 == 0
+            price = MID_PRICE - 10 * level if is_buy else MID_PRICE + 10 * level
+            # Hint the previous worst level so the contract doesn't walk the whole side
+            hint = (MID_PRICE - 10 * (level - 1) if is_buy else MID_PRICE + 10 * (level - 1)) if level > 1 else 0
+            sender = self.accounts[1 + self.depth % (len(self.accounts) - 1)]
+            try:
+                tx_hash = self.place(10, price, is_buy, hint).transact({'from': sender, 'gas': 29000000})
+                self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            except Exception:
+                return False
+            self.depth += 1
+        return True
+
+    def measure(self):
+        """Estimated gas of each operation at the current depth (None when it doesn't fit in a block)"""
+        buyer, owner = self.accounts[0], self.accounts[1]
+        best_ask = MID_PRICE + 10
+        calls = {
+            # A new best bid inside the spread: no walk, nothing to match
+            'placeOrder (rests)': (self.place(10, MID_PRICE - 5, True), buyer),
+            'placeOrder (fills 1)': (self.place(10, best_ask, True), buyer),
+            # The first bid, placed by accounts[1], sits deepest once the book has grown
+            'cancelOrder': (self.contract.functions.cancelOrder(1), owner),
+            'getActiveOrdersCount': (self.contract.functions.getActiveOrdersCount(), buyer)
+        }
+        gas = {}
+        for name, (call, sender) in calls.items():
+            try:
+                gas[name] = call.estimate_gas({'from': sender, 'gas': 29000000})
+            except Exception:
+                gas[name] = None
+        return gas
+
+
+def report(label, abi, bytecode, depths):
+    """``{depth: {operation: gas}}`` for one build of the contract"""
+    w3, contract = deploy(abi, bytecode)
+    builder = BookBuilder(w3, contract)
+    results = {}
+    for depth in depths:
+        if not builder.grow(depth):
+            print(f"{label}: orders no longer fit in a block at depth {builder.depth}")
+            break
+        results[depth] = builder.measure()
+    return results
+
+
+def main():
+    """Print the gas report"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--depths', type=int, nargs='+', default=[0, 10, 100, 1000],
+                        help='resting orders in the book')
+    parser.add_argument('--artifact', help='compiled contract JSON (abi, bytecode) instead of compiling the source')
+    parser.add_argument('--baseline', help='git revision whose contract to measure as well')
+    args = parser.parse_args()
+    depths = sorted(set(args.depths))
+
+    contracts = {'current': build_contract(args.artifact)}
+    if args.baseline:
+        contracts[args.baseline] = build_contract(revision=args.baseline)
+    results = {label: report(label, *build, depths) for label, build in contracts.items()}
+
+    print(f"\n{'operation':<24} {'contract':>10}" + ''.join(f" {depth:>9}" for depth in depths))
+    for operation in OPERATIONS:
+        for label in contracts:
+            cells = []
+            for depth in depths:
+                gas = results[label].get(depth, {}).get(operation)
+                cells.append(f" {gas if gas is not None else '-':>9}")
+            print(f"{operation:<24} {label[:10]:>10}" + ''.join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for /health, /predict and /trade against a stand-in chain
+
+Starts benchmarks/stand_in_node.py and the server (gunicorn via
+gunicorn.conf.py, or the Flask development server for comparison), then
+drives each endpoint from --concurrency client threads for --duration
+seconds and reports requests/sec with p50/p99 latency. Pass --url to load
+an already running server instead.
+
+    python benchmarks/load_test.py --server gunicorn --workers 4 --threads 4
+    python benchmarks/load_test.py --server dev
+"""
+
+import argparse
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from benchmarks.stand_in_node import start_node
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Well-known eth-tester key; the stand-in node accepts any signed transaction
+PRIVATE_KEY = "0x" + "58d23b55bc9cdce1f18c2500f40ff4ab7245df9a89505e9b1fa4851f623d241d"
+CONTRACT_ADDRESS = "0x" + "11" * 20
+
+
+def random_weather(rng):
+    return {
+        'temperature': round(rng.uniform(5, 40), 1),
+        'humidity': round(rng.uniform(20, 90), 1),
+        'wind_speed': round(rng.uniform(0, 15), 1),
+        'cloud_cover': round(rng.uniform(0, 100), 1),
+        'solar_radiation': round(rng.uniform(0, 1000), 1)
+    }
+
+
+def random_order(rng):
+    return {
+        'user_type': rng.choice(['buyer', 'seller']),
+        'energy_amount': rng.randint(1, 50),
+        'price': rng.randint(900, 1100) * 10 ** 12
+    }
+
+
+ENDPOINTS = {
+    'health': ('GET', '/health', None),
+    'predict': ('POST', '/predict', random_weather),
+    'trade': ('POST', '/trade', random_order)
+}
+
+
+def start_server(args, node_url, index_dir):
+    """Launch the server under test and wait until /health answers"""
+    env = dict(
+        os.environ,
+        BLOCKCHAIN_RPC_URL=node_url,
+        CONTRACT_ADDRESS=CONTRACT_ADDRESS,
+        PRIVATE_KEY=PRIVATE_KEY,
+        EVENT_INDEX_DB=os.path.join(index_dir, 'events.sqlite3'),
+        PORT=str(args.port),
+        WEB_CONCURRENCY=str(args.workers),
+        WEB_THREADS=str(args.threads)
+    )
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app.wsgi:application']
+    else:
+        command = [sys.executable, 'app/server.py']
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{args.port}"
+    deadline = time.time() + 180  # first start may train the model
+    while time.time() < deadline:
+        try:
+            if requests.get(url + '/health', timeout=1).ok:
+                return process, url
+        except requests.ConnectionError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Server did not become healthy")
+
+
+def load(url, endpoint, concurrency, duration, seed):
+    """Hammer one endpoint; returns (latencies, errors, elapsed seconds)"""
+    method, path, make_body = ENDPOINTS[endpoint]
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(worker_id):
+        rng = random.Random(seed + worker_id)
+        session = requests.Session()
+        own, failed = [], 0
+        while time.perf_counter() < stop_at:
+            body = make_body(rng) if make_body else None
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url + path, json=body, timeout=30)
+                ok = response.status_code < 300
+            except requests.RequestException:
+                ok = False
+            own.append(time.perf_counter() - start)
+            failed += not ok
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def main():
+    """Run the load test"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--server', choices=['gunicorn', 'dev'], default='gunicorn')
+    parser.add_argument('--url', help='load an already running server instead of starting one')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--node-port', type=int, default=8546)
+    parser.add_argument('--node-latency-ms', type=float, default=2.0)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per endpoint')
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    args = parser.parse_args()
+
+    node = process = None
+    index_dir = tempfile.TemporaryDirectory()
+    try:
+        url = args.url
+        if url is None:
+            node = start_node(args.node_port, args.node_latency_ms / 1000)
+            process, url = start_server(args, f"http://127.0.0.1:{args.node_port}", index_dir.name)
+            print(f"Server: {args.server} ({args.workers} workers x {args.threads} threads)"
+                  if args.server == 'gunicorn' else "Server: Flask development server")
+
+        print(f"\n{'endpoint':>9} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for endpoint in args.endpoints:
+            latencies, errors, elapsed = load(url, endpoint, args.concurrency, args.duration, seed=42)
+            latencies.sort()
+            print(f"{endpoint:>9} {len(latencies):>9} {errors:>7} {len(latencies) / elapsed:>9,.0f} "
+                  f"{percentile(latencies, 0.5) * 1000:>8.2f} {percentile(latencies, 0.99) * 1000:>8.2f}")
+    finally:
+        if process:
+            process.send_signal(signal.SIGTERM)  # graceful shutdown
+            process.wait(timeout=60)
+        if node:
+            node.terminate()
+        index_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Stand-in Ethereum JSON-RPC node for benchmarks
+
+A threaded HTTP server that answers just enough of the JSON-RPC API for
+Web3Helper: chain metadata, getOrder eth_calls with synthetic orders,
+transaction broadcasts (accepted, never mined), empty logs and blocks.
+A fixed --latency-ms delay per HTTP request simulates a remote node.
+
+    python benchmarks/stand_in_node.py --port 8545 --latency-ms 2
+"""
+
+import argparse
+import json
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_abi import encode
+from eth_utils import keccak
+
+CHAIN_ID = 1337
+BLOCK_NUMBER = 100
+USER = "0x" + "22" * 20
+
+
+class StandInNode(BaseHTTPRequestHandler):
+    """Answers the handful of JSON-RPC methods Web3Helper needs"""
+    protocol_version = 'HTTP/1.1'  # keep-alive, like a real node
+    disable_nagle_algorithm = True
+    latency = 0.0
+    http_requests = None  # optional shared counter, set by serve()
+
+    def do_POST(self):
+        if self.http_requests is not None:
+            with self.http_requests.get_lock():
+                self.http_requests.value += 1
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.latency:
+            time.sleep(self.latency)
+        response = [self.answer(call) for call in body] if isinstance(body, list) else self.answer(body)
+        payload = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def answer(self, call):
+        method, params = call['method'], call.get('params', [])
+        if method == 'eth_call':
+            # calldata is the 4-byte selector followed by the uint256 id
+            order_id = int(params[0]['data'][10:], 16)
+            result = '0x' + encode(
+                ['address', 'uint256', 'uint256', 'bool', 'uint256', 'bool'],
+                [USER, order_id % 50 + 1, 900 + order_id % 200, order_id % 2 == 0, 1700000000, True]
+            ).hex()
+        elif method == 'eth_sendRawTransaction':
+            result = '0x' + keccak(hexstr=params[0]).hex()
+        elif method == 'eth_getBlockByNumber':
+            number = BLOCK_NUMBER if params[0] == 'latest' else int(params[0], 16)
+            result = {'number': hex(number), 'hash': '0x' + keccak(number.to_bytes(32, 'big')).hex(),
+                      'parentHash': '0x' + '00' * 32, 'timestamp': hex(1700000000 + number),
+                      'transactions': []}
+        elif method in ('eth_getLogs', 'eth_getBlockReceipts'):
+            result = []
+        elif method == 'eth_getTransactionReceipt':
+            result = None
+        else:
+            result = {'web3_clientVersion': 'stand-in/1.0', 'net_version': str(CHAIN_ID),
+                      'eth_chainId': hex(CHAIN_ID), 'eth_blockNumber': hex(BLOCK_NUMBER),
+                      'eth_gasPrice': hex(10 ** 9), 'eth_getTransactionCount': '0x0'}.get(method)
+        return {'jsonrpc': '2.0', 'id': call['id'], 'result': result}
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, latency=0.0, http_requests=None):
+    StandInNode.latency = latency
+    StandInNode.http_requests = http_requests
+    ThreadingHTTPServer(('127.0.0.1', port), StandInNode).serve_forever()
+
+
+def start_node(port, latency=0.0, http_requests=None):
+    """Run the stand-in node in its own process, like a real node"""
+    node = multiprocessing.Process(target=serve, args=(port, latency, http_requests), daemon=True)
+    node.start()
+    return node
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', type=int, default=8545)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+    print(f"Stand-in node listening on http://127.0.0.1:{args.port}")
+    serve(args.port, args.latency_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
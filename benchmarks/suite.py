@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the ML, API, matching and blockchain hot paths
+
+Times each case on an in-process eth-tester chain (no Ganache needed) and
+writes the results as JSON to benchmarks/results/<commit>.json. Pass
+--compare with an earlier result file to flag cases that got slower.
+
+    python benchmarks/suite.py                        # run everything
+    python benchmarks/suite.py -k predict --quick     # a subset, fewer repeats
+    python benchmarks/suite.py --compare benchmarks/results/abc1234.json
+
+Cases follow asv's model: a setup function builds the state once and
+returns the callable to time, which is run in repeats of N calls (N chosen
+so a repeat takes about --min-time seconds). Seeds are fixed, so the same
+commit on the same machine measures the same work. EnergyTrading cannot be
+compiled here (no solc), so Web3Helper runs against a stub contract that
+answers every call with zeros: the client-side cost of building, signing,
+sending and decoding calls is real, the contract's own execution is not.
+Requires: pip install "web3[tester]"
+"""
+
+import argparse
+import contextlib
+import datetime
+import fnmatch
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Runtime returning 512 zero bytes for any call, and the init code deploying it
+STUB_RUNTIME = '6102006000f3'
+STUB_INIT = '0x6006600c60003960066000f3' + STUB_RUNTIME
+
+CASES = {}
+
+
+def case(name):
+    """Register ``setup`` as benchmark ``name``; it returns the callable to time"""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def trained_predictor(engine='sklearn'):
+    from ml.solar_predictor import SolarEnergyPredictor
+    predictor = SolarEnergyPredictor(engine=engine)
+    predictor.train_model(predictor.generate_sample_data(1000), save_data=False, save=False)
+    return predictor
+
+
+def unique_weather():
+    """Endless weather rows that never share a prediction cache bucket"""
+    i = 0
+    while True:
+        yield {'temperature': -20 + (i % 120) * 0.5, 'humidity': 30 + (i // 120) % 60,
+               'wind_speed': 3, 'cloud_cover': 20, 'solar_radiation': 200 + (i // 7200) * 10}
+        i += 1
+
+
+def setup_chain():
+    """``(helper, account, key)``: Web3Helper on a fresh eth-tester chain with the stub contract loaded
+
+    eth-tester slows down as its chain grows, so every case starts a new one.
+    """
+    from web3 import EthereumTesterProvider
+    from app.web3_helper import Web3Helper
+
+    provider = EthereumTesterProvider()
+    helper = Web3Helper(provider=provider)
+    key = provider.ethereum_tester.backend.account_keys[0].to_hex()
+    account = helper.w3.eth.accounts[0]
+    tx_hash = helper.send_transaction({'from': account, 'data': STUB_INIT, 'gas': 100000}, key, wait=True)
+    helper.load_contract(helper.w3.eth.get_transaction_receipt(tx_hash).contractAddress)
+    return helper, account, key
+
+
+@case('ml.generate_sample_data')
+def bench_generate_sample_data():
+    from ml.solar_predictor import SolarEnergyPredictor
+    predictor = SolarEnergyPredictor()
+    return lambda: predictor.generate_sample_data(1000)
+
+
+@case('ml.train_model')
+def bench_train_model():
+    from ml.solar_predictor import SolarEnergyPredictor
+    data = SolarEnergyPredictor().generate_sample_data(1000)
+    return lambda: SolarEnergyPredictor(n_jobs=1).train_model(data, save_data=False, save=False)
+
+
+@case('ml.predict_energy.sklearn')
+def bench_predict_energy_sklearn():
+    predictor = trained_predictor()
+    return lambda: predictor.predict_energy(25, 60, 3, 20, 600)
+
+
+@case('ml.predict_energy.lockstep')
+def bench_predict_energy_lockstep():
+    predictor = trained_predictor('lockstep')
+    return lambda: predictor.predict_energy(25, 60, 3, 20, 600)
+
+
+@case('ml.predict_batch.1000')
+def bench_predict_batch():
+    from ml.solar_predictor import FEATURE_COLUMNS
+    predictor = trained_predictor()
+    rows = predictor.generate_sample_data(1000, seed=7)[FEATURE_COLUMNS].to_numpy()
+    return lambda: predictor.predict_batch(rows)
+
+
+@case('api.predict')
+def bench_api_predict():
+    from app import server
+    server.model_registry.publish(trained_predictor(), 'benchmark')
+    client = server.app.test_client()
+    weather = unique_weather()
+    return lambda: client.post('/predict', json=next(weather))
+
+
+@case('api.predict.cached')
+def bench_api_predict_cached():
+    from app import server
+    server.model_registry.publish(trained_predictor(), 'benchmark')
+    client = server.app.test_client()
+    return lambda: client.post('/predict', json={'temperature': 25, 'solar_radiation': 600})
+
+
+@case('api.trade')
+def bench_api_trade():
+    from app import server
+    helper, account, key = setup_chain()
+    # Fund the server's demo account so its orders pay for gas
+    helper.send_transaction({'from': account, 'to': server.DEMO_ACCOUNT_ADDRESS, 'value': 10 ** 21,
+                             'gas': 21000}, key, wait=True)
+    server.web3_helper = helper
+    client = server.app.test_client()
+    order = {'user_type': 'buyer', 'energy_amount': 10, 'price': 1000}
+    # place_order reports failures instead of raising, which would time the error path
+    assert client.post('/trade', json=order).status_code == 202, "demo order was rejected"
+    return lambda: client.post('/trade', json=order)
+
+
+@case('web3.place_order')
+def bench_place_order():
+    helper, account, key = setup_chain()
+    assert helper.place_order(account, key, 10, 1000, True), "order was rejected"
+    return lambda: helper.place_order(account, key, 10, 1000, True)
+
+
+@case('web3.get_order')
+def bench_get_order():
+    helper, _, _ = setup_chain()
+    return lambda: helper.get_order(1)
+
+
+@case('web3.get_active_orders_count')
+def bench_get_active_orders_count():
+    helper, _, _ = setup_chain()
+    return helper.get_active_orders_count
+
+
+@case('matching.place_order.crossing')
+def bench_matching():
+    import random
+    from app.matching_engine import OrderBook
+    rng = random.Random(42)
+    book = OrderBook()
+    for i in range(100000):
+        is_buy = i % 2 == 1
+        book.place_order(f"0x{i % 100 + 1:040x}", rng.randint(1, 50),
+                         rng.randint(900, 1000) if is_buy else rng.randint(1001, 1100), is_buy, timestamp=i)
+    counter = iter(range(10 ** 9))
+
+    def cross():
+        # Alternate aggressive buys and sells, refilling what they take, so the book stays deep
+        i = next(counter)
+        book.place_order("0x" + "aa" * 20, 25, 1100 if i % 2 == 0 else 900, i % 2 == 0)
+        book.place_order("0x" + "bb" * 20, 25, 1001 if i % 2 == 0 else 1000, i % 2 == 1)
+    return cross
+
+
+def time_case(function, min_time, repeat):
+    """Per-call seconds over ``repeat`` repeats of N calls, N calibrated to ``min_time``"""
+    function()  # warm up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number)
+    samples = np.array(samples)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': float(samples.min()),
+        'median': float(np.median(samples)),
+        'mean': float(samples.mean()),
+        'stddev': float(samples.std()),
+        'samples': samples.tolist()
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def machine_info():
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print per-case ratios against ``baseline``; return the names that regressed"""
+    regressions = []
+    print(f"\n{'case':<32} {'before':>10} {'after':>10} {'ratio':>7}")
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"{name:<32} {'-':>10} {format_seconds(result['median']):>10} {'new':>7}")
+            continue
+        # Minimum over repeats is the least noisy estimate of a call's cost
+        ratio = result['min'] / before['min']
+        flag = ''
+        if ratio > threshold:
+            flag = '  slower'
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            flag = '  faster'
+        print(f"{name:<32} {format_seconds(before['min']):>10} {format_seconds(result['min']):>10} "
+              f"{ratio:>7.2f}{flag}")
+    return regressions
+
+
+def format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds * 1e9:.0f} ns"
+
+
+def main():
+    """Run the benchmark suite"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-k', '--filter', action='append', help='run only cases matching this glob/substring')
+    parser.add_argument('--quick', action='store_true', help='one short repeat per case')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per repeat')
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='earlier result file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio reported as a regression')
+    parser.add_argument('--list', action='store_true', help='list the cases and exit')
+    args = parser.parse_args()
+
+    names = [name for name in CASES if not args.filter or any(
+        fnmatch.fnmatch(name, pattern) or pattern in name for pattern in args.filter)]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+    repeat, min_time = (1, 0.05) if args.quick else (args.repeat, args.min_time)
+    warnings.simplefilter('ignore')  # sklearn's feature-name warning on every call
+
+    results = {}
+    print(f"\n{'case':<32} {'median':>10} {'min':>10} {'calls':>8}")
+    for name in names:
+        with contextlib.redirect_stdout(io.StringIO()):  # the code under test prints progress
+            function = CASES[name]()
+            result = time_case(function, min_time, repeat)
+        results[name] = result
+        print(f"{name:<32} {format_seconds(result['median']):>10} {format_seconds(result['min']):>10} "
+              f"{result['number'] * result['repeat']:>8}")
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'machine': machine_info(),
+            'params': {'repeat': repeat, 'min_time': min_time},
+            'results': results
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than {args.threshold}x: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,115 +4,466 @@ pragma solidity ^0.8.19;
 contract EnergyTrading {
     struct Trade {
         address buyer;
-        address seller;
-        uint256 energyAmount; // in kWh
-        uint256 price; // in wei per kWh
-        uint256 timestamp;
+        uint40 timestamp;
         bool isCompleted;
         bool isCancelled;
+        address seller;
+        uint96 energyAmount; // in kWh
+        uint96 price; // in wei per kWh
     }
-    
+
+    // Live orders sit in a FIFO queue per price level (prevOrder/nextOrder, 0 = none)
     struct Order {
         address user;
-        uint256 energyAmount; // in kWh
-        uint256 price; // in wei per kWh
+        uint40 timestamp;
+        uint32 prevOrder;
         bool isBuyOrder;
-        uint256 timestamp;
         bool isActive;
+        uint96 energyAmount; // in kWh, still unfilled
+        uint96 price; // in wei per kWh
+        uint32 nextOrder;
     }
-    
-    mapping(uint256 => Trade) public trades;
-    mapping(uint256 => Order) public orders;
+
+    // Price levels of one side form a list from the best price to the worst (0 = none)
+    struct PriceLevel {
+        uint96 better;
+        uint96 worse;
+        uint32 head; // oldest order
+        uint32 tail; // newest order
+    }
+
+    // Resting orders matched per placeOrder call when the caller sets no cap
+    uint256 public constant DEFAULT_MAX_MATCHES = 8;
+    // Levels an unhinted order may walk past to find where its price level goes
+    uint256 public constant MAX_LEVEL_STEPS = 32;
+
+    mapping(uint256 => Trade) private trades;
+    mapping(uint256 => Order) private orders;
+    mapping(uint256 => PriceLevel) private bidLevels;
+    mapping(uint256 => PriceLevel) private askLevels;
+    uint96 public bestBid;
+    uint96 public bestAsk;
+    uint64 private activeOrderCount;
     uint256 public tradeCounter;
     uint256 public orderCounter;
-    
+    // Account allowed to settle call-auction intervals cleared off-chain
+    address public operator;
+    uint256 public lastSettledInterval;
+    // Interval being settled in parts (0 = none), its price and the parts still due
+    uint256 public openInterval;
+    uint256 private openPrice;
+    uint256 public openPartsLeft;
+
     event OrderPlaced(uint256 orderId, address user, uint256 energyAmount, uint256 price, bool isBuyOrder);
-    event TradeExecuted(uint256 tradeId, address buyer, address seller, uint256 energyAmount, uint256 price);
+    event TradeExecuted(
+        uint256 tradeId,
+        address buyer,
+        address seller,
+        uint256 energyAmount,
+        uint256 price,
+        uint256 buyOrderId,
+        uint256 sellOrderId
+    );
     event OrderCancelled(uint256 orderId);
-    
+    event AuctionSettled(uint256 intervalId, uint256 clearingPrice, uint256 energyAmount);
+    event AuctionFill(uint256 intervalId, address user, bool isBuyer, uint256 energyAmount);
+
+    constructor() {
+        operator = msg.sender;
+    }
+
     // Place a buy or sell order
-    function placeOrder(uint256 _energyAmount, uint256 _price, bool _isBuyOrder) public {
+    function placeOrder(uint256 _energyAmount, uint256 _price, bool _isBuyOrder) public returns (uint256) {
+        return _placeOrder(_energyAmount, _price, _isBuyOrder, DEFAULT_MAX_MATCHES, 0);
+    }
+
+    // Place an order matching at most _maxMatches resting orders. _hintPrice is an
+    // existing level on the order's side at a better price than _price (0 = none),
+    // from which the search for the order's level starts instead of the best price.
+    function placeOrderWithLimit(
+        uint256 _energyAmount,
+        uint256 _price,
+        bool _isBuyOrder,
+        uint256 _maxMatches,
+        uint256 _hintPrice
+    ) public returns (uint256) {
+        return _placeOrder(_energyAmount, _price, _isBuyOrder, _maxMatches, _hintPrice);
+    }
+
+    // Place several orders in one transaction, each matching at most _maxMatches
+    // resting orders, with one hint price per order as in placeOrderWithLimit.
+    // Returns the first order id; the others follow it in order.
+    function placeOrders(
+        uint256[] calldata _energyAmounts,
+        uint256[] calldata _prices,
+        bool[] calldata _isBuyOrders,
+        uint256[] calldata _hintPrices,
+        uint256 _maxMatches
+    ) external returns (uint256 firstOrderId) {
+        require(_energyAmounts.length > 0, "No orders");
+        require(
+            _prices.length == _energyAmounts.length && _isBuyOrders.length == _energyAmounts.length
+                && _hintPrices.length == _energyAmounts.length,
+            "Array lengths differ"
+        );
+        firstOrderId = orderCounter + 1;
+        for (uint256 i = 0; i < _energyAmounts.length; i++) {
+            _placeOrder(_energyAmounts[i], _prices[i], _isBuyOrders[i], _maxMatches, _hintPrices[i]);
+        }
+    }
+
+    function _placeOrder(
+        uint256 _energyAmount,
+        uint256 _price,
+        bool _isBuyOrder,
+        uint256 _maxMatches,
+        uint256 _hintPrice
+    ) internal returns (uint256 orderId) {
         require(_energyAmount > 0, "Energy amount must be greater than 0");
         require(_price > 0, "Price must be greater than 0");
-        
-        orderCounter++;
-        orders[orderCounter] = Order({
+        require(_energyAmount <= type(uint96).max, "Energy amount too large");
+        require(_price <= type(uint96).max, "Price too large");
+
+        orderId = ++orderCounter;
+        require(orderId <= type(uint32).max, "Order ids exhausted");
+        emit OrderPlaced(orderId, msg.sender, _energyAmount, _price, _isBuyOrder);
+
+        // Try to match against the best opposite levels
+        (uint256 remaining, bool crosses) = _matchOrder(_energyAmount, _price, _isBuyOrder, _maxMatches);
+
+        bool rests = remaining > 0 && !crosses;
+        orders[orderId] = Order({
             user: msg.sender,
-            energyAmount: _energyAmount,
-            price: _price,
+            timestamp: uint40(block.timestamp),
+            prevOrder: 0,
             isBuyOrder: _isBuyOrder,
-            timestamp: block.timestamp,
-            isActive: true
+            isActive: rests,
+            energyAmount: uint96(remaining),
+            price: uint96(_price),
+            nextOrder: 0
         });
-        
-        emit OrderPlaced(orderCounter, msg.sender, _energyAmount, _price, _isBuyOrder);
-        
-        // Try to match orders
-        _matchOrders();
-    }
-    
-    // Match buy and sell orders
-    function _matchOrders() internal {
-        for (uint256 i = 1; i <= orderCounter; i++) {
-            if (!orders[i].isActive) continue;
-            
-            for (uint256 j = i + 1; j <= orderCounter; j++) {
-                if (!orders[j].isActive) continue;
-                
-                // Check if orders can be matched (one buy, one sell)
-                if (orders[i].isBuyOrder != orders[j].isBuyOrder) {
-                    Order storage buyOrder = orders[i].isBuyOrder ? orders[i] : orders[j];
-                    Order storage sellOrder = orders[i].isBuyOrder ? orders[j] : orders[i];
-                    
-                    // Check if buy price >= sell price
-                    if (buyOrder.price >= sellOrder.price) {
-                        uint256 tradeAmount = _min(buyOrder.energyAmount, sellOrder.energyAmount);
-                        
-                        // Execute trade
-                        tradeCounter++;
-                        trades[tradeCounter] = Trade({
-                            buyer: buyOrder.user,
-                            seller: sellOrder.user,
-                            energyAmount: tradeAmount,
-                            price: sellOrder.price, // Use seller's price
-                            timestamp: block.timestamp,
-                            isCompleted: true,
-                            isCancelled: false
-                        });
-                        
-                        emit TradeExecuted(tradeCounter, buyOrder.user, sellOrder.user, tradeAmount, sellOrder.price);
-                        
-                        // Update order amounts
-                        if (buyOrder.energyAmount == tradeAmount) {
-                            orders[i].isActive = false;
-                        } else {
-                            orders[i].energyAmount -= tradeAmount;
-                        }
-                        
-                        if (sellOrder.energyAmount == tradeAmount) {
-                            orders[j].isActive = false;
-                        } else {
-                            orders[j].energyAmount -= tradeAmount;
-                        }
-                        
-                        // Transfer ETH from buyer to seller
-                        uint256 totalPrice = tradeAmount * sellOrder.price;
-                        payable(sellOrder.user).transfer(totalPrice);
-                    }
-                }
+
+        if (rests) {
+            _addToLevel(orderId, orders[orderId], _price, _isBuyOrder, _hintPrice);
+            activeOrderCount++;
+        } else if (remaining > 0) {
+            // The match cap was reached while the book still crosses; resting the
+            // remainder would cross the book, so it is cancelled instead
+            emit OrderCancelled(orderId);
+        }
+    }
+
+    // Fill an incoming order from the best opposite levels, oldest order first.
+    // Returns the unfilled amount and whether it would still cross the book.
+    // _maxMatches counts down the matches left, to keep few locals on the stack.
+    function _matchOrder(
+        uint256 _energyAmount,
+        uint256 _price,
+        bool _isBuyOrder,
+        uint256 _maxMatches
+    ) internal returns (uint256 remaining, bool crosses) {
+        mapping(uint256 => PriceLevel) storage levels = _levels(!_isBuyOrder);
+        uint256 best = _isBuyOrder ? bestAsk : bestBid;
+        remaining = _energyAmount;
+
+        while (remaining > 0 && best != 0 && (_isBuyOrder ? _price >= best : _price <= best)) {
+            if (_maxMatches == 0) {
+                crosses = true;
+                break;
+            }
+            uint256 restingId = levels[best].head;
+            Order storage resting = orders[restingId];
+            uint256 tradeAmount = _min(remaining, resting.energyAmount);
+
+            // Update order amounts
+            remaining -= tradeAmount;
+            if (resting.energyAmount == tradeAmount) {
+                resting.isActive = false;
+                resting.energyAmount = 0;
+                best = _popHead(levels, restingId, best);
+                activeOrderCount--;
+            } else {
+                resting.energyAmount -= uint96(tradeAmount);
+            }
+            _maxMatches--;
+
+            // Use seller's price; the incoming order's id is the latest one issued
+            if (_isBuyOrder) {
+                _executeTrade(msg.sender, resting.user, tradeAmount, resting.price, orderCounter, restingId);
+            } else {
+                _executeTrade(resting.user, msg.sender, tradeAmount, _price, restingId, orderCounter);
             }
         }
+
+        if (_isBuyOrder) {
+            if (best != bestAsk) {
+                bestAsk = uint96(best);
+            }
+        } else if (best != bestBid) {
+            bestBid = uint96(best);
+        }
+    }
+
+    // Record a trade and pay the seller
+    function _executeTrade(
+        address buyer,
+        address seller,
+        uint256 energyAmount,
+        uint256 price,
+        uint256 buyOrderId,
+        uint256 sellOrderId
+    ) internal {
+        tradeCounter++;
+        trades[tradeCounter] = Trade({
+            buyer: buyer,
+            timestamp: uint40(block.timestamp),
+            isCompleted: true,
+            isCancelled: false,
+            seller: seller,
+            energyAmount: uint96(energyAmount),
+            price: uint96(price)
+        });
+        emit TradeExecuted(tradeCounter, buyer, seller, energyAmount, price, buyOrderId, sellOrderId);
+
+        // Transfer ETH from buyer to seller
+        payable(seller).transfer(energyAmount * price);
+    }
+
+    // Remove the filled head order of the best level; returns the new best price
+    function _popHead(
+        mapping(uint256 => PriceLevel) storage levels,
+        uint256 orderId,
+        uint256 best
+    ) internal returns (uint256) {
+        uint32 next = orders[orderId].nextOrder;
+        if (next != 0) {
+            levels[best].head = next;
+            orders[next].prevOrder = 0;
+            orders[orderId].nextOrder = 0;
+            return best;
+        }
+        uint256 worse = levels[best].worse;
+        delete levels[best];
+        if (worse != 0) {
+            levels[worse].better = 0;
+        }
+        return worse;
     }
-    
+
+    // Queue an order at its price level, creating the level if needed
+    function _addToLevel(uint256 orderId, Order storage order, uint256 price, bool isBuyOrder, uint256 hintPrice) internal {
+        mapping(uint256 => PriceLevel) storage levels = _levels(isBuyOrder);
+        PriceLevel storage level = levels[price];
+        if (level.head != 0) {
+            order.prevOrder = level.tail;
+            orders[level.tail].nextOrder = uint32(orderId);
+            level.tail = uint32(orderId);
+            return;
+        }
+
+        uint256 better = 0;
+        uint256 worse = isBuyOrder ? bestBid : bestAsk;
+        if (hintPrice != 0 && levels[hintPrice].head != 0 && _isBetter(isBuyOrder, hintPrice, price)) {
+            better = hintPrice;
+            worse = levels[hintPrice].worse;
+        }
+        uint256 steps = 0;
+        while (worse != 0 && _isBetter(isBuyOrder, worse, price)) {
+            require(++steps <= MAX_LEVEL_STEPS, "Price level too deep, pass a hint");
+            better = worse;
+            worse = levels[worse].worse;
+        }
+
+        levels[price] = PriceLevel({
+            better: uint96(better),
+            worse: uint96(worse),
+            head: uint32(orderId),
+            tail: uint32(orderId)
+        });
+        if (better == 0) {
+            if (isBuyOrder) {
+                bestBid = uint96(price);
+            } else {
+                bestAsk = uint96(price);
+            }
+        } else {
+            levels[better].worse = uint96(price);
+        }
+        if (worse != 0) {
+            levels[worse].better = uint96(price);
+        }
+    }
+
+    // Unlink a live order from its level, dropping the level once it is empty
+    function _removeFromLevel(uint256 orderId, Order storage order) internal {
+        mapping(uint256 => PriceLevel) storage levels = _levels(order.isBuyOrder);
+        uint256 price = order.price;
+        PriceLevel storage level = levels[price];
+        uint32 prev = order.prevOrder;
+        uint32 next = order.nextOrder;
+
+        if (prev != 0 || next != 0) {
+            if (prev != 0) {
+                orders[prev].nextOrder = next;
+            } else {
+                level.head = next;
+            }
+            if (next != 0) {
+                orders[next].prevOrder = prev;
+            } else {
+                level.tail = prev;
+            }
+            order.prevOrder = 0;
+            order.nextOrder = 0;
+            return;
+        }
+
+        // Last order at this price
+        require(level.head == orderId, "Order is not queued");
+        uint256 better = level.better;
+        uint256 worse = level.worse;
+        delete levels[price];
+        if (better != 0) {
+            levels[better].worse = uint96(worse);
+        } else if (order.isBuyOrder) {
+            bestBid = uint96(worse);
+        } else {
+            bestAsk = uint96(worse);
+        }
+        if (worse != 0) {
+            levels[worse].better = uint96(better);
+        }
+    }
+
     // Cancel an order
     function cancelOrder(uint256 _orderId) public {
-        require(orders[_orderId].user == msg.sender, "Only order owner can cancel");
-        require(orders[_orderId].isActive, "Order is not active");
-        
-        orders[_orderId].isActive = false;
-        emit OrderCancelled(_orderId);
+        Order storage order = orders[_orderId];
+        require(order.user == msg.sender, "Only order owner can cancel");
+        require(order.isActive, "Order is not active");
+        _cancelOrder(_orderId, order);
+    }
+
+    // Cancel several orders; ones already filled or cancelled are skipped
+    function cancelOrders(uint256[] calldata _orderIds) external returns (uint256 cancelled) {
+        for (uint256 i = 0; i < _orderIds.length; i++) {
+            Order storage order = orders[_orderIds[i]];
+            require(order.user == msg.sender, "Only order owner can cancel");
+            if (order.isActive) {
+                _cancelOrder(_orderIds[i], order);
+                cancelled++;
+            }
+        }
+    }
+
+    function _cancelOrder(uint256 orderId, Order storage order) internal {
+        order.isActive = false;
+        _removeFromLevel(orderId, order);
+        activeOrderCount--;
+        emit OrderCancelled(orderId);
     }
-    
+
+    // Settle one call-auction interval at its uniform clearing price: record
+    // each buyer's and seller's filled quantity and pay the sellers
+    function settleAuction(
+        uint256 _intervalId,
+        uint256 _clearingPrice,
+        address[] calldata _buyers,
+        uint256[] calldata _boughtAmounts,
+        address[] calldata _sellers,
+        uint256[] calldata _soldAmounts
+    ) external {
+        require(msg.sender == operator, "Only operator can settle");
+        require(_intervalId > lastSettledInterval, "Interval already settled");
+        require(openInterval == 0, "Another interval is partly settled");
+        require(_buyers.length == _boughtAmounts.length && _sellers.length == _soldAmounts.length, "Length mismatch");
+        require(_clearingPrice > 0, "Price must be greater than 0");
+        lastSettledInterval = _intervalId;
+
+        uint256 bought = 0;
+        for (uint256 i = 0; i < _buyers.length; i++) {
+            bought += _boughtAmounts[i];
+            emit AuctionFill(_intervalId, _buyers[i], true, _boughtAmounts[i]);
+        }
+        uint256 sold = 0;
+        for (uint256 i = 0; i < _sellers.length; i++) {
+            sold += _soldAmounts[i];
+            emit AuctionFill(_intervalId, _sellers[i], false, _soldAmounts[i]);
+            payable(_sellers[i]).transfer(_soldAmounts[i] * _clearingPrice);
+        }
+        require(bought == sold, "Bought and sold amounts differ");
+        emit AuctionSettled(_intervalId, _clearingPrice, sold);
+    }
+
+    // Settle one part of an interval too large for one settleAuction transaction.
+    // _users holds the part's _buyerCount buyers followed by its sellers, with
+    // their filled amounts; bought and sold amounts balance within each part.
+    // _partsLeft counts the parts after this one and must go down by one per
+    // call, so a part can't be settled twice; the last part (0) closes the
+    // interval. AuctionSettled reports each part's volume.
+    function settleAuctionPart(
+        uint256 _intervalId,
+        uint256 _partsLeft,
+        uint256 _clearingPrice,
+        uint256 _buyerCount,
+        address[] calldata _users,
+        uint256[] calldata _amounts
+    ) external {
+        require(msg.sender == operator, "Only operator can settle");
+        require(_users.length == _amounts.length && _buyerCount <= _users.length, "Length mismatch");
+        if (openInterval == 0) {
+            require(_intervalId > lastSettledInterval, "Interval already settled");
+            require(_clearingPrice > 0, "Price must be greater than 0");
+            openInterval = _intervalId;
+            openPrice = _clearingPrice;
+        } else {
+            require(_intervalId == openInterval, "Another interval is partly settled");
+            require(_partsLeft + 1 == openPartsLeft, "Parts out of order");
+            require(_clearingPrice == openPrice, "Clearing price differs");
+        }
+        openPartsLeft = _partsLeft;
+
+        uint256 bought = 0;
+        uint256 sold = 0;
+        for (uint256 i = 0; i < _users.length; i++) {
+            bool isBuyer = i < _buyerCount;
+            emit AuctionFill(_intervalId, _users[i], isBuyer, _amounts[i]);
+            if (isBuyer) {
+                bought += _amounts[i];
+            } else {
+                sold += _amounts[i];
+                payable(_users[i]).transfer(_amounts[i] * _clearingPrice);
+            }
+        }
+        require(bought == sold, "Bought and sold amounts differ");
+        emit AuctionSettled(_intervalId, _clearingPrice, sold);
+
+        if (_partsLeft == 0) {
+            lastSettledInterval = _intervalId;
+            openInterval = 0;
+        }
+    }
+
+    // Record trades matched by the off-chain order book and pay their sellers.
+    // They have no on-chain orders, so their order ids are 0.
+    function settleTrades(
+        address[] calldata _buyers,
+        address[] calldata _sellers,
+        uint256[] calldata _energyAmounts,
+        uint256[] calldata _prices
+    ) external {
+        require(msg.sender == operator, "Only operator can settle");
+        require(
+            _buyers.length == _sellers.length && _buyers.length == _energyAmounts.length &&
+                _buyers.length == _prices.length,
+            "Length mismatch"
+        );
+        for (uint256 i = 0; i < _buyers.length; i++) {
+            require(_energyAmounts[i] > 0 && _energyAmounts[i] <= type(uint96).max, "Invalid energy amount");
+            require(_prices[i] > 0 && _prices[i] <= type(uint96).max, "Invalid price");
+            _executeTrade(_buyers[i], _sellers[i], _energyAmounts[i], _prices[i], 0, 0);
+        }
+    }
+
     // Get order details
     function getOrder(uint256 _orderId) public view returns (
         address user,
@@ -132,7 +483,7 @@ contract EnergyTrading {
             order.isActive
         );
     }
-    
+
     // Get trade details
     function getTrade(uint256 _tradeId) public view returns (
         address buyer,
@@ -154,23 +505,51 @@ contract EnergyTrading {
             trade.isCancelled
         );
     }
-    
+
+    // Get a price level's neighbours and queue ends, e.g. to find a hint off-chain
+    function getPriceLevel(bool _isBuyOrder, uint256 _price) public view returns (
+        uint256 better,
+        uint256 worse,
+        uint256 head,
+        uint256 tail
+    ) {
+        PriceLevel storage level = _levels(_isBuyOrder)[_price];
+        return (level.better, level.worse, level.head, level.tail);
+    }
+
+    // Nearest level on one side better than _price, or 0: the hint for an order
+    // at that price. Walks the level list, so it is meant for eth_call only.
+    function hintPrice(bool _isBuyOrder, uint256 _price) external view returns (uint256 better) {
+        mapping(uint256 => PriceLevel) storage levels = _levels(_isBuyOrder);
+        uint256 level = _isBuyOrder ? bestBid : bestAsk;
+        while (level != 0 && _isBetter(_isBuyOrder, level, _price)) {
+            better = level;
+            level = levels[level].worse;
+        }
+    }
+
     // Get active orders count
     function getActiveOrdersCount() public view returns (uint256) {
-        uint256 count = 0;
-        for (uint256 i = 1; i <= orderCounter; i++) {
-            if (orders[i].isActive) {
-                count++;
-            }
+        return activeOrderCount;
+    }
+
+    function _levels(bool isBuyOrder) internal view returns (mapping(uint256 => PriceLevel) storage) {
+        if (isBuyOrder) {
+            return bidLevels;
         }
-        return count;
+        return askLevels;
+    }
+
+    // Whether price a ranks ahead of price b on the given side
+    function _isBetter(bool isBuyOrder, uint256 a, uint256 b) internal pure returns (bool) {
+        return isBuyOrder ? a > b : a < b;
     }
-    
+
     // Helper function to find minimum
     function _min(uint256 a, uint256 b) internal pure returns (uint256) {
         return a < b ? a : b;
     }
-    
+
     // Fallback function to receive ETH
     receive() external payable {}
 }
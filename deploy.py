@@ -74,9 +74,10 @@ def check_blockchain():
     try:
         import web3
         from web3 import Web3
+        from app.rpc_provider import get_provider
         
-        # Try to connect to local Ganache
-        w3 = Web3(Web3.HTTPProvider('http://127.0.0.1:7545'))
+        # Try to connect to local Ganache (or BLOCKCHAIN_RPC_URL) through the shared pooled provider
+        w3 = Web3(get_provider())
         
         if w3.is_connected():
             block_number = w3.eth.block_number
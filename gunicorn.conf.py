@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for app.wsgi:application
+
+    gunicorn -c gunicorn.conf.py app.wsgi:application
+
+Worker and thread counts come from WEB_CONCURRENCY and WEB_THREADS.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+
+# Load the model once in the master and fork workers from it
+preload_app = True
+
+# Requests are short; give in-flight ones time to finish on SIGTERM
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = os.environ.get('ACCESS_LOG')  # e.g. "-" for stdout; off by default
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    """Threads don't survive fork: connect to the chain in each worker"""
+    from app import server
+    server.init_blockchain()
+
+
+def worker_exit(server, worker):
+    """Stop the worker's receipt poller and event indexer"""
+    from app import server as app_server
+    app_server.shutdown()
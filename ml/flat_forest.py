@@ -0,0 +1,160 @@
+"""
+Flat, memory-mappable export of the fitted random forest and scaler
+"""
+
+import json
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+# Array name -> little-endian on-disk dtype
+FLAT_ARRAYS = {
+    'children': '<i8',     # [left, right] per node; right is taken when x[feature] > threshold
+    'feature': '<i8',
+    'threshold': '<f8',
+    'value': '<f8',        # leaf prediction (every node carries its mean)
+    'roots': '<i8',        # first node of each tree
+    'depths': '<i4',       # depth of each tree
+    'scaler_mean': '<f8',
+    'scaler_scale': '<f8'
+}
+
+
+class FlatForest:
+    """A fitted forest as contiguous node arrays, evaluated with NumPy only
+
+    All trees share one set of node arrays with global child indices, the
+    two children of node ``i`` at ``children[2 * i]`` (left) and
+    ``children[2 * i + 1]`` (right), so one step is a single gather. Leaves
+    point to themselves with an infinite threshold, so a walk of a tree's
+    depth always ends on a leaf without per-node branching. The StandardScaler's mean and scale travel
+    with the trees, so ``predict`` takes raw weather features.
+
+    Saved as raw array files plus a JSON manifest: loading memory-maps the
+    files read-only, involves no pickle, and every worker process that
+    loads the same export shares one copy of the pages.
+    """
+
+    def __init__(self, arrays, n_features):
+        self.arrays = arrays
+        self.n_features = n_features
+        for name, values in arrays.items():
+            setattr(self, name, values)
+        self.n_trees = len(self.roots)
+        self.max_depth = int(self.depths.max())
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.arrays.values())
+
+    @classmethod
+    def from_sklearn(cls, model, scaler):
+        """Flatten a fitted RandomForestRegressor (single output) and its StandardScaler"""
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        parts = {'children': [], 'feature': [], 'threshold': [], 'value': []}
+        for offset, tree in zip(offsets, trees):
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            children = np.column_stack([np.where(is_leaf, nodes, tree.children_left),
+                                        np.where(is_leaf, nodes, tree.children_right)])
+            parts['children'].append(children.ravel() + offset)
+            parts['feature'].append(np.where(is_leaf, 0, tree.feature))
+            parts['threshold'].append(np.where(is_leaf, np.inf, tree.threshold))
+            parts['value'].append(tree.value[:, 0, 0])
+
+        arrays = {name: np.concatenate(values) for name, values in parts.items()}
+        arrays['roots'] = offsets[:-1]
+        arrays['depths'] = np.array([tree.max_depth for tree in trees])
+        arrays['scaler_mean'] = np.asarray(scaler.mean_)
+        arrays['scaler_scale'] = np.asarray(scaler.scale_)
+        arrays = {name: np.ascontiguousarray(arrays[name], dtype=dtype) for name, dtype in FLAT_ARRAYS.items()}
+        return cls(arrays, n_features=model.n_features_in_)
+
+    def save(self, path):
+        """Write the arrays and manifest to the directory ``path``, replacing any previous export"""
+        staging = path + f'.tmp-{os.getpid()}'
+        os.makedirs(staging, exist_ok=True)
+        for name, dtype in FLAT_ARRAYS.items():
+            self.arrays[name].astype(dtype).tofile(os.path.join(staging, f'{name}.bin'))
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'n_features': self.n_features,
+            'n_trees': self.n_trees,
+            'n_nodes': self.n_nodes,
+            'arrays': FLAT_ARRAYS
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap directories so a worker never maps a half-written export
+        if os.path.isdir(path):
+            retired = path + f'.old-{os.getpid()}'
+            os.rename(path, retired)
+            os.rename(staging, path)
+            for name in os.listdir(retired):
+                os.remove(os.path.join(retired, name))  # open memory maps stay valid on POSIX
+            os.rmdir(retired)
+        else:
+            os.rename(staging, path)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map an export written by ``save``
+
+        The maps are viewed as plain arrays: indexing an ``np.memmap``
+        subclass costs about twice as much per call.
+        """
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported flat model version {manifest.get('format_version')} in {path}")
+        arrays = {name: np.asarray(np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype, mode='r'))
+                  for name, dtype in manifest['arrays'].items()}
+        if len(arrays['feature']) != manifest['n_nodes'] or len(arrays['roots']) != manifest['n_trees']:
+            raise ValueError(f"Flat model in {path} is truncated")
+        return cls(arrays, n_features=manifest['n_features'])
+
+    def predict(self, X, block_rows=1024):
+        """Mean of the trees' leaf values for each row of the N x n_features array ``X``
+
+        Scales with the stored scaler parameters and compares in float32,
+        like sklearn, so results match RandomForestRegressor.predict up to
+        the order of the final sum. All trees are walked in lockstep over a
+        rows x trees matrix of node indices, ``block_rows`` rows at a time.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        scaled = ((X - self.scaler_mean) / self.scaler_scale).astype(np.float32)
+        predictions = np.empty(len(scaled))
+        for start in range(0, len(scaled), block_rows):
+            block = scaled[start:start + block_rows]
+            # Offset of each row in the flattened block, to gather x[row, feature[node]]
+            row_offsets = (np.arange(len(block)) * block.shape[1])[:, None]
+            block = block.ravel()
+            node = np.tile(self.roots.astype(np.intp), (len(row_offsets), 1))
+            for _ in range(self.max_depth):
+                goes_right = block[row_offsets + self.feature[node]] > self.threshold[node]
+                node = self.children[2 * node + goes_right]
+            predictions[start:start + block_rows] = self.value[node].sum(axis=1) / self.n_trees
+        return predictions
+
+    def predict_row(self, row):
+        """Prediction for one row of raw features, without any input validation
+
+        Scaling is fused in (one subtract and divide on the row instead of a
+        StandardScaler.transform call) and all trees advance one level per
+        step, so a call costs about ``max_depth`` small NumPy operations
+        whatever the number of trees.
+        """
+        x = ((row - self.scaler_mean) / self.scaler_scale).astype(np.float32)
+        node = self.roots
+        for _ in range(self.max_depth):
+            node = self.children[2 * node + (x[self.feature[node]] > self.threshold[node])]
+        return self.value[node].sum() / self.n_trees
@@ -0,0 +1,237 @@
+"""
+Columnar on-disk store for weather and energy history, partitioned by site and date
+"""
+
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+SCHEMA_FILE = '_schema.json'
+
+# Column name -> little-endian on-disk dtype. Timestamps are UTC epoch seconds.
+HISTORY_COLUMNS = {
+    'timestamp': '<i8',
+    'temperature': '<f4',
+    'humidity': '<f4',
+    'wind_speed': '<f4',
+    'cloud_cover': '<f4',
+    'solar_radiation': '<f4',
+    'energy_output': '<f4'
+}
+
+SITE_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def to_epoch_seconds(value):
+    """UTC epoch seconds from a number, string or datetime (naive means UTC); arrays map element-wise"""
+    if value is None:
+        return None
+    if isinstance(value, (pd.Series, pd.Index, np.ndarray, list)):
+        values = pd.Series(value)
+        if pd.api.types.is_numeric_dtype(values):
+            return values.to_numpy(dtype=np.int64)
+        values = pd.to_datetime(values, utc=True).dt.tz_convert(None)
+        return values.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return int(timestamp.timestamp())
+
+
+def month_of(epoch_seconds):
+    """Months since 1970-01 for epoch seconds (scalar or array)"""
+    return np.asarray(epoch_seconds, dtype='datetime64[s]').astype('datetime64[M]').astype(np.int64)
+
+
+class HistoryStore:
+    """Weather/production history as memory-mapped NumPy columns
+
+    Layout under ``root``::
+
+        _schema.json
+        site=<site>/month=<YYYY-MM>/<column>.bin
+
+    Each partition holds one UTC calendar month of one site, sorted by
+    timestamp, with one headerless array file per column whose dtype comes
+    from ``_schema.json``, so a reader maps only the columns it needs and
+    opening a partition costs no header parsing. Time-range reads skip partitions outside the range by
+    directory name and binary-search the timestamps inside the boundary
+    months. Partitions are rewritten whole into a temporary directory and
+    swapped in, so readers never see a half-written month.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.schema = self._load_schema()
+
+    def _load_schema(self):
+        path = os.path.join(self.root, SCHEMA_FILE)
+        if not os.path.exists(path):
+            return {'format_version': FORMAT_VERSION, 'columns': HISTORY_COLUMNS, 'partitioning': ['site', 'month']}
+        with open(path) as f:
+            schema = json.load(f)
+        if schema.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported history store version {schema.get('format_version')} in {self.root}")
+        return schema
+
+    @property
+    def columns(self):
+        return list(self.schema['columns'])
+
+    def sites(self):
+        """Sites with at least one partition"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[len('site='):] for name in os.listdir(self.root) if name.startswith('site='))
+
+    def write(self, data, site='default', mode='append'):
+        """Store the rows of ``data`` (a DataFrame with every schema column) for ``site``
+
+        ``timestamp`` may be datetimes or epoch seconds. With ``mode='overwrite'``
+        the site's existing partitions are removed first; otherwise rows are
+        merged into the months they fall on. Returns the number of rows written.
+        """
+        if not SITE_PATTERN.match(site):
+            raise ValueError(f"Invalid site name {site!r}")
+        if mode not in ('append', 'overwrite'):
+            raise ValueError(f"Unknown write mode {mode!r}")
+        missing = [column for column in self.columns if column not in data]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+        os.makedirs(self.root, exist_ok=True)
+        schema_path = os.path.join(self.root, SCHEMA_FILE)
+        if not os.path.exists(schema_path):
+            # Renamed into place so a concurrent writer's reader never sees it half-written
+            tmp_path = f'{schema_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.schema, f, indent=2)
+            os.replace(tmp_path, schema_path)
+
+        site_dir = os.path.join(self.root, f'site={site}')
+        if mode == 'overwrite' and os.path.isdir(site_dir):
+            shutil.rmtree(site_dir)
+
+        columns = {name: np.asarray(data[name], dtype=dtype) for name, dtype in self.schema['columns'].items()
+                   if name != 'timestamp'}
+        columns['timestamp'] = to_epoch_seconds(data['timestamp'])
+        months = month_of(columns['timestamp'])
+        order = np.argsort(months, kind='stable')
+        boundaries = np.flatnonzero(np.diff(months[order])) + 1
+
+        for rows in np.split(order, boundaries):
+            if len(rows) == 0:  # empty input
+                continue
+            month = str(np.datetime64(int(months[rows[0]]), 'M'))
+            self._write_partition(site_dir, month, {name: values[rows] for name, values in columns.items()})
+        return len(columns['timestamp'])
+
+    def _write_partition(self, site_dir, month, new_columns):
+        partition = os.path.join(site_dir, f'month={month}')
+        if os.path.isdir(partition):
+            existing = self._map_partition(partition, self.columns)
+            new_columns = {name: np.concatenate([existing[name], values]) for name, values in new_columns.items()}
+        order = np.argsort(new_columns['timestamp'], kind='stable')
+
+        staging = partition + f'.tmp-{os.getpid()}'
+        os.makedirs(staging)
+        for name, values in new_columns.items():
+            values[order].astype(self.schema['columns'][name]).tofile(os.path.join(staging, f'{name}.bin'))
+        if os.path.isdir(partition):
+            retired = partition + f'.old-{os.getpid()}'
+            os.rename(partition, retired)
+            os.rename(staging, partition)
+            shutil.rmtree(retired)  # open memory maps stay valid on POSIX
+        else:
+            os.rename(staging, partition)
+
+    def _map_partition(self, partition, columns):
+        dtypes = self.schema['columns']
+        return {name: np.memmap(os.path.join(partition, f'{name}.bin'), dtype=dtypes[name], mode='r')
+                for name in columns}
+
+    def partitions(self, site=None, start=None, end=None):
+        """``(site, month, path)`` of partitions that may hold rows in [start, end)"""
+        start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+        first_month = None if start is None else str(np.datetime64(int(month_of(start)), 'M'))
+        last_month = None if end is None else str(np.datetime64(int(month_of(end - 1)), 'M'))
+        found = []
+        for name in ([site] if site else self.sites()):
+            site_dir = os.path.join(self.root, f'site={name}')
+            if not os.path.isdir(site_dir):
+                continue
+            for entry in sorted(os.listdir(site_dir)):
+                if not entry.startswith('month=') or '.' in entry:  # skip in-flight rewrites
+                    continue
+                month = entry[len('month='):]
+                # ISO months compare correctly as strings
+                if (first_month and month < first_month) or (last_month and month > last_month):
+                    continue
+                found.append((name, month, os.path.join(site_dir, entry)))
+        return found
+
+    def iter_partitions(self, columns=None, site=None, start=None, end=None):
+        """Yield ``(site, {column: array})`` per partition, trimmed to [start, end)
+
+        Arrays are read-only memory maps (or slices of them) until copied.
+        """
+        columns = list(columns or self.columns)
+        start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+        needed = columns if 'timestamp' in columns or (start is None and end is None) else columns + ['timestamp']
+        for name, _, path in self.partitions(site, start, end):
+            mapped = self._map_partition(path, needed)
+            lo, hi = 0, None
+            if start is not None or end is not None:
+                timestamps = mapped['timestamp']
+                lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+                hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='left'))
+                if lo >= hi:
+                    continue
+            yield name, {column: mapped[column][lo:hi] for column in columns}
+
+    def read(self, columns=None, site=None, start=None, end=None):
+        """Rows in [start, end) as a DataFrame, with a ``site`` column when several sites match
+
+        ``timestamp`` comes back as UTC datetimes.
+        """
+        columns = list(columns or self.columns)
+        # Copy each partition out so its memory maps (one descriptor per column) close early
+        parts = [(name, {column: np.array(values) for column, values in part.items()})
+                 for name, part in self.iter_partitions(columns, site, start, end)]
+        data = {column: np.concatenate([part[column] for _, part in parts]) if parts
+                else np.empty(0, dtype=self.schema['columns'][column]) for column in columns}
+        frame = pd.DataFrame(data)
+        if 'timestamp' in frame:
+            frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s', utc=True)
+        if site is None and len({name for name, _ in parts}) > 1:
+            frame['site'] = np.concatenate([np.full(len(part[columns[0]]), name) for name, part in parts])
+        return frame
+
+    def iter_chunks(self, chunksize, columns=None, site=None, start=None, end=None):
+        """Yield DataFrames of exactly ``chunksize`` rows (the last may be shorter)
+
+        Small monthly partitions are coalesced, so chunk size does not depend
+        on how the history is partitioned.
+        """
+        columns = list(columns or self.columns)
+        buffered, buffered_rows = [], 0
+        for _, part in self.iter_partitions(columns, site, start, end):
+            offset, n_rows = 0, len(part[columns[0]])
+            while offset < n_rows:
+                take = min(chunksize - buffered_rows, n_rows - offset)
+                buffered.append({column: part[column][offset:offset + take] for column in columns})
+                buffered_rows += take
+                offset += take
+                if buffered_rows == chunksize:
+                    yield pd.DataFrame({column: np.concatenate([piece[column] for piece in buffered])
+                                        for column in columns})
+                    buffered, buffered_rows = [], 0
+        if buffered_rows:
+            yield pd.DataFrame({column: np.concatenate([piece[column] for piece in buffered]) for column in columns})
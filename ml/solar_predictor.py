@@ -1,28 +1,205 @@
 import pandas as pd
 import numpy as np
+from sklearn.base import clone as clone_estimator
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
+from sklearn.tree._tree import NODE_DTYPE
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
+import argparse
+import copy
 import os
+import sys
+import threading
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.flat_forest import FlatForest
+from ml.history_store import SITE_PATTERN, HistoryStore
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet input is optional
+    pq = None
+
+PREDICT_ENGINES = ('sklearn', 'lockstep')
+
+FEATURE_COLUMNS = ['temperature', 'humidity', 'wind_speed', 'cloud_cover', 'solar_radiation']
+TARGET_COLUMN = 'energy_output'
+
+# Resolve data and model locations from the repository root rather than the CWD
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+HISTORY_DIR = os.path.join(DATA_DIR, 'history')
+FLAT_MODEL_DIR = 'solar_forest'  # FlatForest export, inside the model directory
+SITE_MODELS_DIR = os.path.join(MODELS_DIR, 'sites')  # one model directory per site
+
+# Sample readings are hourly from this instant
+SAMPLE_START = np.datetime64('2024-01-01T00:00:00', 's')
+
+class TrainingMonitor:
+    """Measures wall-clock time, CPU time and peak resident memory of a training run
+
+    CPU time covers every thread of the process, so it exceeds wall time when
+    trees are fitted in parallel. Peak memory is sampled from /proc on Linux
+    and falls back to the process high-water mark elsewhere.
+    """
+
+    def __init__(self, sample_interval=0.05):
+        self.sample_interval = sample_interval
+        self.stats = {}
+        self._peak_rss = 0
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _rss_bytes():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            if resource is None:
+                return 0
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            self._peak_rss = max(self._peak_rss, self._rss_bytes())
+
+    def __enter__(self):
+        self._peak_rss = self._start_rss = self._rss_bytes()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats['wall_seconds'] = time.perf_counter() - self._wall
+        self.stats['cpu_seconds'] = time.process_time() - self._cpu
+        self._stop.set()
+        self._sampler.join()
+        self._peak_rss = max(self._peak_rss, self._rss_bytes())
+        self.stats['peak_rss_mb'] = self._peak_rss / 2 ** 20
+        self.stats['rss_growth_mb'] = (self._peak_rss - self._start_rss) / 2 ** 20
+        return False
+
+def iter_training_chunks(path, chunksize=100000):
+    """Yield a large CSV, Parquet file or history store as DataFrames of at most ``chunksize`` rows
+    
+    Only the feature and target columns are read, as float32, so memory use
+    depends on ``chunksize`` and not on the size of the file. Parquet files
+    (``.parquet``/``.pq``) are read one record batch at a time and need pyarrow;
+    a directory is read as a HistoryStore.
+    """
+    columns = FEATURE_COLUMNS + [TARGET_COLUMN]
+    if os.path.isdir(path):
+        yield from HistoryStore(path).iter_chunks(chunksize, columns)
+    elif path.endswith(('.parquet', '.pq')):
+        if pq is None:
+            raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas().astype(np.float32)
+    else:
+        yield from pd.read_csv(path, usecols=columns, dtype=np.float32, chunksize=chunksize)
+
+def site_model_dir(site, root=SITE_MODELS_DIR):
+    """Model directory of one site (prosumer) under ``root``"""
+    if not SITE_PATTERN.match(site):
+        raise ValueError(f"Invalid site name {site!r}")
+    return os.path.join(root, site)
 
 class SolarEnergyPredictor:
-    def __init__(self):
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+    def __init__(self, n_estimators=100, n_jobs=None, model_format='joblib', engine='sklearn', **forest_params):
+        """Random forest predictor
+        
+        ``n_jobs`` is the number of cores used to fit trees (-1 for all);
+        predictions stay single-threaded since per-call thread start-up
+        would dominate single-row latency. ``model_format`` picks what
+        ``load_model`` reads: the pickled sklearn objects (``'joblib'``) or
+        the memory-mapped FlatForest export (``'flat'``), which loads
+        faster, is shared between worker processes and runs no pickle code,
+        but can only predict. ``engine`` picks how predictions run (see
+        ``set_engine``). Extra keyword arguments (``max_samples``,
+        ``min_samples_leaf``...) go to RandomForestRegressor.
+        """
+        if model_format not in ('joblib', 'flat'):
+            raise ValueError(f"Unknown model format {model_format!r}")
+        if engine not in PREDICT_ENGINES:
+            raise ValueError(f"Unknown prediction engine {engine!r}")
+        self.model = RandomForestRegressor(n_estimators=n_estimators, random_state=42, **forest_params)
         self.scaler = StandardScaler()
+        self.flat_model = None  # FlatForest used by the lockstep engine
         self.is_trained = False
+        self.n_jobs = n_jobs
+        self.model_format = model_format
+        self.engine = engine
+        self.last_training_stats = None
         
-    def generate_sample_data(self, n_samples=1000):
-        """Generate sample weather and solar energy data"""
-        np.random.seed(42)
+    @property
+    def flat_only(self):
+        """True when only the flat export was loaded, so there is no sklearn forest to update or save"""
+        return self.is_trained and not hasattr(self.model, 'estimators_')
+
+    @property
+    def nbytes(self):
+        """Approximate bytes held by the fitted trees and the flat export"""
+        total = self.flat_model.nbytes if self.flat_model is not None else 0
+        for estimator in getattr(self.model, 'estimators_', []):
+            total += estimator.tree_.capacity * NODE_DTYPE.itemsize + estimator.tree_.value.nbytes
+        return total
+    
+    def set_engine(self, engine):
+        """Switch how single-row predictions run, at any time
+        
+        ``'sklearn'`` calls RandomForestRegressor.predict; ``'lockstep'``
+        walks a FlatForest copy of the trees with NumPy, skipping sklearn's
+        per-call validation and thread dispatch, which is tens of times
+        faster for one row. ``predict_batch`` keeps sklearn's compiled loop
+        whenever the sklearn forest is loaded since it wins on large
+        batches. A model loaded from the flat export always uses
+        ``'lockstep'``.
+        """
+        if engine not in PREDICT_ENGINES:
+            raise ValueError(f"Unknown prediction engine {engine!r}")
+        if engine == 'sklearn' and self.flat_only:
+            raise ValueError("A model loaded from the flat export can only use the lockstep engine")
+        # Compile before switching so a concurrent prediction never sees a half-set engine
+        if engine == 'lockstep' and self.flat_model is None and self.is_trained:
+            self.flat_model = FlatForest.from_sklearn(self.model, self.scaler)
+        self.engine = engine
+    
+    def _compile_engine(self):
+        """Rebuild the lockstep engine's FlatForest from the sklearn forest after it changes"""
+        if self.flat_only:
+            return
+        if self.engine == 'lockstep' and self.is_trained:
+            self.flat_model = FlatForest.from_sklearn(self.model, self.scaler)
+        else:
+            self.flat_model = None
+        
+    def generate_sample_data(self, n_samples=1000, seed=42):
+        """Generate sample weather and solar energy data
+
+        Draws from a private RandomState, so the global NumPy RNG is left
+        alone; ml/synthetic_data.py generates larger, more realistic sets.
+        """
+        rng = np.random.RandomState(seed)
         
         # Weather features
-        temperature = np.random.normal(20, 10, n_samples)  # Celsius
-        humidity = np.random.uniform(30, 90, n_samples)    # Percentage
-        wind_speed = np.random.exponential(5, n_samples)   # m/s
-        cloud_cover = np.random.uniform(0, 100, n_samples) # Percentage
-        solar_radiation = np.random.normal(500, 150, n_samples)  # W/m²
+        temperature = rng.normal(20, 10, n_samples)  # Celsius
+        humidity = rng.uniform(30, 90, n_samples)    # Percentage
+        wind_speed = rng.exponential(5, n_samples)   # m/s
+        cloud_cover = rng.uniform(0, 100, n_samples) # Percentage
+        solar_radiation = rng.normal(500, 150, n_samples)  # W/m²
         
         # Generate solar energy output (kWh) based on weather conditions
         # Simplified model: energy = f(temperature, humidity, wind, clouds, solar_radiation)
@@ -36,13 +213,14 @@ class SolarEnergyPredictor:
         # Calculate energy output with some randomness
         energy_output = (base_energy * temp_factor * humidity_factor * 
                         wind_factor * cloud_factor * radiation_factor * 
-                        np.random.normal(1, 0.1, n_samples))
+                        rng.normal(1, 0.1, n_samples))
         
         # Ensure positive values
         energy_output = np.maximum(energy_output, 0)
         
         # Create DataFrame
         data = pd.DataFrame({
+            'timestamp': SAMPLE_START + np.arange(n_samples) * np.timedelta64(3600, 's'),
             'temperature': temperature,
             'humidity': humidity,
             'wind_speed': wind_speed,
@@ -53,19 +231,23 @@ class SolarEnergyPredictor:
         
         return data
     
-    def train_model(self, data=None):
-        """Train the solar energy prediction model"""
+    def train_model(self, data=None, n_jobs=None, save_data=True, save=True):
+        """Train the solar energy prediction model from scratch"""
         if data is None:
             print("Generating sample data...")
             data = self.generate_sample_data()
         
-        # Save sample data
-        data.to_csv('../data/solar_weather.csv', index=False)
-        print(f"Sample data saved to ../data/solar_weather.csv")
+        # Save the training set to the columnar history store
+        if save_data:
+            if 'timestamp' in data:
+                HistoryStore(HISTORY_DIR).write(data, site='sample', mode='overwrite')
+                print(f"Training data saved to {HISTORY_DIR}")
+            else:
+                print("Training data has no timestamp column; not saved")
         
         # Prepare features and target
-        X = data[['temperature', 'humidity', 'wind_speed', 'cloud_cover', 'solar_radiation']]
-        y = data['energy_output']
+        X = data[FEATURE_COLUMNS]
+        y = data[TARGET_COLUMN]
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -76,31 +258,213 @@ class SolarEnergyPredictor:
         
         # Train model
         print("Training Random Forest model...")
-        self.model.fit(X_train_scaled, y_train)
+        self._fit(X_train_scaled, y_train, n_jobs, warm_start=False, mode='full')
+        
+        return self._evaluate(X_test_scaled, y_test, save)
+    
+    def update_model(self, data, n_new_estimators=20, max_estimators=None, n_jobs=None, save=True):
+        """Grow the forest with trees fitted on newly arrived rows only (warm start)
+        
+        Existing trees and the fitted scaler are kept. With ``max_estimators``
+        the oldest trees are dropped so the forest becomes a sliding window
+        over recent data.
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before it can be updated")
+        if self.flat_only:
+            raise ValueError("A model loaded from the flat export cannot be updated; load the joblib model")
+        
+        X_train, X_test, y_train, y_test = train_test_split(
+            data[FEATURE_COLUMNS], data[TARGET_COLUMN], test_size=0.2, random_state=42
+        )
+        X_train_scaled = self.scaler.transform(X_train)
+        X_test_scaled = self.scaler.transform(X_test)
+        
+        print(f"Adding {n_new_estimators} trees on {len(X_train)} new rows...")
+        self.model.set_params(n_estimators=len(self.model.estimators_) + n_new_estimators)
+        self._fit(X_train_scaled, y_train, n_jobs, warm_start=True, mode='warm_start')
+        
+        if max_estimators and len(self.model.estimators_) > max_estimators:
+            self.model.estimators_ = self.model.estimators_[-max_estimators:]
+            self.model.n_estimators = max_estimators
         
-        # Make predictions
+        return self._evaluate(X_test_scaled, y_test, save)
+    
+    def train_streaming(self, path, chunksize=100000, trees_per_chunk=10, holdout_fraction=0.2,
+                        max_holdout_rows=100000, n_jobs=None, save=True):
+        """Train from scratch on a CSV/Parquet file too large to load, one chunk at a time
+        
+        A first pass fits the scaler incrementally. The second pass fits
+        ``trees_per_chunk`` trees on each chunk alone and keeps a uniform
+        random sample (reservoir) of ``n_estimators`` of all the trees
+        offered, so early and late history are equally represented and the
+        forest never grows past its configured size (files with fewer than
+        ``n_estimators / trees_per_chunk`` chunks offer more trees per chunk
+        so it still fills up). Trees the reservoir would reject are never
+        fitted. A ``holdout_fraction`` of every chunk
+        is held out, and a uniform sample of at most ``max_holdout_rows`` of
+        those rows is scored at the end.
+        
+        Peak memory is one chunk plus the forest, whatever the file size;
+        ``max_samples`` and ``min_samples_leaf`` bound the size of each tree.
+        """
+        n_trees = self.model.n_estimators
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
+        rng = np.random.default_rng(42)
+        
+        with TrainingMonitor() as monitor:
+            print(f"Fitting scaler on {path}...")
+            scaler = StandardScaler()
+            total_chunks = 0
+            for chunk in iter_training_chunks(path, chunksize):
+                scaler.partial_fit(chunk[FEATURE_COLUMNS])
+                total_chunks += 1
+            # Short files offer more trees per chunk so the forest still fills up
+            trees_per_chunk = max(trees_per_chunk, -(-n_trees // max(total_chunks, 1)))
+            
+            print(f"Training Random Forest model on {path} in chunks of {chunksize} rows...")
+            trees, offered, forest = [], 0, None
+            train_rows, n_chunks = 0, 0
+            holdout_X = np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32)
+            holdout_y = np.empty(0, dtype=np.float32)
+            holdout_keys = np.empty(0)
+            for chunk in iter_training_chunks(path, chunksize):
+                n_chunks += 1
+                X = scaler.transform(chunk[FEATURE_COLUMNS])
+                y = chunk[TARGET_COLUMN].to_numpy()
+                test = rng.random(len(X)) < holdout_fraction
+                
+                # Bottom-k by random key keeps a uniform sample of all held-out rows
+                holdout_X = np.concatenate([holdout_X, X[test]])
+                holdout_y = np.concatenate([holdout_y, y[test]])
+                holdout_keys = np.concatenate([holdout_keys, rng.random(int(test.sum()))])
+                if len(holdout_keys) > max_holdout_rows:
+                    keep = np.argpartition(holdout_keys, max_holdout_rows)[:max_holdout_rows]
+                    holdout_X, holdout_y, holdout_keys = holdout_X[keep], holdout_y[keep], holdout_keys[keep]
+                
+                X, y = X[~test], y[~test]
+                if len(X) == 0:
+                    continue
+                train_rows += len(X)
+                
+                # Reservoir sampling over trees: the first n_trees fill the
+                # forest, later ones replace a random slot with falling odds
+                slots = []
+                for _ in range(trees_per_chunk):
+                    slot = offered if offered < n_trees else rng.integers(offered + 1)
+                    if slot < n_trees:
+                        slots.append(slot)
+                    offered += 1
+                if not slots:
+                    continue
+                
+                forest = clone_estimator(self.model).set_params(
+                    n_estimators=len(slots), random_state=n_chunks, n_jobs=n_jobs,
+                    max_samples=self._fit_max_samples(len(X))
+                )
+                forest.fit(X, y)
+                for slot, tree in zip(slots, forest.estimators_):
+                    if slot == len(trees):
+                        trees.append(tree)
+                    else:
+                        trees[slot] = tree
+        
+        if forest is None:
+            raise ValueError(f"No training rows in {path}")
+        
+        # The last chunk's forest carries the fitted metadata; give it the sampled trees
+        forest.set_params(n_estimators=len(trees), n_jobs=None, max_samples=self.model.max_samples,
+                          random_state=self.model.random_state)
+        forest.estimators_ = trees
+        self.model = forest
+        self.scaler = scaler
+        
+        self.last_training_stats = {
+            'mode': 'streaming',
+            'rows': train_rows,
+            'chunks': n_chunks,
+            'n_estimators': len(trees),
+            'n_jobs': n_jobs,
+            **monitor.stats
+        }
+        print(f"Fitted {len(trees)} trees over {n_chunks} chunks in {monitor.stats['wall_seconds']:.2f}s wall, "
+              f"peak RSS {monitor.stats['peak_rss_mb']:.0f} MB")
+        
+        return self._evaluate(holdout_X, holdout_y, save)
+    
+    def _fit(self, X, y, n_jobs, warm_start, mode):
+        """Fit on ``n_jobs`` cores and record the run's resource usage"""
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
+        max_samples = self.model.max_samples
+        self.model.set_params(n_jobs=n_jobs, warm_start=warm_start, max_samples=self._fit_max_samples(len(X)))
+        try:
+            with TrainingMonitor() as monitor:
+                self.model.fit(X, y)
+        finally:
+            self.model.set_params(n_jobs=None, warm_start=False, max_samples=max_samples)
+        
+        self.last_training_stats = {
+            'mode': mode,
+            'rows': len(X),
+            'n_estimators': len(self.model.estimators_),
+            'n_jobs': n_jobs,
+            **monitor.stats
+        }
+        print(f"Fitted in {monitor.stats['wall_seconds']:.2f}s wall, {monitor.stats['cpu_seconds']:.2f}s CPU, "
+              f"peak RSS {monitor.stats['peak_rss_mb']:.0f} MB")
+    
+    def _fit_max_samples(self, n_rows):
+        """The forest's ``max_samples`` for a batch of ``n_rows``
+        
+        A row cap per tree larger than the batch (e.g. a small update or a
+        short last chunk) means "all rows".
+        """
+        max_samples = self.model.max_samples
+        return None if isinstance(max_samples, int) and max_samples > n_rows else max_samples
+    
+    def _evaluate(self, X_test_scaled, y_test, save=True):
+        """Score on the held-out rows, then save the model"""
         y_pred = self.model.predict(X_test_scaled)
         
         # Evaluate model
         mse = mean_squared_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
+        self.last_training_stats.update({'mse': mse, 'r2': r2})
         
-        print(f"Model trained successfully!")
+        print("Model trained successfully!")
         print(f"Mean Squared Error: {mse:.4f}")
         print(f"R² Score: {r2:.4f}")
         
         self.is_trained = True
+        self._compile_engine()
         
         # Save model and scaler
-        self.save_model()
+        if save:
+            self.save_model()
         
         return mse, r2
     
+    def clone(self):
+        """Copy sharing the fitted trees and scaler, safe to grow with update_model
+        
+        Trees are never modified after fitting, so only the forest's list of
+        estimators is copied; the live predictor is left untouched.
+        """
+        predictor = copy.copy(self)
+        predictor.model = copy.copy(self.model)
+        if hasattr(self.model, 'estimators_'):
+            predictor.model.estimators_ = list(self.model.estimators_)
+        return predictor
+    
     def predict_energy(self, temperature, humidity, wind_speed, cloud_cover, solar_radiation):
         """Predict solar energy output based on weather conditions"""
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
         
+        if self.engine == 'lockstep':
+            row = np.array([temperature, humidity, wind_speed, cloud_cover, solar_radiation], dtype=np.float64)
+            return max(0, float(self.flat_model.predict_row(row)))
+        
         # Create feature array
         features = np.array([[temperature, humidity, wind_speed, cloud_cover, solar_radiation]])
         
@@ -112,25 +476,115 @@ class SolarEnergyPredictor:
         
         return max(0, prediction)  # Ensure non-negative
     
-    def save_model(self):
-        """Save the trained model and scaler"""
+    def predict_batch(self, features):
+        """Predict solar energy output for an N x 5 block of weather rows in one call
+
+        Accepts a NumPy array (columns in FEATURE_COLUMNS order), a list of rows
+        or a DataFrame containing the FEATURE_COLUMNS. Returns a float array of N
+        non-negative predictions.
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        
+        if isinstance(features, pd.DataFrame):
+            features = features[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+        else:
+            features = np.asarray(features, dtype=np.float64)
+        
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        if features.ndim != 2 or features.shape[1] != len(FEATURE_COLUMNS):
+            raise ValueError(f"Expected an N x {len(FEATURE_COLUMNS)} feature array, got shape {features.shape}")
+        if features.shape[0] == 0:
+            return np.empty(0)
+        
+        if self.flat_only:
+            return np.maximum(self.flat_model.predict(features), 0)
+        
+        # Scale and predict the whole block at once
+        features_scaled = self.scaler.transform(features)
+        predictions = self.model.predict(features_scaled)
+        
+        return np.maximum(predictions, 0)  # Ensure non-negative
+
+    def forecast_series(self, weather, start=None):
+        """Predict an hourly weather series and total the energy per day
+
+        ``weather`` is a DataFrame or list of dicts with the FEATURE_COLUMNS,
+        one row per hour, timed by a ``timestamp`` column, by an ``hour`` of
+        day column (rolling over to the next day of ``start`` whenever it
+        wraps, as in the frontend's hourly arrays) or else as consecutive
+        hours from ``start`` (default: the current hour). Times are site-local.
+        The whole horizon is predicted in one predict_batch call; hours
+        without solar radiation (night) produce nothing, whatever the model
+        extrapolates for them.
+
+        Returns ``(hourly, daily)`` DataFrames: ``timestamp``, ``hour`` and
+        ``energy_kwh`` per row, and ``date``, ``energy_kwh`` and the number of
+        forecast ``hours`` per day (fewer than 24 on partial days).
+        """
+        weather = pd.DataFrame(weather)
+        if weather.empty:
+            raise ValueError("Weather series is empty")
+        missing = [name for name in FEATURE_COLUMNS if name not in weather]
+        if missing:
+            raise ValueError(f"Weather series is missing {', '.join(missing)}")
+
+        start = pd.Timestamp(start) if start is not None else pd.Timestamp.now().floor('h')
+        if 'timestamp' in weather:
+            timestamps = pd.to_datetime(weather['timestamp']).to_numpy()
+        elif 'hour' in weather:
+            hours = weather['hour'].to_numpy(dtype=np.int64)
+            days = np.concatenate([[0], np.cumsum(np.diff(hours) <= 0)])
+            timestamps = (np.datetime64(start.normalize().to_datetime64(), 'h')
+                          + (days * 24 + hours).astype('timedelta64[h]'))
+        else:
+            timestamps = np.datetime64(start.to_datetime64(), 'h') + np.arange(len(weather)).astype('timedelta64[h]')
+
+        energy = self.predict_batch(weather[FEATURE_COLUMNS])
+        energy[weather['solar_radiation'].to_numpy(dtype=np.float64) <= 0] = 0.0
+
+        hourly = pd.DataFrame({'timestamp': pd.to_datetime(timestamps), 'energy_kwh': energy})
+        hourly.insert(1, 'hour', hourly['timestamp'].dt.hour)
+        daily = (hourly.groupby(hourly['timestamp'].dt.date)['energy_kwh']
+                 .agg(energy_kwh='sum', hours='count')
+                 .rename_axis('date').reset_index())
+        return hourly, daily
+
+    def save_model(self, model_dir=MODELS_DIR):
+        """Save the trained model and scaler, pickled and as a flat export"""
         if not self.is_trained:
             raise ValueError("Model must be trained before saving")
+        if self.flat_only:
+            raise ValueError("A model loaded from the flat export cannot be saved again")
         
         # Create models directory if it doesn't exist
-        os.makedirs('../models', exist_ok=True)
+        os.makedirs(model_dir, exist_ok=True)
         
         # Save model and scaler
-        joblib.dump(self.model, '../models/solar_model.pkl')
-        joblib.dump(self.scaler, '../models/solar_scaler.pkl')
-        print("Model and scaler saved to ../models/")
+        joblib.dump(self.model, os.path.join(model_dir, 'solar_model.pkl'))
+        joblib.dump(self.scaler, os.path.join(model_dir, 'solar_scaler.pkl'))
+        flat_model = self.flat_model or FlatForest.from_sklearn(self.model, self.scaler)
+        flat_model.save(os.path.join(model_dir, FLAT_MODEL_DIR))
+        print(f"Model and scaler saved to {model_dir}")
     
-    def load_model(self):
-        """Load the trained model and scaler"""
+    def load_model(self, model_dir=MODELS_DIR, model_format=None):
+        """Load the trained model and scaler in ``model_format`` (default: the predictor's)"""
+        if (model_format or self.model_format) == 'flat':
+            try:
+                self.flat_model = FlatForest.load(os.path.join(model_dir, FLAT_MODEL_DIR))
+                self.model = RandomForestRegressor(**self.model.get_params())  # drop any previous forest
+                self.engine = 'lockstep'
+                self.is_trained = True
+                print("Flat model mapped successfully!")
+                return True
+            except FileNotFoundError:
+                print("No flat model export found; loading the joblib model instead.")
         try:
-            self.model = joblib.load('../models/solar_model.pkl')
-            self.scaler = joblib.load('../models/solar_scaler.pkl')
+            self.model = joblib.load(os.path.join(model_dir, 'solar_model.pkl'))
+            self.scaler = joblib.load(os.path.join(model_dir, 'solar_scaler.pkl'))
             self.is_trained = True
+            self._compile_engine()
             print("Model and scaler loaded successfully!")
             return True
         except FileNotFoundError:
@@ -139,10 +593,21 @@ class SolarEnergyPredictor:
 
 def main():
     """Main function to train the model"""
+    parser = argparse.ArgumentParser(description="Train the solar energy prediction model")
+    parser.add_argument('--data', help='stream-train from this CSV/Parquet file or history store instead of sample data')
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--site', help=f'save as this site\'s model, under {SITE_MODELS_DIR}')
+    args = parser.parse_args()
+    
     predictor = SolarEnergyPredictor()
     
     # Train the model
-    mse, r2 = predictor.train_model()
+    if args.data:
+        mse, r2 = predictor.train_streaming(args.data, chunksize=args.chunksize, save=not args.site)
+    else:
+        mse, r2 = predictor.train_model(save=not args.site)
+    if args.site:
+        predictor.save_model(site_model_dir(args.site))
     
     # Test prediction
     test_weather = {
@@ -154,7 +619,7 @@ def main():
     }
     
     prediction = predictor.predict_energy(**test_weather)
-    print(f"\nTest prediction for weather conditions:")
+    print("\nTest prediction for weather conditions:")
     for key, value in test_weather.items():
         print(f"  {key}: {value}")
     print(f"Predicted energy output: {prediction:.2f} kWh")
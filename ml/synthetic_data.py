@@ -0,0 +1,282 @@
+"""
+Synthetic multi-site weather and solar energy history for load and scale testing
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.history_store import HistoryStore
+from ml.solar_predictor import DATA_DIR, SAMPLE_START, TARGET_COLUMN
+
+OUTPUT_FORMATS = ('store', 'csv')
+SYNTHETIC_DIR = os.path.join(DATA_DIR, 'synthetic')
+SECONDS_PER_DAY = 86400
+
+
+def site_name(index):
+    return f'site-{index:05d}'
+
+
+def site_profile(seed, index):
+    """Fixed characteristics of one site, drawn from its own seed"""
+    rng = np.random.default_rng([seed, index])
+    latitude = rng.uniform(-45, 60)
+    return {
+        'latitude': latitude,
+        'longitude': rng.uniform(-180, 180),
+        'capacity': rng.uniform(0.5, 3.0),                                 # relative to the sample data's panels
+        'mean_temperature': 25 - 0.4 * abs(latitude) + rng.normal(0, 2),   # °C
+        'cloudiness': rng.uniform(10, 70),                                 # mean cloud cover, %
+        'mean_wind_speed': rng.uniform(2, 7)                               # m/s
+    }
+
+
+NOISE_COLUMNS = ('daily_cloud', 'cloud_cover', 'temperature', 'humidity', 'wind_speed', 'energy_output')
+
+
+def draw_noise(rng, timestamps, out):
+    """Fill ``out`` (float32 arrays, one per NOISE_COLUMNS) with the random draws for ``timestamps``
+
+    Weibull-distributed wind multipliers, one standard normal per day for
+    day-to-day cloudiness and one per row for everything else.
+    """
+    day_index = (timestamps - timestamps[0]) // SECONDS_PER_DAY
+    out['daily_cloud'][:] = rng.standard_normal(day_index[-1] + 1, dtype=np.float32)[day_index]
+    for name in ('cloud_cover', 'temperature', 'humidity', 'energy_output'):
+        rng.standard_normal(dtype=np.float32, out=out[name])
+    out['wind_speed'][:] = rng.weibull(2, len(timestamps))
+
+
+def generate_rows(profile, timestamps, noise):
+    """Weather and energy columns for one site at the given epoch-second timestamps
+
+    Radiation follows the sun (Haurwitz clear-sky model from the solar
+    elevation at the site's latitude, longitude, hour and day of year)
+    dimmed by cloud cover (Kasten-Czeplak); temperature has a seasonal and
+    a diurnal cycle. Energy uses the same formula as
+    ``SolarEnergyPredictor.generate_sample_data``, scaled by the site's
+    capacity, and is zero at night. ``noise`` holds the draws made by
+    ``draw_noise``. Returns a dict of float32 arrays plus int64 ``timestamp``.
+    """
+    day_of_year = (timestamps / SECONDS_PER_DAY % 365.25).astype(np.float32)
+    solar_hour = ((timestamps % SECONDS_PER_DAY) / 3600 + profile['longitude'] / 15).astype(np.float32) % 24
+
+    latitude = np.radians(profile['latitude'])
+    declination = np.radians(23.44) * np.sin(2 * np.pi * (284 + day_of_year) / 365)
+    hour_angle = np.radians(15 * (solar_hour - 12))
+    cos_zenith = (np.sin(latitude) * np.sin(declination)
+                  + np.cos(latitude) * np.cos(declination) * np.cos(hour_angle))
+    daylight = cos_zenith > 0.01
+    clear_sky = np.zeros(len(timestamps), dtype=np.float32)
+    clear_sky[daylight] = 1098 * cos_zenith[daylight] * np.exp(-0.057 / cos_zenith[daylight])
+
+    # Cloud cover varies day to day and within the day
+    cloud_cover = np.clip(profile['cloudiness'] + 25 * noise['daily_cloud'] + 10 * noise['cloud_cover'], 0, 100)
+    solar_radiation = clear_sky * (1 - 0.75 * (cloud_cover / 100) ** 3.4)
+
+    hemisphere = 1 if profile['latitude'] >= 0 else -1
+    temperature = (profile['mean_temperature']
+                   - hemisphere * 10 * np.cos(2 * np.pi * (day_of_year - 15) / 365)
+                   + 5 * np.cos(2 * np.pi * (solar_hour - 15) / 24)
+                   + 2 * noise['temperature'])
+    humidity = np.clip(70 - 1.5 * (temperature - profile['mean_temperature']) + 0.2 * (cloud_cover - 50)
+                       + 8 * noise['humidity'], 5, 100)
+    wind_speed = profile['mean_wind_speed'] * noise['wind_speed']
+
+    energy_output = (10.0 * profile['capacity']
+                     * (1 + 0.02 * (temperature - 20)) * (1 - 0.005 * humidity)
+                     * (1 - 0.01 * wind_speed) * (1 - 0.008 * cloud_cover) * (solar_radiation / 500)
+                     * (1 + 0.1 * noise['energy_output']))
+
+    return {
+        'timestamp': timestamps,
+        'temperature': temperature.astype(np.float32),
+        'humidity': humidity.astype(np.float32),
+        'wind_speed': wind_speed.astype(np.float32),
+        'cloud_cover': cloud_cover.astype(np.float32),
+        'solar_radiation': solar_radiation.astype(np.float32),
+        TARGET_COLUMN: np.maximum(energy_output, 0).astype(np.float32)
+    }
+
+
+class SyntheticDataGenerator:
+    """Multi-site hourly (or finer) history at any scale, generated in parallel
+
+    Every site has ``rows_per_site`` readings ``interval_seconds`` apart
+    from ``start``. Each site-month draws its random numbers from its own
+    ``numpy.random.Generator`` seeded by (seed, site, month), so the
+    output is identical whatever the number of processes or the chunk size,
+    and no global random state is touched. Memory use is about
+    ``chunk_rows`` rows per process.
+    """
+
+    def __init__(self, n_sites=1, start=SAMPLE_START, interval_seconds=3600, seed=42):
+        if n_sites <= 0 or interval_seconds <= 0:
+            raise ValueError("n_sites and interval_seconds must be greater than 0")
+        self.n_sites = n_sites
+        self.start = int(pd.Timestamp(start).value // 10 ** 9)
+        self.interval_seconds = int(interval_seconds)
+        self.seed = seed
+
+    @property
+    def sites(self):
+        return [site_name(index) for index in range(self.n_sites)]
+
+    def months(self, rows_per_site):
+        """``(month, first_row, stop_row)`` spans of a site's rows, one per calendar month"""
+        end = self.start + rows_per_site * self.interval_seconds
+        first = np.datetime64(self.start, 's').astype('datetime64[M]')
+        last = np.datetime64(end - 1, 's').astype('datetime64[M]')
+        boundaries = np.arange(first, last + 2).astype('datetime64[s]').astype(np.int64)
+        rows = np.clip(-(-(boundaries - self.start) // self.interval_seconds), 0, rows_per_site)
+        return [(int(month), int(rows[i]), int(rows[i + 1]))
+                for i, month in enumerate(np.arange(first, last + 1).astype(np.int64)) if rows[i] < rows[i + 1]]
+
+    def tasks(self, rows_per_site, chunk_rows):
+        """Units of work: ``(site_index, [month spans])`` of about ``chunk_rows`` rows"""
+        tasks = []
+        months = self.months(rows_per_site)
+        for site_index in range(self.n_sites):
+            spans, rows = [], 0
+            for span in months:
+                spans.append(span)
+                rows += span[2] - span[1]
+                if rows >= chunk_rows:
+                    tasks.append((site_index, spans))
+                    spans, rows = [], 0
+            if spans:
+                tasks.append((site_index, spans))
+        return tasks
+
+    def task_columns(self, site_index, spans):
+        """Columns of one site over consecutive month spans
+
+        Random draws come from each month's own generator; the physics runs
+        once over the whole task, since a month of hourly rows is too short
+        to amortize NumPy's per-call overhead.
+        """
+        first_row, stop_row = spans[0][1], spans[-1][2]
+        timestamps = self.start + np.arange(first_row, stop_row, dtype=np.int64) * self.interval_seconds
+        noise = {name: np.empty(len(timestamps), dtype=np.float32) for name in NOISE_COLUMNS}
+        for month, month_first, month_stop in spans:
+            rows = slice(month_first - first_row, month_stop - first_row)
+            draw_noise(np.random.default_rng([self.seed, site_index, month]), timestamps[rows],
+                       {name: values[rows] for name, values in noise.items()})
+        return generate_rows(site_profile(self.seed, site_index), timestamps, noise)
+
+    def iter_chunks(self, rows_per_site, chunk_rows=1000000):
+        """Yield ``(site, DataFrame)`` chunks in site and time order, in this process"""
+        for site_index, spans in self.tasks(rows_per_site, chunk_rows):
+            columns = self.task_columns(site_index, spans)
+            columns['timestamp'] = columns['timestamp'].astype('datetime64[s]')
+            yield site_name(site_index), pd.DataFrame(columns)
+
+    def write(self, path, rows_per_site, output_format='store', processes=None, chunk_rows=1000000):
+        """Generate every site's rows into ``path`` and return throughput stats
+
+        ``output_format='store'`` writes a HistoryStore directory, each
+        worker writing whole site-months so they never share a partition;
+        ``'csv'`` writes one CSV file (with a ``site`` column), each worker
+        formatting its own part file that is then concatenated in order. An
+        existing output is replaced. ``processes`` defaults to every core.
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}")
+        processes = processes or os.cpu_count() or 1
+        tasks = self.tasks(rows_per_site, chunk_rows)
+        start = time.perf_counter()
+
+        if output_format == 'store':
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            jobs = [(self, path, output_format, task) for task in tasks]
+            self._run(jobs, processes)
+        else:
+            parts_dir = tempfile.mkdtemp(prefix='synthetic-', dir=os.path.dirname(os.path.abspath(path)))
+            try:
+                jobs = [(self, os.path.join(parts_dir, f'part-{i:06d}.csv'), output_format, task)
+                        for i, task in enumerate(tasks)]
+                self._run(jobs, processes)
+                with open(path, 'wb') as out:
+                    for i, (_, part_path, _, _) in enumerate(jobs):
+                        with open(part_path, 'rb') as part:
+                            if i:
+                                part.readline()  # header
+                            shutil.copyfileobj(part, out, 1 << 20)
+            finally:
+                shutil.rmtree(parts_dir)
+
+        seconds = time.perf_counter() - start
+        rows = rows_per_site * self.n_sites
+        return {
+            'rows': rows,
+            'sites': self.n_sites,
+            'format': output_format,
+            'processes': processes,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else 0.0,
+            'bytes': directory_size(path) if os.path.isdir(path) else os.path.getsize(path)
+        }
+
+    def _run(self, jobs, processes):
+        if processes == 1 or len(jobs) == 1:
+            for job in jobs:
+                write_task(job)
+            return
+        with multiprocessing.Pool(processes) as pool:
+            for _ in pool.imap_unordered(write_task, jobs):
+                pass
+
+
+def write_task(job):
+    """Generate one task and write it (runs in a worker process)"""
+    generator, path, output_format, (site_index, spans) = job
+    columns = generator.task_columns(site_index, spans)
+    if output_format == 'store':
+        HistoryStore(path).write(columns, site=site_name(site_index))
+    else:
+        frame = pd.DataFrame(columns)
+        frame['timestamp'] = frame['timestamp'].astype('datetime64[s]')
+        frame.insert(0, 'site', site_name(site_index))
+        frame.to_csv(path, index=False, float_format='%.4g')
+    return len(columns['timestamp'])
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def main():
+    """Generate a synthetic history to disk"""
+    parser = argparse.ArgumentParser(description="Generate synthetic multi-site solar history")
+    parser.add_argument('--rows', type=int, default=1000000, help='total rows, split evenly across sites')
+    parser.add_argument('--sites', type=int, default=10)
+    parser.add_argument('--interval', type=int, default=3600, help='seconds between readings')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='store')
+    parser.add_argument('--out', help=f'output path (default: {SYNTHETIC_DIR}[.csv])')
+    parser.add_argument('--processes', type=int, help='worker processes (default: all cores)')
+    parser.add_argument('--chunk-rows', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    out = args.out or (SYNTHETIC_DIR if args.format == 'store' else SYNTHETIC_DIR + '.csv')
+    generator = SyntheticDataGenerator(args.sites, interval_seconds=args.interval, seed=args.seed)
+    stats = generator.write(out, -(-args.rows // args.sites), args.format, args.processes, args.chunk_rows)
+    print(f"Wrote {stats['rows']} rows for {stats['sites']} sites to {out} in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s, {stats['bytes'] / 2 ** 20:.0f} MB, "
+          f"{stats['processes']} processes)")
+
+
+if __name__ == "__main__":
+    main()
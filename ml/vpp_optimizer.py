@@ -0,0 +1,191 @@
+"""
+Battery charge/discharge schedules for a virtual power plant's prosumers
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Same defaults as the frontend's DEFAULT_VPP_CONFIG (src/services/vppService.ts)
+DEFAULT_BUY_PRICE = 0.35   # $/kWh from retailer
+DEFAULT_SELL_PRICE = 0.22  # $/kWh to retailer
+DEFAULT_CAPACITY = 5.0     # kWh
+DEFAULT_EFFICIENCY = 0.9   # round trip
+
+
+class VPPOptimizer:
+    """Cost-minimizing battery schedules for many prosumers at once
+
+    Each prosumer has hourly generation and load and a battery of
+    ``capacity`` kWh that charges or discharges at most ``max_power`` kW
+    (default: half the capacity per hour), losing ``efficiency`` over a
+    round trip (split evenly between charging and discharging). The grid
+    takes any remainder: imports are paid at the buy price, exports earn
+    the sell price, and both may vary by hour.
+
+    ``optimize`` solves every prosumer's schedule exactly by backward
+    dynamic programming over ``levels`` evenly spaced states of charge,
+    ending the horizon with at least ``terminal_soc`` of the capacity
+    stored (default: ``initial_soc``), so a schedule can't look cheaper by
+    emptying a battery that started charged.
+    The stage cost of a move depends only on the hour and the change in
+    charge, so each hour is one shifted min-plus update of the
+    (prosumers x levels) cost-to-go table per allowed move, vectorized
+    across prosumers in chunks of ``chunk_size``. ``greedy`` is the
+    hour-by-hour rule of vppService.calculateBatterySchedule under the
+    same battery model, for comparison. Battery parameters can be scalars
+    or one value per prosumer.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, max_power=None, efficiency=DEFAULT_EFFICIENCY,
+                 initial_soc=0.5, terminal_soc=None, levels=21, chunk_size=8192):
+        if not 0 < efficiency <= 1:
+            raise ValueError("Efficiency must be in (0, 1]")
+        if levels < 2:
+            raise ValueError("At least 2 charge levels are needed")
+        self.capacity = capacity
+        self.max_power = max_power
+        self.efficiency = efficiency
+        self.initial_soc = initial_soc  # fraction of capacity
+        self.terminal_soc = terminal_soc  # fraction of capacity, at least, after the last hour
+        self.levels = levels
+        self.chunk_size = chunk_size
+
+    def optimize(self, generation, load, buy_price=DEFAULT_BUY_PRICE, sell_price=DEFAULT_SELL_PRICE):
+        """Optimal schedules for ``(prosumers, hours)`` generation and load in kWh
+
+        Prices are scalars, one per hour or one per prosumer and hour.
+        Returns a dict of ``battery`` (kWh drawn to charge, negative when
+        discharging), ``soc`` (kWh stored at the end of each hour) and
+        ``grid`` (kWh imported, negative when exported), all
+        ``(prosumers, hours)``, plus per-prosumer ``cost`` and
+        ``baseline_cost`` (without a battery) in price units.
+        """
+        net_load, buy, sell, capacity, power, initial, terminal = self._prepare(generation, load,
+                                                                               buy_price, sell_price)
+        battery = np.empty(net_load.shape, dtype=np.float32)
+        soc = np.empty(net_load.shape, dtype=np.float32)
+        for start in range(0, len(net_load), self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            battery[chunk], soc[chunk] = self._solve_chunk(net_load[chunk], buy[chunk], sell[chunk], capacity[chunk],
+                                                           power[chunk], initial[chunk], terminal[chunk])
+        return settle(net_load, battery, soc, buy, sell)
+
+    def greedy(self, generation, load, buy_price=DEFAULT_BUY_PRICE, sell_price=DEFAULT_SELL_PRICE):
+        """Schedules that store every surplus and cover every deficit as it happens, as ``optimize`` returns them
+
+        ``terminal_soc`` is kept as a reserve the rule never discharges
+        below, so it ends the horizon at or above it unless it started
+        below.
+        """
+        net_load, buy, sell, capacity, power, initial, terminal = self._prepare(generation, load,
+                                                                               buy_price, sell_price)
+        eta = np.sqrt(self.efficiency)
+        stored = initial * capacity
+        reserve = terminal * capacity
+        battery = np.empty(net_load.shape, dtype=np.float32)
+        soc = np.empty(net_load.shape, dtype=np.float32)
+        for hour in range(net_load.shape[1]):
+            surplus = -net_load[:, hour]
+            charge = np.clip(np.minimum(surplus, (capacity - stored) / eta), 0, power)
+            discharge = np.clip(np.minimum(-surplus, (stored - reserve) * eta), 0, power)
+            stored = stored + charge * eta - discharge / eta
+            battery[:, hour] = charge - discharge
+            soc[:, hour] = stored
+        return settle(net_load, battery, soc, buy, sell)
+
+    def _prepare(self, generation, load, buy_price, sell_price):
+        generation = np.atleast_2d(np.asarray(generation, dtype=np.float64))
+        load = np.atleast_2d(np.asarray(load, dtype=np.float64))
+        if generation.shape != load.shape or generation.ndim != 2:
+            raise ValueError("generation and load must both be (prosumers, hours)")
+        shape = generation.shape
+        buy = np.broadcast_to(np.asarray(buy_price, dtype=np.float64), shape)
+        sell = np.broadcast_to(np.asarray(sell_price, dtype=np.float64), shape)
+
+        capacity = np.broadcast_to(np.asarray(self.capacity, dtype=np.float64), shape[:1])
+        power = capacity / 2 if self.max_power is None else self.max_power
+        power = np.broadcast_to(np.asarray(power, dtype=np.float64), shape[:1])
+        initial = np.broadcast_to(np.asarray(self.initial_soc, dtype=np.float64), shape[:1])
+        terminal = initial if self.terminal_soc is None else \
+            np.broadcast_to(np.asarray(self.terminal_soc, dtype=np.float64), shape[:1])
+        if (capacity < 0).any() or (power < 0).any():
+            raise ValueError("Capacity and power must not be negative")
+        if ((initial < 0) | (initial > 1)).any():
+            raise ValueError("Initial state of charge must be a fraction of capacity")
+        if ((terminal < 0) | (terminal > 1)).any():
+            raise ValueError("Terminal state of charge must be a fraction of capacity")
+        return load - generation, buy, sell, capacity, power, initial, terminal
+
+    def _solve_chunk(self, net_load, buy, sell, capacity, power, initial, terminal):
+        """``(battery, soc)`` of one chunk of prosumers by backward DP over charge levels"""
+        n, hours = net_load.shape
+        top = self.levels - 1
+        eta = np.sqrt(self.efficiency)
+        step = capacity / top  # kWh between adjacent levels
+        with np.errstate(divide='ignore', invalid='ignore'):
+            max_up = np.where(step > 0, np.floor(power * eta / step + 1e-9), 0).astype(np.int64)
+            max_down = np.where(step > 0, np.floor(power / (eta * step) + 1e-9), 0).astype(np.int64)
+        max_up, max_down = np.minimum(max_up, top), np.minimum(max_down, top)
+
+        # Moves in levels, idle first so ties keep the battery idle
+        offsets = [0]
+        for m in range(1, max(max_up.max(), max_down.max()) + 1):
+            offsets += [m, -m]
+        offsets = np.array(offsets)
+        # kWh drawn from (positive) or delivered to (negative) the prosumer's bus per move
+        drawn = np.where(offsets > 0, offsets / eta, offsets * eta)[None, :] * step[:, None]
+        allowed = (offsets[None, :] <= max_up[:, None]) & (-offsets[None, :] <= max_down[:, None])
+        policy = np.empty((hours, n, self.levels), dtype=np.uint8 if len(offsets) <= 256 else np.uint16)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            level = np.where(capacity > 0, np.rint(initial * top), 0).astype(np.int64)
+            final = np.where(capacity > 0, np.rint(terminal * top), 0).astype(np.int64)
+        # Ending below the terminal level is infeasible
+        cost_to_go = np.where(np.arange(self.levels)[None, :] >= final[:, None], 0, np.inf).astype(np.float32)
+        best = np.empty_like(cost_to_go)
+        choice = np.empty((n, self.levels), dtype=policy.dtype)
+        for hour in range(hours - 1, -1, -1):
+            grid = net_load[:, hour, None] + drawn
+            stage = np.where(grid > 0, buy[:, hour, None] * grid, sell[:, hour, None] * grid).astype(np.float32)
+            stage[~allowed] = np.inf
+            best.fill(np.inf)
+            choice.fill(0)
+            for i, m in enumerate(offsets):
+                lo, hi = max(0, -m), min(self.levels, self.levels - m)
+                candidate = cost_to_go[:, lo + m:hi + m] + stage[:, i, None]
+                better = candidate < best[:, lo:hi]
+                np.copyto(best[:, lo:hi], candidate, where=better)
+                np.copyto(choice[:, lo:hi], i, where=better)
+            policy[hour] = choice
+            cost_to_go, best = best, cost_to_go
+
+        rows = np.arange(n)
+        if np.isinf(cost_to_go[rows, level]).any():
+            raise ValueError("Terminal state of charge can't be reached within the battery's power limit")
+        battery = np.empty((n, hours), dtype=np.float32)
+        soc = np.empty((n, hours), dtype=np.float32)
+        for hour in range(hours):
+            move = policy[hour, rows, level]
+            battery[:, hour] = drawn[rows, move]
+            level = level + offsets[move]
+            soc[:, hour] = level * step
+        return battery, soc
+
+
+def settle(net_load, battery, soc, buy, sell):
+    """Grid flows and costs of battery schedules (see ``VPPOptimizer.optimize``)"""
+    grid = net_load + battery
+    cost = np.where(grid > 0, buy * grid, sell * grid).sum(axis=1)
+    baseline = np.where(net_load > 0, buy * net_load, sell * net_load).sum(axis=1)
+    return {
+        'battery': battery,
+        'soc': soc,
+        'grid': grid.astype(np.float32),
+        'cost': cost,
+        'baseline_cost': baseline
+    }
@@ -0,0 +1,91 @@
+import unittest
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_abi import encode
+from web3 import Web3
+
+from app.web3_helper import Web3Helper
+
+CONTRACT_ADDRESS = "0x" + "11" * 20
+USER = "0x" + "22" * 20
+MISSING_ORDER_ID = 13
+
+class StubNode(BaseHTTPRequestHandler):
+    """JSON-RPC node answering getOrder calls; records the size of every request"""
+    batch_sizes = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        calls = body if isinstance(body, list) else [body]
+        StubNode.batch_sizes.append(len(calls) if isinstance(body, list) else None)
+        responses = [self.answer(call) for call in calls]
+        payload = json.dumps(responses if isinstance(body, list) else responses[0]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def answer(self, call):
+        if call['method'] != 'eth_call':
+            result = {'web3_clientVersion': 'stub', 'eth_chainId': '0x539', 'eth_blockNumber': '0x10'}
+            return {'jsonrpc': '2.0', 'id': call['id'], 'result': result.get(call['method'])}
+        order_id = int(call['params'][0]['data'][10:], 16)
+        if order_id == MISSING_ORDER_ID:
+            return {'jsonrpc': '2.0', 'id': call['id'], 'error': {'code': -32000, 'message': 'execution reverted'}}
+        data = encode(['address', 'uint256', 'uint256', 'bool', 'uint256', 'bool'],
+                      [USER, order_id * 10, 100 + order_id, True, 1700000000, order_id % 2 == 0])
+        return {'jsonrpc': '2.0', 'id': call['id'], 'result': '0x' + data.hex()}
+
+    def log_message(self, *args):
+        pass
+
+class TestBatchReads(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Start a stub JSON-RPC node on a free local port"""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubNode)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.helper = Web3Helper(rpc_url=f"http://127.0.0.1:{cls.server.server_port}")
+        cls.helper.load_contract(CONTRACT_ADDRESS)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        StubNode.batch_sizes.clear()
+
+    def test_orders_are_read_in_chunked_batches(self):
+        """Test ids are split into batches of chunk_size calls"""
+        orders = self.helper.get_orders(range(1, 26), chunk_size=10, max_concurrency=2)
+        self.assertEqual(sorted(StubNode.batch_sizes, key=str), [10, 10, 5, None])  # None: eth_blockNumber
+        self.assertEqual(len(orders), 25)
+        self.assertEqual(orders[7]['energyAmount'], 70)
+        self.assertEqual(orders[7]['price'], 107)
+        self.assertEqual(orders[7]['user'], Web3.to_checksum_address(USER))
+        self.assertFalse(orders[7]['isActive'])
+        self.assertEqual(orders[8], self.helper.get_order(8))
+
+    def test_failed_calls_map_to_none(self):
+        """Test one reverted call doesn't fail the rest of the batch"""
+        orders = self.helper.get_orders([12, MISSING_ORDER_ID, 14], block_identifier=5)
+        self.assertIsNone(orders[MISSING_ORDER_ID])
+        self.assertEqual(orders[14]['energyAmount'], 140)
+        self.assertEqual(StubNode.batch_sizes, [3])
+
+    def test_duplicate_and_empty_ids(self):
+        """Test duplicate ids are fetched once and no ids means no requests"""
+        self.assertEqual(list(self.helper.get_orders([3, 3, 4])), [3, 4])
+        self.assertEqual(self.helper.get_orders([]), {})
+        self.assertEqual(StubNode.batch_sizes, [None, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.call_auction import MAX_ENERGY_AMOUNT, MAX_PRICE, CallAuction, _net_fills, clear_orders, \
+    settlement_parts
+
+ALICE = "0x00000000000000000000000000000000000000a1"
+BOB = "0x00000000000000000000000000000000000000b0"
+CAROL = "0x00000000000000000000000000000000000000c0"
+
+class TestClearOrders(unittest.TestCase):
+    def test_price_at_curve_intersection(self):
+        """Test the price maximizes traded volume and the short side fills completely"""
+        # asks: 10 @ 90, 10 @ 100; bids: 15 @ 100, 5 @ 95
+        price, volume, fills = clear_orders([10, 10, 15, 5], [90, 100, 100, 95], [False, False, True, True])
+        self.assertEqual(price, 100)
+        self.assertEqual(volume, 15)
+        # The cheaper ask fills first, the marginal ask gets the rest, the 95 bid is priced out
+        self.assertEqual(fills.tolist(), [10, 5, 15, 0])
+
+    def test_pro_rata_at_the_margin(self):
+        """Test orders at the marginal price share the remaining volume by size"""
+        price, volume, fills = clear_orders([30, 10, 20, 5], [100, 100, 100, 120], [True, True, False, True])
+        self.assertEqual((price, volume), (100, 20))
+        # 5 @ 120 fills first; 30 and 10 @ 100 share the other 15 in a 3:1 ratio, rounded
+        self.assertEqual(fills.tolist(), [11, 4, 20, 5])
+        self.assertEqual(fills[[0, 1, 3]].sum(), fills[2])
+
+    def test_leftover_units_go_to_earliest_orders_on_ties(self):
+        """Test rounding leftovers are assigned deterministically"""
+        _, volume, fills = clear_orders([1, 1, 1, 2], [100, 100, 100, 100], [True, True, True, False])
+        self.assertEqual(volume, 2)
+        self.assertEqual(fills.tolist(), [1, 1, 0, 2])
+
+    def test_no_cross(self):
+        """Test nothing trades when the best bid is below the best ask"""
+        price, volume, fills = clear_orders([5, 5], [100, 110], [True, False])
+        self.assertIsNone(price)
+        self.assertEqual(volume, 0)
+        self.assertEqual(fills.tolist(), [0, 0])
+
+    def test_pro_rata_without_overflow(self):
+        """Test marginal shares of amounts whose products exceed int64 are still exact"""
+        amounts = [MAX_ENERGY_AMOUNT] * 3 + [2 * MAX_ENERGY_AMOUNT - 1] * 2
+        _, volume, fills = clear_orders(amounts, [MAX_PRICE] * 5, [True, True, True, False, False])
+        # Both asks are rationed to half of the 3 * MAX_ENERGY_AMOUNT bought, the odd unit to the first
+        self.assertEqual(volume, 3 * MAX_ENERGY_AMOUNT)
+        self.assertEqual(fills[3:].tolist(), [(volume + 1) // 2, volume // 2])
+
+    def test_net_fills_are_exact(self):
+        """Test per-address totals are summed in integers, beyond float64 precision"""
+        users = np.array([ALICE, ALICE, BOB], dtype=object)
+        addresses, totals = _net_fills(users, np.array([2 ** 53 + 1, 2, 5]), np.array([True, True, True]))
+        self.assertEqual(dict(zip(addresses, totals)), {ALICE: 2 ** 53 + 3, BOB: 5})
+
+    def test_random_books_balance(self):
+        """Test fills balance, respect limits and never exceed order sizes"""
+        rng = np.random.default_rng(3)
+        for _ in range(20):
+            n = 500
+            amounts = rng.integers(1, 50, n)
+            prices = rng.integers(90, 110, n)
+            is_buy = rng.random(n) < 0.5
+            price, volume, fills = clear_orders(amounts, prices, is_buy)
+            self.assertEqual(fills[is_buy].sum(), volume)
+            self.assertEqual(fills[~is_buy].sum(), volume)
+            self.assertTrue((fills <= amounts).all())
+            self.assertTrue((prices[is_buy & (fills > 0)] >= price).all())
+            self.assertTrue((prices[~is_buy & (fills > 0)] <= price).all())
+
+class TestCallAuction(unittest.TestCase):
+    def setUp(self):
+        """Set up an auction with one-minute intervals that records settlements"""
+        self.settlements = []
+        self.auction = CallAuction(interval_seconds=60, on_settlement=self.settlements.append)
+
+    def test_orders_collect_per_interval(self):
+        """Test orders go to the interval of their timestamp and only ended intervals clear"""
+        first, interval = self.auction.submit_order(ALICE, 10, 100, False, timestamp=600)
+        self.auction.submit_order(BOB, 10, 120, True, timestamp=659)
+        later, next_interval = self.auction.submit_order(CAROL, 5, 130, True, timestamp=660)
+        self.assertEqual((interval, next_interval), (10, 11))
+        self.assertEqual(self.auction.pending(), {10: 2, 11: 1})
+
+        results = self.auction.clear_due(now=700)
+        self.assertEqual([result['intervalId'] for result in results], [10])
+        self.assertEqual(results[0]['clearingPrice'], 120)
+        self.assertEqual(results[0]['energyAmount'], 10)
+        self.assertEqual(self.auction.pending(), {11: 1})
+        self.assertEqual(self.auction.get_order(first)['filledAmount'], 10)
+        self.assertTrue(self.auction.get_order(later)['isActive'])
+
+        with self.assertRaises(ValueError):
+            self.auction.submit_order(BOB, 1, 100, True, timestamp=610)
+
+    def test_settlement_nets_fills_per_address(self):
+        """Test one settlement per interval with each address's total fill"""
+        self.auction.submit_order(ALICE, 10, 100, False, timestamp=0)
+        self.auction.submit_order(ALICE, 10, 100, False, timestamp=1)
+        self.auction.submit_order(BOB, 12, 100, True, timestamp=2)
+        self.auction.submit_order(CAROL, 8, 105, True, timestamp=3)
+        self.auction.clear(0)
+
+        self.assertEqual(len(self.settlements), 1)
+        settlement = self.settlements[0]
+        self.assertEqual(settlement['clearingPrice'], 100)
+        self.assertEqual(settlement['sellers'], [ALICE])
+        self.assertEqual(settlement['soldAmounts'], [20])
+        self.assertEqual(dict(zip(settlement['buyers'], settlement['boughtAmounts'])), {BOB: 12, CAROL: 8})
+        # Clearing again returns the same result without a second settlement
+        self.assertEqual(self.auction.clear(0)['energyAmount'], 20)
+        self.assertEqual(len(self.settlements), 1)
+
+    def test_cancel_order(self):
+        """Test only the owner can cancel, and only before the interval clears"""
+        order_id, _ = self.auction.submit_order(ALICE, 10, 100, False, timestamp=0)
+        self.auction.submit_order(BOB, 10, 120, True, timestamp=0)
+        with self.assertRaises(PermissionError):
+            self.auction.cancel_order(order_id, BOB)
+        self.auction.cancel_order(order_id, ALICE)
+        with self.assertRaises(ValueError):
+            self.auction.cancel_order(order_id, ALICE)
+
+        result = self.auction.clear(0)
+        self.assertIsNone(result['clearingPrice'])
+        self.assertEqual(self.settlements, [])
+        with self.assertRaises(ValueError):
+            self.auction.cancel_order(order_id + 1, BOB)
+
+    def test_rejects_invalid_orders(self):
+        """Test zero and oversized amounts and prices are rejected"""
+        with self.assertRaises(ValueError):
+            self.auction.submit_order(ALICE, 0, 100, True)
+        with self.assertRaises(ValueError):
+            self.auction.submit_order(ALICE, 5, 0, True)
+        # Past the int64 clearing arrays, which would make the interval fail to clear every time
+        with self.assertRaises(ValueError):
+            self.auction.submit_order(ALICE, 5, MAX_PRICE + 1, True)
+        with self.assertRaises(ValueError):
+            self.auction.submit_order(ALICE, MAX_ENERGY_AMOUNT + 1, 100, True)
+        self.assertEqual(self.auction.pending(), {})
+
+    def test_settlement_parts_balance(self):
+        """Test a settlement split into parts keeps each part balanced and every fill"""
+        settlement = {'buyers': [ALICE, BOB], 'boughtAmounts': [10, 15],
+                      'sellers': [BOB, CAROL], 'soldAmounts': [12, 13]}
+        self.assertEqual(settlement_parts(settlement, 4), [(2, [ALICE, BOB, BOB, CAROL], [10, 15, 12, 13])])
+
+        parts = settlement_parts(settlement, 3)
+        self.assertEqual(parts, [(2, [ALICE, BOB, BOB], [10, 2, 12]), (1, [BOB, CAROL], [13, 13])])
+        for buyer_count, users, amounts in parts:
+            self.assertLessEqual(len(users), 3)
+            self.assertEqual(sum(amounts[:buyer_count]), sum(amounts[buyer_count:]))
+        with self.assertRaises(ValueError):
+            settlement_parts(settlement, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,15 @@ import sys
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from app.contract_compiler import solcx
+
+try:
+    import eth_tester
+    from web3 import EthereumTesterProvider
+    HAS_ETH_TESTER = True
+except ImportError:
+    HAS_ETH_TESTER = False
+
 class TestEnergyTradingContract(unittest.TestCase):
     def setUp(self):
         """Set up test environment"""
@@ -35,6 +44,168 @@ class TestEnergyTradingContract(unittest.TestCase):
         self.assertIsInstance(block_number, int)
         self.assertGreaterEqual(block_number, 0)
 
+@unittest.skipUnless(HAS_ETH_TESTER and solcx is not None, "needs eth-tester and py-solc-x")
+class TestOrderBookContract(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Compile the contract once"""
+        from app.contract_compiler import compile_contract, read_source
+        cls.abi, cls.bytecode = compile_contract(read_source())
+
+    def setUp(self):
+        """Deploy a funded contract on an in-process test chain"""
+        self.w3 = Web3(EthereumTesterProvider())
+        self.w3.eth.default_account = self.w3.eth.accounts[0]
+        tx_hash = self.w3.eth.contract(abi=self.abi, bytecode=self.bytecode).constructor().transact()
+        address = self.w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
+        self.contract = self.w3.eth.contract(address=address, abi=self.abi)
+        self.w3.eth.send_transaction({'to': address, 'value': 10 ** 21})
+        self.buyer, self.seller = self.w3.eth.accounts[1:3]
+
+    def transact(self, call, sender):
+        receipt = self.w3.eth.wait_for_transaction_receipt(call.transact({'from': sender}))
+        self.assertEqual(receipt['status'], 1)
+        return receipt
+
+    def place(self, amount, price, is_buy, sender):
+        return self.transact(self.contract.functions.placeOrder(amount, price, is_buy), sender)
+
+    def order(self, order_id):
+        return self.contract.functions.getOrder(order_id).call()
+
+    def test_resting_orders_are_counted(self):
+        """Test non-crossing orders rest and the best prices follow them"""
+        self.place(10, 900, True, self.buyer)
+        self.place(10, 950, True, self.buyer)
+        self.place(10, 1100, False, self.seller)
+        self.assertEqual(self.contract.functions.getActiveOrdersCount().call(), 3)
+        self.assertEqual(self.contract.functions.bestBid().call(), 950)
+        self.assertEqual(self.contract.functions.bestAsk().call(), 1100)
+
+    def test_crossing_order_trades_at_seller_price(self):
+        """Test a buy fills resting asks best price first at the seller's price"""
+        self.place(10, 1000, False, self.seller)
+        self.place(10, 990, False, self.seller)
+        receipt = self.place(15, 1050, True, self.buyer)
+
+        trades = self.contract.events.TradeExecuted().process_receipt(receipt)
+        self.assertEqual([(t['args']['energyAmount'], t['args']['price']) for t in trades], [(10, 990), (5, 1000)])
+        self.assertEqual([(t['args']['buyOrderId'], t['args']['sellOrderId']) for t in trades], [(3, 2), (3, 1)])
+        self.assertEqual(self.order(1)[1], 5)  # partly filled ask keeps its remainder
+        self.assertFalse(self.order(2)[5])
+        self.assertFalse(self.order(3)[5])
+        self.assertEqual(self.contract.functions.getActiveOrdersCount().call(), 1)
+        self.assertEqual(self.contract.functions.bestAsk().call(), 1000)
+
+    def test_same_price_fills_oldest_first(self):
+        """Test orders at one price level fill in arrival order"""
+        self.place(5, 1000, False, self.seller)
+        self.place(5, 1000, False, self.w3.eth.accounts[3])
+        receipt = self.place(5, 1000, True, self.buyer)
+        trades = self.contract.events.TradeExecuted().process_receipt(receipt)
+        self.assertEqual(trades[0]['args']['seller'], self.seller)
+        self.assertTrue(self.order(2)[5])
+
+    def test_cancel_removes_order_from_book(self):
+        """Test a cancelled order no longer matches or counts"""
+        self.place(10, 1000, False, self.seller)
+        self.place(10, 1010, False, self.seller)
+        self.transact(self.contract.functions.cancelOrder(1), self.seller)
+        self.assertEqual(self.contract.functions.getActiveOrdersCount().call(), 1)
+        self.assertEqual(self.contract.functions.bestAsk().call(), 1010)
+        receipt = self.place(10, 1005, True, self.buyer)
+        self.assertEqual(self.contract.events.TradeExecuted().process_receipt(receipt), ())
+
+    def test_match_cap_cancels_crossing_remainder(self):
+        """Test an order stopped by its match cap doesn't rest across the book"""
+        for _ in range(3):
+            self.place(1, 1000, False, self.seller)
+        receipt = self.transact(self.contract.functions.placeOrderWithLimit(3, 1000, True, 2, 0), self.buyer)
+        self.assertEqual(len(self.contract.events.TradeExecuted().process_receipt(receipt)), 2)
+        self.assertEqual(len(self.contract.events.OrderCancelled().process_receipt(receipt)), 1)
+        self.assertEqual(self.contract.functions.getActiveOrdersCount().call(), 1)
+        self.assertEqual(self.contract.functions.bestBid().call(), 0)
+
+    def test_batch_place_and_cancel(self):
+        """Test placeOrders assigns consecutive ids and cancelOrders skips inactive ones"""
+        receipt = self.transact(
+            self.contract.functions.placeOrders([10, 10, 10], [900, 910, 1100], [True, True, False], [0, 0, 0], 1), self.buyer
+        )
+        placed = self.contract.events.OrderPlaced().process_receipt(receipt)
+        self.assertEqual([event['args']['orderId'] for event in placed], [1, 2, 3])
+        self.place(10, 1100, True, self.seller)  # fills order 3
+        receipt = self.transact(self.contract.functions.cancelOrders([1, 3]), self.buyer)
+        self.assertEqual([e['args']['orderId'] for e in self.contract.events.OrderCancelled().process_receipt(receipt)], [1])
+        self.assertEqual(self.contract.functions.getActiveOrdersCount().call(), 1)
+
+    def test_deep_level_uses_hint(self):
+        """Test an order more than 32 levels from the best price rests with the hint Web3Helper finds"""
+        from web3.exceptions import ContractLogicError
+        from app.web3_helper import Web3Helper
+        for level in range(33):
+            self.place(1, 1000 - 10 * level, True, self.buyer)
+        with self.assertRaises(ContractLogicError):
+            self.contract.functions.placeOrderWithLimit(1, 600, True, 8, 0).transact({'from': self.buyer})
+
+        helper = Web3Helper(provider=self.w3.provider)
+        helper.contract = self.contract
+        self.assertEqual(helper.find_hint_price(600, True), 680)
+        self.assertEqual(helper.find_hint_price(600, True, levels=[690, 700]), 690)
+        self.assertEqual(helper.find_hint_price(1200, True), 0)
+        self.transact(self.contract.functions.placeOrderWithLimit(1, 600, True, 8, 680), self.buyer)
+        self.assertEqual(helper.price_levels(True)[-2:], [680, 600])
+        # A stale indexed hint is ignored and the level is found from the best price
+        self.transact(self.contract.functions.placeOrderWithLimit(1, 995, True, 8, 685), self.buyer)
+        self.assertEqual(helper.price_levels(True)[:2], [1000, 995])
+
+    def test_place_order_gas_bounds(self):
+        """Test the fixed placeOrderWithLimit gas limits cover a full level walk and every match"""
+        from app.web3_helper import PLACE_ORDER_GAS, MATCH_GAS
+        for level in range(32):
+            self.place(1, 1000 - 10 * level, True, self.buyer)
+        receipt = self.transact(self.contract.functions.placeOrderWithLimit(1, 600, True, 0, 0), self.buyer)
+        self.assertLessEqual(receipt['gasUsed'], PLACE_ORDER_GAS)
+
+        for level in range(8):
+            self.place(1, 2000 + level, False, self.w3.eth.accounts[3 + level % 7])
+        receipt = self.transact(self.contract.functions.placeOrderWithLimit(9, 2100, True, 8, 0), self.buyer)
+        self.assertEqual(len(self.contract.events.TradeExecuted().process_receipt(receipt)), 8)
+        self.assertLessEqual(receipt['gasUsed'], PLACE_ORDER_GAS + 8 * MATCH_GAS)
+
+    def test_settle_auction_in_parts(self):
+        """Test an interval settled in parts takes them once each, in order, and the last closes it"""
+        from web3.exceptions import ContractLogicError
+        operator, buyer2 = self.w3.eth.accounts[0], self.w3.eth.accounts[3]
+        functions = self.contract.functions
+        self.transact(functions.settleAuctionPart(5, 1, 1000, 1, [self.buyer, self.seller], [10, 10]), operator)
+        self.assertEqual(functions.openInterval().call(), 5)
+        for call in (functions.settleAuctionPart(5, 1, 1000, 1, [self.buyer, self.seller], [10, 10]),  # replayed
+                     functions.settleAuctionPart(5, 0, 1001, 1, [buyer2, self.seller], [5, 5]),  # other price
+                     functions.settleAuction(6, 1000, [buyer2], [5], [self.seller], [5])):  # interval open
+            with self.assertRaises(ContractLogicError):
+                call.transact({'from': operator})
+
+        receipt = self.transact(functions.settleAuctionPart(5, 0, 1000, 1, [buyer2, self.seller], [5, 5]), operator)
+        self.assertEqual(self.contract.events.AuctionSettled().process_receipt(receipt)[0]['args']['energyAmount'], 5)
+        self.assertEqual(functions.lastSettledInterval().call(), 5)
+        self.assertEqual(functions.openInterval().call(), 0)
+
+    def test_settle_off_chain_trades(self):
+        """Test the operator records off-chain trades with order ids 0 and pays the sellers"""
+        balance = self.w3.eth.get_balance(self.seller)
+        receipt = self.transact(self.contract.functions.settleTrades(
+            [self.buyer, self.buyer], [self.seller, self.seller], [10, 5], [1000, 990]), self.w3.eth.accounts[0])
+        trades = self.contract.events.TradeExecuted().process_receipt(receipt)
+        self.assertEqual([(t['args']['tradeId'], t['args']['buyOrderId'], t['args']['sellOrderId']) for t in trades],
+                         [(1, 0, 0), (2, 0, 0)])
+        self.assertEqual(self.w3.eth.get_balance(self.seller) - balance, 10 * 1000 + 5 * 990)
+        self.assertEqual(self.contract.functions.getActiveOrdersCount().call(), 0)
+
+        from web3.exceptions import ContractLogicError
+        with self.assertRaises(ContractLogicError):
+            self.contract.functions.settleTrades([self.buyer], [self.seller], [10], [1000]).transact(
+                {'from': self.buyer})
+
 class TestSolarPredictor(unittest.TestCase):
     def setUp(self):
         """Set up test environment"""
@@ -68,5 +239,55 @@ class TestSolarPredictor(unittest.TestCase):
         self.assertIsInstance(prediction, float)
         self.assertGreaterEqual(prediction, 0)
 
+    def test_batch_prediction(self):
+        """Test vectorized batch prediction matches per-row predictions"""
+        data = self.predictor.generate_sample_data(100)
+        self.predictor.train_model(data)
+
+        rows = [[25, 60, 3, 20, 600], [10, 80, 8, 90, 150], [35, 30, 1, 0, 900]]
+        predictions = self.predictor.predict_batch(rows)
+        self.assertEqual(predictions.shape, (3,))
+        for row, prediction in zip(rows, predictions):
+            self.assertAlmostEqual(prediction, self.predictor.predict_energy(*row))
+
+        # DataFrames are accepted as long as they carry the feature columns
+        frame_predictions = self.predictor.predict_batch(data.head(10))
+        self.assertEqual(len(frame_predictions), 10)
+        self.assertTrue((frame_predictions >= 0).all())
+
+        with self.assertRaises(ValueError):
+            self.predictor.predict_batch([[1, 2, 3]])
+
+    def test_parallel_training_stats(self):
+        """Test a training run records its mode, size and resource usage"""
+        from ml.solar_predictor import SolarEnergyPredictor
+        predictor = SolarEnergyPredictor(n_estimators=10, n_jobs=-1)
+        predictor.train_model(predictor.generate_sample_data(200), save_data=False)
+
+        stats = predictor.last_training_stats
+        self.assertEqual(stats['mode'], 'full')
+        self.assertEqual(stats['rows'], 160)
+        self.assertEqual(stats['n_jobs'], -1)
+        self.assertGreater(stats['wall_seconds'], 0)
+        self.assertGreater(stats['peak_rss_mb'], 0)
+        self.assertIsNone(predictor.model.n_jobs)  # predictions stay single-threaded
+
+    def test_warm_start_update(self):
+        """Test update_model adds trees on new data and can cap the forest"""
+        data = self.predictor.generate_sample_data(300)
+        self.predictor.train_model(data.iloc[:200], save_data=False)
+        original_trees = list(self.predictor.model.estimators_)
+
+        grown = self.predictor.clone()
+        grown.update_model(data.iloc[200:], n_new_estimators=5)
+        self.assertEqual(len(grown.model.estimators_), 105)
+        self.assertEqual(grown.model.estimators_[:100], original_trees)
+        self.assertEqual(grown.last_training_stats['mode'], 'warm_start')
+        self.assertEqual(len(self.predictor.model.estimators_), 100)  # clone left the original alone
+
+        grown.update_model(data.iloc[200:], n_new_estimators=5, max_estimators=50)
+        self.assertEqual(len(grown.model.estimators_), 50)
+        self.assertGreaterEqual(grown.predict_energy(25, 60, 3, 20, 600), 0)
+
 if __name__ == '__main__':
     unittest.main()
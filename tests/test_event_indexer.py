@@ -0,0 +1,144 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import eth_tester
+    from eth_abi import encode
+    from web3 import Web3, EthereumTesterProvider
+    from app.web3_helper import Web3Helper
+    from app.event_indexer import EventIndexer
+    HAS_ETH_TESTER = True
+except ImportError:
+    HAS_ETH_TESTER = False
+
+# Minimal contract that emits LOG1 with calldata[0:32] as topic0 and the rest as data,
+# standing in for EnergyTrading (which needs solc to compile)
+LOG_EMITTER_BYTECODE = "0x601280600b6000396000f3" + "60203603806020600037600035906000a100"
+
+SELLER = "0x" + "22" * 20
+BUYER = "0x" + "33" * 20
+
+ORDER_PLACED = ('OrderPlaced(uint256,address,uint256,uint256,bool)',
+                ['uint256', 'address', 'uint256', 'uint256', 'bool'])
+TRADE_EXECUTED = ('TradeExecuted(uint256,address,address,uint256,uint256,uint256,uint256)',
+                  ['uint256', 'address', 'address', 'uint256', 'uint256', 'uint256', 'uint256'])
+ORDER_CANCELLED = ('OrderCancelled(uint256)', ['uint256'])
+
+@unittest.skipUnless(HAS_ETH_TESTER, "eth-tester is not installed")
+class TestEventIndexer(unittest.TestCase):
+    def setUp(self):
+        """Set up an indexer over a log emitter on an in-process test chain"""
+        provider = EthereumTesterProvider()
+        self.tester = provider.ethereum_tester
+        self.helper = Web3Helper(provider=provider)
+        self.sender = self.helper.w3.eth.accounts[0]
+        self.private_key = self.tester.backend.account_keys[0].to_hex()
+
+        tx_hash = self.helper.send_transaction(
+            {'from': self.sender, 'data': LOG_EMITTER_BYTECODE, 'gas': 100000},
+            self.private_key, wait=True
+        )
+        receipt = self.helper.w3.eth.get_transaction_receipt(tx_hash)
+        self.helper.load_contract(receipt['contractAddress'])
+        self.indexer = EventIndexer(self.helper, reorg_depth=4)
+
+    def emit(self, event, values):
+        """Emit one contract event in its own block"""
+        signature, types = event
+        self.helper.send_transaction({
+            'from': self.sender,
+            'to': self.helper.contract_address,
+            'data': Web3.keccak(text=signature) + encode(types, values),
+            'gas': 100000
+        }, self.private_key, wait=True)
+
+    def test_indexes_orders_trades_and_cancellations(self):
+        """Test events are mirrored into orders, trades and price levels"""
+        self.emit(ORDER_PLACED, [1, SELLER, 10, 90, False])
+        self.emit(ORDER_PLACED, [2, SELLER, 5, 95, False])
+        self.emit(ORDER_PLACED, [3, BUYER, 8, 80, True])
+        self.emit(TRADE_EXECUTED, [1, BUYER, SELLER, 4, 90, 3, 1])
+        self.emit(ORDER_CANCELLED, [2])
+
+        self.assertEqual(self.indexer.sync(), 5)
+        self.assertEqual(self.indexer.checkpoint, self.helper.w3.eth.block_number)
+        self.assertEqual(self.indexer.get_active_orders_count(), 2)
+
+        book = self.indexer.get_order_book()
+        self.assertEqual(book['asks'], [{'price': 90, 'energy_amount': 10, 'orders': 1}])
+        self.assertEqual(book['bids'], [{'price': 80, 'energy_amount': 8, 'orders': 1}])
+        self.assertEqual(self.indexer.better_price_levels(100, False), [90])
+        self.assertEqual(self.indexer.better_price_levels(70, True), [80])
+        self.assertEqual(self.indexer.better_price_levels(85, True), [])
+
+        seller = Web3.to_checksum_address(SELLER)
+        self.assertEqual([o['order_id'] for o in self.indexer.get_orders(user=seller)], [2, 1])
+        self.assertEqual(self.indexer.get_orders(user=SELLER.lower()), self.indexer.get_orders(user=seller))
+        self.assertEqual(self.indexer.get_orders(status='cancelled')[0]['order_id'], 2)
+        trades = self.indexer.get_trades(user=seller)
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(trades[0]['energy_amount'], 4)
+
+        # Nothing new: the next sync is a no-op
+        self.assertEqual(self.indexer.sync(), 0)
+
+    def test_trade_refreshes_only_its_orders(self):
+        """Test a trade re-reads the two orders it names, not all of the traders' orders"""
+        for order_id in range(1, 4):
+            self.emit(ORDER_PLACED, [order_id, SELLER, 10, 90 + order_id, False])
+        self.emit(ORDER_PLACED, [4, BUYER, 4, 95, True])
+        self.emit(TRADE_EXECUTED, [1, BUYER, SELLER, 4, 91, 4, 1])
+
+        read = []
+        get_orders = self.helper.get_orders
+        self.helper.get_orders = lambda order_ids, **kwargs: read.append(order_ids) or get_orders(order_ids, **kwargs)
+        self.indexer.sync()
+        self.assertEqual(read, [[1, 4]])
+
+    def test_rewinds_on_reorg(self):
+        """Test orders from orphaned blocks are dropped and the new branch indexed"""
+        self.emit(ORDER_PLACED, [1, SELLER, 10, 90, False])
+        snapshot = self.tester.take_snapshot()
+        self.emit(ORDER_PLACED, [2, SELLER, 5, 95, False])
+        self.emit(ORDER_CANCELLED, [1])
+        self.indexer.sync()
+        self.assertEqual(self.indexer.get_active_orders_count(), 1)
+
+        # Replace the last two blocks with a different branch
+        self.tester.revert_to_snapshot(snapshot)
+        self.helper.nonce_manager.reset(self.sender)
+        self.emit(ORDER_PLACED, [2, BUYER, 7, 85, True])
+        self.emit(ORDER_PLACED, [3, BUYER, 3, 80, True])
+        self.emit(ORDER_PLACED, [4, BUYER, 1, 75, True])
+
+        self.indexer.sync()
+        self.assertEqual(self.indexer.reorgs, 1)
+        self.assertEqual(self.indexer.get_active_orders_count(), 4)
+        book = self.indexer.get_order_book(levels=2)
+        self.assertEqual(book['asks'], [{'price': 90, 'energy_amount': 10, 'orders': 1}])
+        self.assertEqual([level['price'] for level in book['bids']], [85, 80])
+        self.assertEqual(self.indexer.get_orders(user=Web3.to_checksum_address(BUYER), limit=1)[0]['order_id'], 4)
+
+    def test_single_writer_per_database_file(self):
+        """Test only one indexer syncs a shared file; the other reads it"""
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'events.sqlite3')
+            writer = EventIndexer(self.helper, db_path=db_path)
+            reader = EventIndexer(self.helper, db_path=db_path)
+            self.assertTrue(writer._acquire_writer())
+            self.assertFalse(reader._acquire_writer())
+
+            self.emit(ORDER_PLACED, [1, SELLER, 10, 90, False])
+            writer.sync()
+            self.assertEqual(reader.get_orders()[0]['order_id'], 1)
+            writer.stop()
+            self.assertTrue(reader._acquire_writer())
+            reader.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.flat_forest import FlatForest
+from ml.solar_predictor import SolarEnergyPredictor, FEATURE_COLUMNS, FLAT_MODEL_DIR
+
+class TestFlatForest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Train and save a small forest once"""
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.predictor = SolarEnergyPredictor(n_estimators=20)
+        data = cls.predictor.generate_sample_data(2000)
+        cls.predictor.train_model(data, save_data=False, save=False)
+        cls.predictor.save_model(cls.tmp.name)
+        cls.weather = cls.predictor.generate_sample_data(500, seed=7)[FEATURE_COLUMNS].to_numpy()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_matches_sklearn(self):
+        """Test flat predictions match the sklearn forest"""
+        flat = FlatForest.from_sklearn(self.predictor.model, self.predictor.scaler)
+        expected = self.predictor.model.predict(self.predictor.scaler.transform(self.weather))
+        np.testing.assert_allclose(flat.predict(self.weather, block_rows=64), expected, rtol=1e-12)
+        self.assertEqual(flat.n_trees, 20)
+        self.assertEqual(flat.n_nodes, sum(tree.tree_.node_count for tree in self.predictor.model.estimators_))
+
+    def test_load_is_memory_mapped(self):
+        """Test the saved export loads as read-only memory maps and predicts the same"""
+        flat = FlatForest.load(os.path.join(self.tmp.name, FLAT_MODEL_DIR))
+        self.assertIsInstance(flat.children.base, np.memmap)
+        self.assertFalse(flat.threshold.flags.writeable)
+        np.testing.assert_allclose(flat.predict(self.weather), self.predictor.predict_batch(self.weather),
+                                   rtol=1e-12)
+
+    def test_lockstep_row_parity(self):
+        """Test the single-row lockstep walk matches sklearn, including out-of-range weather"""
+        flat = FlatForest.from_sklearn(self.predictor.model, self.predictor.scaler)
+        rng = np.random.default_rng(0)
+        rows = np.vstack([self.weather, rng.uniform(-1000, 2000, size=(200, len(FEATURE_COLUMNS)))])
+        expected = self.predictor.model.predict(self.predictor.scaler.transform(rows))
+        actual = np.array([flat.predict_row(row) for row in rows])
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+    def test_engine_switch(self):
+        """Test predictions agree across engines and switching back drops nothing"""
+        predictor = self.predictor.clone()
+        expected = [predictor.predict_energy(*row) for row in self.weather[:50]]
+        predictor.set_engine('lockstep')
+        self.assertIsNotNone(predictor.flat_model)
+        np.testing.assert_allclose([predictor.predict_energy(*row) for row in self.weather[:50]], expected,
+                                   rtol=1e-12)
+        predictor.set_engine('sklearn')
+        self.assertEqual(predictor.predict_energy(*self.weather[0]), expected[0])
+        with self.assertRaises(ValueError):
+            predictor.set_engine('gpu')
+
+    def test_truncated_export_is_rejected(self):
+        """Test a partially copied export fails loudly instead of mispredicting"""
+        path = os.path.join(self.tmp.name, 'truncated')
+        FlatForest.from_sklearn(self.predictor.model, self.predictor.scaler).save(path)
+        with open(os.path.join(path, 'feature.bin'), 'r+b') as f:
+            f.truncate(40)
+        with self.assertRaises(ValueError):
+            FlatForest.load(path)
+
+    def test_predictor_flat_format(self):
+        """Test a predictor loaded in flat format predicts but cannot be updated"""
+        predictor = SolarEnergyPredictor(model_format='flat')
+        self.assertTrue(predictor.load_model(self.tmp.name))
+        self.assertTrue(predictor.flat_only)
+        self.assertEqual(predictor.engine, 'lockstep')
+        with self.assertRaises(ValueError):
+            predictor.set_engine('sklearn')
+        self.assertAlmostEqual(predictor.predict_energy(25, 60, 3, 20, 600),
+                               self.predictor.predict_energy(25, 60, 3, 20, 600))
+        with self.assertRaises(ValueError):
+            predictor.update_model(predictor.generate_sample_data(50))
+
+    def test_flat_format_falls_back_to_joblib(self):
+        """Test a model directory without a flat export still loads"""
+        predictor = SolarEnergyPredictor(model_format='flat')
+        with tempfile.TemporaryDirectory() as model_dir:
+            self.assertFalse(predictor.load_model(model_dir))
+            for name in ('solar_model.pkl', 'solar_scaler.pkl'):
+                shutil.copy(os.path.join(self.tmp.name, name), model_dir)
+            self.assertTrue(predictor.load_model(model_dir))
+        self.assertFalse(predictor.flat_only)
+
+if __name__ == '__main__':
+    unittest.main()
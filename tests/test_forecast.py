@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.solar_predictor import SolarEnergyPredictor, FEATURE_COLUMNS
+
+def hourly_weather(hours):
+    """Clear-sky weather for the given hours of day, dark outside 6:00-18:00"""
+    return [{
+        'hour': hour,
+        'temperature': 20.0,
+        'humidity': 50.0,
+        'wind_speed': 3.0,
+        'cloud_cover': 20.0,
+        'solar_radiation': max(0.0, 800.0 - abs(hour - 12) * 130.0)
+    } for hour in hours]
+
+class TestForecastSeries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.predictor = SolarEnergyPredictor(n_estimators=10)
+        cls.predictor.train_model(cls.predictor.generate_sample_data(1000), save_data=False, save=False)
+
+    def test_matches_batch_prediction(self):
+        """Test daytime hours equal predict_batch and night hours produce nothing"""
+        weather = hourly_weather(range(24))
+        hourly, daily = self.predictor.forecast_series(weather, start='2026-06-01')
+        expected = self.predictor.predict_batch(pd.DataFrame(weather)[FEATURE_COLUMNS])
+        day = hourly['hour'].between(6, 18).to_numpy()
+        np.testing.assert_allclose(hourly['energy_kwh'][day], expected[day])
+        self.assertTrue((hourly['energy_kwh'][~day] == 0).all())
+        self.assertEqual(len(daily), 1)
+        self.assertAlmostEqual(daily['energy_kwh'][0], hourly['energy_kwh'].sum())
+
+    def test_hour_of_day_rolls_over(self):
+        """Test a 48h frontend series starting mid-morning spans three days"""
+        hourly, daily = self.predictor.forecast_series(hourly_weather(
+            list(range(9, 24)) + list(range(24)) + list(range(9))), start='2026-06-01')
+        self.assertEqual(str(hourly['timestamp'].iloc[0]), '2026-06-01 09:00:00')
+        self.assertEqual(str(hourly['timestamp'].iloc[-1]), '2026-06-03 08:00:00')
+        self.assertEqual(daily['hours'].tolist(), [15, 24, 9])
+        self.assertAlmostEqual(daily['energy_kwh'].sum(), hourly['energy_kwh'].sum())
+
+    def test_consecutive_hours_from_start(self):
+        """Test rows without times are consecutive hours from the issue time"""
+        weather = pd.DataFrame(hourly_weather(range(24))).drop(columns='hour')
+        hourly, daily = self.predictor.forecast_series(weather, start='2026-06-01T18:30')
+        self.assertEqual(hourly['hour'].tolist()[:7], [18, 19, 20, 21, 22, 23, 0])
+        self.assertEqual(daily['hours'].tolist(), [6, 18])
+
+    def test_missing_features(self):
+        """Test a series without the model's features is rejected"""
+        with self.assertRaises(ValueError):
+            self.predictor.forecast_series([{'hour': 0, 'temperature': 20}])
+        with self.assertRaises(ValueError):
+            self.predictor.forecast_series([])
+
+if __name__ == '__main__':
+    unittest.main()
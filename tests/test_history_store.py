@@ -0,0 +1,84 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.history_store import HistoryStore
+from ml.solar_predictor import SolarEnergyPredictor, iter_training_chunks
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        """Store 100 days of hourly sample readings for one site"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = HistoryStore(self.tmp.name)
+        self.data = SolarEnergyPredictor().generate_sample_data(2400)
+        self.store.write(self.data, site='north')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """Test rows come back in time order with float32 columns and UTC timestamps"""
+        loaded = self.store.read(site='north')
+        self.assertEqual(len(loaded), 2400)
+        self.assertEqual(loaded['temperature'].dtype, np.float32)
+        np.testing.assert_allclose(loaded['energy_output'], self.data['energy_output'], rtol=1e-6)
+        self.assertEqual(loaded['timestamp'].iloc[0], pd.Timestamp('2024-01-01', tz='UTC'))
+        self.assertTrue(loaded['timestamp'].is_monotonic_increasing)
+
+    def test_partitioned_by_site_and_month(self):
+        """Test one partition per site and calendar month"""
+        months = [month for _, month, _ in self.store.partitions()]
+        self.assertEqual(months, ['2024-01', '2024-02', '2024-03', '2024-04'])
+        self.assertEqual(self.store.sites(), ['north'])
+
+    def test_time_range_pushdown(self):
+        """Test a range read only opens overlapping months and trims to [start, end)"""
+        self.assertEqual([month for _, month, _ in self.store.partitions(start='2024-02-10', end='2024-03-01')],
+                         ['2024-02'])
+        window = self.store.read(start='2024-02-10', end='2024-02-11T06:00')
+        self.assertEqual(len(window), 30)
+        self.assertEqual(window['timestamp'].min(), pd.Timestamp('2024-02-10', tz='UTC'))
+        self.assertEqual(window['timestamp'].max(), pd.Timestamp('2024-02-11T05:00', tz='UTC'))
+
+    def test_append_merges_and_overwrite_replaces(self):
+        """Test appends land in time order inside existing months and overwrite drops the site"""
+        late = self.data.iloc[:3].assign(timestamp=pd.to_datetime(['2024-01-05T00:30', '2024-01-01T00:30',
+                                                                   '2024-04-09T23:59']))
+        self.store.write(late, site='north')
+        january = self.store.read(site='north', end='2024-01-01T02:00')
+        self.assertEqual(len(january), 3)
+        self.assertEqual(len(self.store.read(site='north')), 2403)
+
+        self.store.write(self.data.iloc[:5], site='north', mode='overwrite')
+        self.assertEqual(len(self.store.read(site='north')), 5)
+
+    def test_multiple_sites(self):
+        """Test reads across sites tag rows with their site"""
+        self.store.write(self.data.iloc[:10], site='south')
+        both = self.store.read(end='2024-01-01T05:00')
+        self.assertEqual(sorted(both['site'].unique()), ['north', 'south'])
+        self.assertEqual(len(both), 10)
+
+    def test_invalid_input(self):
+        """Test bad site names and missing columns are rejected"""
+        with self.assertRaises(ValueError):
+            self.store.write(self.data, site='../etc')
+        with self.assertRaises(ValueError):
+            self.store.write(self.data.drop(columns=['timestamp']), site='north')
+
+    def test_streaming_training_chunks(self):
+        """Test a store directory feeds chunked training with fixed-size chunks"""
+        self.store.write(self.data.iloc[:100], site='south')
+        chunks = list(iter_training_chunks(self.tmp.name, chunksize=1000))
+        self.assertEqual([len(chunk) for chunk in chunks], [1000, 1000, 500])
+        self.assertNotIn('timestamp', chunks[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.matching_engine import OrderBook
+
+ALICE = "0x00000000000000000000000000000000000000a1"
+BOB = "0x00000000000000000000000000000000000000b0"
+CAROL = "0x00000000000000000000000000000000000000c0"
+
+class TestOrderBook(unittest.TestCase):
+    def setUp(self):
+        """Set up an empty order book"""
+        self.book = OrderBook()
+
+    def test_trade_uses_seller_price_and_min_quantity(self):
+        """Test trades execute at the seller's price for the smaller quantity"""
+        sell_id, trades = self.book.place_order(ALICE, 10, 100, False)
+        self.assertEqual(trades, [])
+
+        buy_id, trades = self.book.place_order(BOB, 4, 120, True)
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(trades[0]['price'], 100)
+        self.assertEqual(trades[0]['energyAmount'], 4)
+        self.assertEqual(trades[0]['buyer'], BOB)
+        self.assertEqual(trades[0]['seller'], ALICE)
+
+        self.assertFalse(self.book.get_order(buy_id)['isActive'])
+        self.assertEqual(self.book.get_order(sell_id)['energyAmount'], 6)
+        self.assertEqual(self.book.get_active_orders_count(), 1)
+
+    def test_price_time_priority(self):
+        """Test the best price fills first, then the earliest order at that price"""
+        late_cheap = self.book.place_order(ALICE, 5, 90, False, timestamp=2)[0]
+        early_cheap = self.book.place_order(CAROL, 5, 90, False, timestamp=1)[0]
+        expensive = self.book.place_order(ALICE, 5, 80, False, timestamp=3)[0]
+
+        _, trades = self.book.place_order(BOB, 12, 100, True)
+        self.assertEqual([t['sellOrderId'] for t in trades], [expensive, early_cheap, late_cheap])
+        self.assertEqual([t['energyAmount'] for t in trades], [5, 5, 2])
+        self.assertEqual(self.book.get_order(late_cheap)['energyAmount'], 3)
+
+    def test_no_match_when_prices_do_not_cross(self):
+        """Test orders rest when the bid is below the ask"""
+        self.book.place_order(ALICE, 5, 110, False)
+        _, trades = self.book.place_order(BOB, 5, 100, True)
+        self.assertEqual(trades, [])
+        self.assertEqual(self.book.best_bid()['price'], 100)
+        self.assertEqual(self.book.best_ask()['price'], 110)
+        self.assertEqual(self.book.depth()['bids'], [{'price': 100, 'energyAmount': 5}])
+
+    def test_depth_tracks_fills_and_cancels(self):
+        """Test per-level totals follow partial fills and cancellations"""
+        first = self.book.place_order(ALICE, 5, 110, False)[0]
+        self.book.place_order(CAROL, 7, 110, False)
+        self.book.place_order(ALICE, 3, 120, False)
+        self.book.place_order(BOB, 4, 100, True)
+        self.book.place_order(BOB, 2, 95, True)
+
+        self.book.place_order(BOB, 6, 110, True)
+        self.assertEqual(self.book.depth()['asks'], [{'price': 110, 'energyAmount': 6},
+                                                     {'price': 120, 'energyAmount': 3}])
+        self.book.cancel_order(first + 1, CAROL)
+        self.assertEqual(self.book.depth(levels=1), {'bids': [{'price': 100, 'energyAmount': 4}],
+                                                     'asks': [{'price': 120, 'energyAmount': 3}]})
+
+    def test_cancel_order(self):
+        """Test only the owner can cancel and cancelled orders never match"""
+        order_id, _ = self.book.place_order(ALICE, 5, 100, False)
+        with self.assertRaises(PermissionError):
+            self.book.cancel_order(order_id, BOB)
+
+        self.book.cancel_order(order_id, ALICE)
+        self.assertEqual(self.book.get_active_orders_count(), 0)
+        with self.assertRaises(ValueError):
+            self.book.cancel_order(order_id, ALICE)
+
+        _, trades = self.book.place_order(BOB, 5, 200, True)
+        self.assertEqual(trades, [])
+
+    def test_rejects_invalid_orders(self):
+        """Test zero amounts and prices are rejected like the contract does"""
+        with self.assertRaises(ValueError):
+            self.book.place_order(ALICE, 0, 100, True)
+        with self.assertRaises(ValueError):
+            self.book.place_order(ALICE, 5, 0, True)
+
+    def test_history_is_bounded(self):
+        """Test only the newest inactive orders and trades are kept"""
+        book = OrderBook(history=2)
+        cancelled = [book.place_order(ALICE, 5, 100, False)[0] for _ in range(3)]
+        for order_id in cancelled:
+            book.cancel_order(order_id, ALICE)
+        resting = book.place_order(CAROL, 5, 105, False)[0]
+
+        # Stale heap entries of evicted orders are skipped
+        self.assertIsNone(book.get_order(cancelled[0]))
+        self.assertEqual(book.best_ask()['orderId'], resting)
+        trade_ids = [trade['tradeId'] for _ in range(3)
+                     for trade in book.place_order(BOB, 1, 105, True)[1]]
+
+        self.assertEqual(book.get_order(resting)['energyAmount'], 2)
+        self.assertIsNone(book.get_trade(trade_ids[0]))
+        self.assertEqual(book.get_trade(trade_ids[-1])['energyAmount'], 1)
+        self.assertEqual(len(book.orders), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.metrics import RequestMetrics, SamplingProfiler, render_cache_stats, render_rpc_stats
+
+class TestRequestMetrics(unittest.TestCase):
+    def test_request_counters_and_cumulative_buckets(self):
+        """Test requests are counted per status and histogram buckets are cumulative"""
+        metrics = RequestMetrics(buckets=(0.01, 0.1))
+        for seconds, status in ((0.005, 200), (0.05, 200), (0.5, 400)):
+            metrics.start('/predict')
+            metrics.finish('/predict', 'POST', status, seconds)
+        lines = metrics.render()
+
+        self.assertIn('http_requests_total{route="/predict",method="POST",status="200"} 2', lines)
+        self.assertIn('http_requests_total{route="/predict",method="POST",status="400"} 1', lines)
+        self.assertIn('http_request_duration_seconds_bucket{route="/predict",method="POST",le="0.01"} 1', lines)
+        self.assertIn('http_request_duration_seconds_bucket{route="/predict",method="POST",le="0.1"} 2', lines)
+        self.assertIn('http_request_duration_seconds_bucket{route="/predict",method="POST",le="+Inf"} 3', lines)
+        self.assertIn('http_request_duration_seconds_count{route="/predict",method="POST"} 3', lines)
+        self.assertIn('http_requests_in_flight{route="/predict"} 0', lines)
+
+    def test_in_flight_gauge(self):
+        """Test requests count as in flight until they finish"""
+        metrics = RequestMetrics()
+        metrics.start('/forecast')
+        self.assertIn('http_requests_in_flight{route="/forecast"} 1', metrics.render())
+
+    def test_timed_operation(self):
+        """Test timed blocks become an <operation>_seconds histogram with their labels"""
+        metrics = RequestMetrics()
+        with metrics.timed('model_inference', operation='predict_energy'):
+            pass
+        lines = metrics.render()
+        self.assertIn('# TYPE model_inference_seconds histogram', lines)
+        self.assertIn('model_inference_seconds_count{operation="predict_energy"} 1', lines)
+
+    def test_label_values_are_escaped(self):
+        """Test quotes in label values cannot break the exposition format"""
+        metrics = RequestMetrics()
+        metrics.start('/a"b')
+        self.assertIn('http_requests_in_flight{route="/a\\"b"} 1', metrics.render())
+
+class TestStatsRendering(unittest.TestCase):
+    def test_cache_stats(self):
+        """Test cache stats become counters and gauges labelled by cache"""
+        lines = render_cache_stats({'prediction': {'hits': 3, 'misses': 1, 'evictions': 0,
+                                                   'entries': 1, 'hit_rate': 0.75}})
+        self.assertIn('cache_hits_total{cache="prediction"} 3', lines)
+        self.assertIn('cache_hit_ratio{cache="prediction"} 0.75', lines)
+
+    def test_rpc_stats(self):
+        """Test provider stats become per-method counters and a latency histogram"""
+        lines = render_rpc_stats({'eth_call': {'count': 4, 'errors': 1, 'retries': 2, 'mean_ms': 5.0,
+                                               'buckets': {'0.01': 3, '0.1': 1, '+Inf': 0}}})
+        self.assertIn('rpc_requests_total{method="eth_call"} 4', lines)
+        self.assertIn('rpc_errors_total{method="eth_call"} 1', lines)
+        self.assertIn('rpc_request_duration_seconds_bucket{method="eth_call",le="0.1"} 4', lines)
+        self.assertIn('rpc_request_duration_seconds_bucket{method="eth_call",le="+Inf"} 4', lines)
+        self.assertIn('rpc_request_duration_seconds_sum{method="eth_call"} 0.02', lines)
+
+class TestSamplingProfiler(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.profiler = SamplingProfiler(self.output_dir, interval=0.001, slow_seconds=0.05)
+
+    def tearDown(self):
+        self.profiler.configure(enabled=False)
+
+    def run_request(self, seconds):
+        result = []
+
+        def handle():
+            self.profiler.begin()
+            start = time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                sum(range(1000))
+            result.append(self.profiler.end('POST /predict', time.perf_counter() - start))
+
+        thread = threading.Thread(target=handle)
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_disabled_writes_nothing(self):
+        """Test a disabled profiler neither samples nor writes"""
+        self.assertIsNone(self.run_request(0.06))
+        self.assertEqual(self.profiler.profiles(), [])
+
+    def test_slow_request_writes_folded_stacks(self):
+        """Test a slow request's samples are written as folded stacks"""
+        self.profiler.configure(enabled=True)
+        path = self.run_request(0.1)
+        self.assertIsNotNone(path)
+        self.assertTrue(path.endswith('POST_predict.folded'))
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertIn('handle (test_metrics.py', stack)
+        self.assertGreater(int(count), 0)
+        self.assertEqual(self.profiler.stats()['profiles_written'], 1)
+
+    def test_fast_request_is_discarded(self):
+        """Test requests under the threshold leave no profile"""
+        self.profiler.configure(enabled=True)
+        self.assertIsNone(self.run_request(0.001))
+        self.assertEqual(self.profiler.profiles(), [])
+
+    def test_old_profiles_are_pruned(self):
+        """Test only the newest max_profiles files are kept"""
+        self.profiler.max_profiles = 1
+        self.profiler.configure(enabled=True)
+        self.run_request(0.06)
+        self.run_request(0.06)
+        self.assertEqual(len(self.profiler.profiles()), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.solar_predictor import SolarEnergyPredictor
+from app.model_registry import ModelRegistry, ModelNotReadyError
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        """Set up a registry and a trained predictor"""
+        self.registry = ModelRegistry()
+        self.predictor = SolarEnergyPredictor()
+        self.predictor.train_model(self.predictor.generate_sample_data(100))
+
+    def test_not_ready_before_publish(self):
+        """Test predictions are refused until a model is published"""
+        self.assertFalse(self.registry.is_ready)
+        with self.assertRaises(ModelNotReadyError):
+            self.registry.current()
+
+    def test_publish_swaps_versions(self):
+        """Test publishing bumps the version and in-flight references survive"""
+        published = []
+        self.registry.add_listener(published.append)
+
+        self.assertEqual(self.registry.publish(self.predictor), 1)
+        version, in_flight = self.registry.current()
+
+        replacement = SolarEnergyPredictor()
+        replacement.train_model(replacement.generate_sample_data(100))
+        self.assertEqual(self.registry.publish(replacement), 2)
+
+        self.assertEqual(version, 1)
+        self.assertIs(in_flight, self.predictor)
+        self.assertIs(self.registry.current()[1], replacement)
+        self.assertEqual(published, [1, 2])
+        self.assertIsNotNone(self.registry.warmup_seconds)
+
+    def test_publish_rejects_untrained_model(self):
+        """Test an untrained predictor cannot become the live model"""
+        with self.assertRaises(ValueError):
+            self.registry.publish(SolarEnergyPredictor())
+
+    def test_first_request_latency(self):
+        """Test only the first request latency is kept"""
+        self.registry.record_request(0.5)
+        self.registry.record_request(0.1)
+        stats = self.registry.stats()
+        self.assertEqual(stats['first_request_seconds'], 0.5)
+        self.assertEqual(stats['request_count'], 2)
+
+    def test_incremental_retrain(self):
+        """Test an incremental retrain publishes a grown copy of the live model"""
+        self.registry.publish(self.predictor)
+        new_data = self.predictor.generate_sample_data(50)
+        self.assertEqual(self.registry.retrain(new_data, background=False, incremental=True), 2)
+
+        live = self.registry.current()[1]
+        self.assertIsNot(live, self.predictor)
+        self.assertEqual(len(live.model.estimators_), 120)
+        self.assertEqual(len(self.predictor.model.estimators_), 100)
+        self.assertEqual(self.registry.stats()['last_training']['mode'], 'warm_start')
+        self.assertEqual(self.registry.last_source, 'updated')
+
+    def test_set_engine(self):
+        """Test switching engines publishes a copy and later versions keep the engine"""
+        self.registry.publish(self.predictor)
+        self.assertEqual(self.registry.set_engine('lockstep'), 2)
+        self.assertEqual(self.predictor.engine, 'sklearn')
+        self.assertEqual(self.registry.stats()['engine'], 'lockstep')
+
+        replacement = SolarEnergyPredictor()
+        replacement.train_model(replacement.generate_sample_data(100))
+        self.registry.publish(replacement)
+        self.assertEqual(replacement.engine, 'lockstep')
+        with self.assertRaises(ValueError):
+            self.registry.set_engine('gpu')
+
+    def test_incremental_retrain_from_flat_model(self):
+        """Test a live model mapped from the flat export is updated from the saved joblib forest"""
+        flat = SolarEnergyPredictor(model_format='flat')
+        self.assertTrue(flat.load_model())
+        self.registry.publish(flat)
+        new_data = self.predictor.generate_sample_data(50)
+        self.assertEqual(self.registry.retrain(new_data, background=False, incremental=True), 2)
+        self.assertEqual(len(self.registry.current()[1].model.estimators_), 120)
+
+if __name__ == '__main__':
+    unittest.main()
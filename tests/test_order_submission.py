@@ -0,0 +1,155 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import eth_tester
+    from web3 import EthereumTesterProvider
+    from app.web3_helper import Web3Helper, BATCH_BASE_GAS, BATCH_ORDER_GAS, GAS_MARGIN, MATCH_GAS, \
+        PLACE_ORDER_GAS
+    HAS_ETH_TESTER = True
+except ImportError:
+    HAS_ETH_TESTER = False
+
+# Contract whose runtime answers every call with 512 zero bytes (EnergyTrading needs solc to build)
+STUB_INIT = '0x6006600c60003960066000f3' + '6102006000f3'
+
+@unittest.skipUnless(HAS_ETH_TESTER, "eth-tester is not installed")
+class TestOrderSubmission(unittest.TestCase):
+    def setUp(self):
+        """Set up a helper with the stub contract on an in-process test chain"""
+        provider = EthereumTesterProvider()
+        self.helper = Web3Helper(provider=provider)
+        self.account = self.helper.w3.eth.accounts[0]
+        self.private_key = provider.ethereum_tester.backend.account_keys[0].to_hex()
+        tx_hash = self.helper.send_transaction({'from': self.account, 'data': STUB_INIT, 'gas': 100000},
+                                               self.private_key, wait=True)
+        self.helper.load_contract(self.helper.w3.eth.get_transaction_receipt(tx_hash).contractAddress)
+
+    def estimate(self, call):
+        return int(call.estimate_gas({'from': self.account}) * GAS_MARGIN)
+
+    def test_gas_limit_from_match_cap(self):
+        """Test a single order's gas limit is the fixed bound for its match cap"""
+        tx_hash = self.helper.place_order(self.account, self.private_key, 10, 1000, True, wait=True,
+                                          max_matches=3, hint_price=990)
+        transaction = self.helper.w3.eth.get_transaction(tx_hash)
+        self.assertEqual(transaction['gas'], PLACE_ORDER_GAS + 3 * MATCH_GAS)
+
+        function, args = self.helper.contract.decode_function_input(transaction['data'])
+        self.assertEqual(function.fn_name, 'placeOrderWithLimit')
+        self.assertEqual(args, {'_energyAmount': 10, '_price': 1000, '_isBuyOrder': True,
+                                '_maxMatches': 3, '_hintPrice': 990})
+
+    def test_hint_defaults_to_the_book(self):
+        """Test an order gets no hint when the contract reports no levels"""
+        self.assertEqual(self.helper.price_levels(True), [])
+        self.assertEqual(self.helper.find_hint_price(1000, True, levels=[1010, 1020]), 1010)
+        tx_hash = self.helper.place_order(self.account, self.private_key, 10, 1000, True, wait=True)
+        _, args = self.helper.contract.decode_function_input(self.helper.w3.eth.get_transaction(tx_hash)['data'])
+        self.assertEqual(args['_hintPrice'], 0)
+
+    def test_place_orders_chunks_by_gas_budget(self):
+        """Test a batch is split so every transaction's fixed gas bound fits the budget"""
+        orders = [(10 + i, 1000 + i, i % 2 == 0) for i in range(7)]
+        budget = BATCH_BASE_GAS + 3 * (BATCH_ORDER_GAS + 2 * MATCH_GAS)
+        self.assertEqual(Web3Helper.orders_per_transaction(2, budget), 3)
+        chunks = self.helper.place_orders(self.account, self.private_key, orders, max_matches=2,
+                                          gas_budget=budget, wait=True)
+        self.assertEqual([len(chunk) for _, chunk in chunks], [3, 3, 1])
+
+        sent = []
+        for tx_hash, chunk in chunks:
+            transaction = self.helper.w3.eth.get_transaction(tx_hash)
+            _, args = self.helper.contract.decode_function_input(transaction['data'])
+            self.assertEqual(transaction['gas'], BATCH_BASE_GAS + len(chunk) * (BATCH_ORDER_GAS + 2 * MATCH_GAS))
+            self.assertEqual(args['_maxMatches'], 2)
+            self.assertEqual(args['_hintPrices'], [0] * len(chunk))
+            self.assertEqual(list(zip(args['_energyAmounts'], args['_prices'], args['_isBuyOrders'])), chunk)
+            sent += chunk
+        self.assertEqual(sent, orders)
+
+    def test_budget_too_small_for_one_order(self):
+        """Test a budget that cannot hold a single order is rejected"""
+        with self.assertRaises(ValueError):
+            self.helper.place_orders(self.account, self.private_key, [(10, 1000, True)], gas_budget=21000)
+
+    def test_cancel_orders(self):
+        """Test cancellations are batched into one transaction per chunk"""
+        budget = self.estimate(self.helper.contract.functions.cancelOrders([4, 5]))
+        chunks = self.helper.cancel_orders(self.account, self.private_key, [4, 5, 6], gas_budget=budget, wait=True)
+        self.assertEqual([chunk for _, chunk in chunks], [[4, 5], [6]])
+        _, args = self.helper.contract.decode_function_input(self.helper.w3.eth.get_transaction(chunks[0][0])['data'])
+        self.assertEqual(args['_orderIds'], [4, 5])
+
+    def test_settle_auction_in_one_transaction(self):
+        """Test an interval settles in a single settleAuction call with an estimated gas limit"""
+        buyers = self.helper.w3.eth.accounts[1:4]
+        seller = self.helper.w3.eth.accounts[4]
+        settlement = {'intervalId': 7, 'clearingPrice': 1000, 'energyAmount': 30,
+                      'buyers': buyers, 'boughtAmounts': [10, 15, 5],
+                      'sellers': [seller], 'soldAmounts': [30]}
+        tx_hashes = self.helper.settle_auction(self.account, self.private_key, settlement, wait=True)
+        self.assertEqual(len(tx_hashes), 1)
+        transaction = self.helper.w3.eth.get_transaction(tx_hashes[0])
+
+        function, args = self.helper.contract.decode_function_input(transaction['data'])
+        self.assertEqual(function.fn_name, 'settleAuction')
+        self.assertEqual(transaction['gas'], self.estimate(function(*args.values())))
+        self.assertEqual(args['_intervalId'], 7)
+        self.assertEqual(args['_buyers'], list(buyers))
+        self.assertEqual(args['_soldAmounts'], [30])
+        self.assertNotIn('parts', settlement)
+
+        # Not even one buyer and one seller fit
+        self.assertEqual(self.helper.settle_auction(self.account, self.private_key, settlement, gas_budget=21000),
+                         [None])
+
+    def test_settle_auction_in_parts_over_budget(self):
+        """Test an interval over the gas budget settles in balanced parts, counting down to the last"""
+        buyers = self.helper.w3.eth.accounts[1:5]
+        sellers = self.helper.w3.eth.accounts[5:7]
+        settlement = {'intervalId': 7, 'clearingPrice': 1000, 'energyAmount': 40,
+                      'buyers': buyers, 'boughtAmounts': [10, 15, 5, 10],
+                      'sellers': sellers, 'soldAmounts': [20, 20]}
+        budget = self.estimate(self.helper.contract.functions.settleAuctionPart(
+            7, 0, 1000, 2, list(buyers[:2]) + list(sellers[:1]), [10, 10, 20]))
+        tx_hashes = self.helper.settle_auction(self.account, self.private_key, settlement, gas_budget=budget,
+                                               wait=True)
+        self.assertGreater(len(tx_hashes), 1)
+        self.assertEqual(len(settlement['parts']), len(tx_hashes))
+
+        bought = sold = 0
+        for i, tx_hash in enumerate(tx_hashes):
+            transaction = self.helper.w3.eth.get_transaction(tx_hash)
+            function, args = self.helper.contract.decode_function_input(transaction['data'])
+            self.assertEqual(function.fn_name, 'settleAuctionPart')
+            self.assertLessEqual(transaction['gas'], budget)
+            self.assertEqual(args['_partsLeft'], len(tx_hashes) - 1 - i)
+            part_bought = sum(args['_amounts'][:args['_buyerCount']])
+            self.assertEqual(part_bought, sum(args['_amounts'][args['_buyerCount']:]))
+            bought += part_bought
+            sold += sum(args['_amounts'][args['_buyerCount']:])
+        self.assertEqual((bought, sold), (40, 40))
+
+    def test_settle_trades_in_chunks(self):
+        """Test off-chain trades are recorded through settleTrades, chunked by gas budget"""
+        accounts = self.helper.w3.eth.accounts
+        trades = [{'tradeId': i + 1, 'buyer': accounts[1], 'seller': accounts[2], 'energyAmount': 10 + i,
+                   'price': 1000 + i} for i in range(3)]
+        budget = self.estimate(self.helper.contract.functions.settleTrades(
+            [accounts[1]] * 2, [accounts[2]] * 2, [10, 11], [1000, 1001]))
+        chunks = self.helper.settle_trades(self.account, self.private_key, trades, gas_budget=budget, wait=True)
+        self.assertEqual([chunk for _, chunk in chunks], [trades[:2], trades[2:]])
+
+        function, args = self.helper.contract.decode_function_input(
+            self.helper.w3.eth.get_transaction(chunks[1][0])['data'])
+        self.assertEqual(function.fn_name, 'settleTrades')
+        self.assertEqual(args, {'_buyers': [accounts[1]], '_sellers': [accounts[2]],
+                                '_energyAmounts': [12], '_prices': [1002]})
+
+if __name__ == '__main__':
+    unittest.main()
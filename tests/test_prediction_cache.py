@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.prediction_cache import ForecastCache, PredictionCache
+
+class TestPredictionCache(unittest.TestCase):
+    def test_quantized_inputs_share_an_entry(self):
+        """Test nearly identical weather hits the same cache entry"""
+        cache = PredictionCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 7.5
+
+        self.assertEqual(cache.get_or_compute((25.0, 60.0, 3.0, 20.0, 600.0), compute), (7.5, False))
+        self.assertEqual(cache.get_or_compute((25.1, 60.2, 3.1, 20.3, 601.0), compute), (7.5, True))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_exact_quantization(self):
+        """Test a zero step keeps the feature exact"""
+        cache = PredictionCache(quantization={'temperature': 0})
+        cache.put((25.0, 60, 3, 20, 600), 1.0)
+        self.assertIsNone(cache.get((25.1, 60, 3, 20, 600)))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full"""
+        cache = PredictionCache(max_entries=2)
+        cache.put((10, 60, 3, 20, 600), 1.0)
+        cache.put((20, 60, 3, 20, 600), 2.0)
+        cache.get((10, 60, 3, 20, 600))
+        cache.put((30, 60, 3, 20, 600), 3.0)
+
+        self.assertIsNone(cache.get((20, 60, 3, 20, 600)))
+        self.assertEqual(cache.get((10, 60, 3, 20, 600)), 1.0)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        cache = PredictionCache(ttl_seconds=0.01)
+        cache.put((25, 60, 3, 20, 600), 1.0)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get((25, 60, 3, 20, 600)))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_model_version_invalidation(self):
+        """Test values from an older model version are never served"""
+        cache = PredictionCache()
+        cache.put((25, 60, 3, 20, 600), 1.0, version=1)
+        self.assertIsNone(cache.get((25, 60, 3, 20, 600), version=2))
+
+        cache.invalidate(2)
+        self.assertIsNone(cache.get((25, 60, 3, 20, 600), version=1))
+        self.assertEqual(cache.stats()['entries'], 0)
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+class TestForecastCache(unittest.TestCase):
+    def test_keyed_on_site_and_issue_time(self):
+        """Test repeated polls of one forecast hit and other sites or issues miss"""
+        cache = ForecastCache()
+        cache.put(('north', '2026-06-01T06:00', 'abc'), {'total_kwh': 40.0}, version=1)
+        self.assertEqual(cache.get(('north', '2026-06-01T06:00', 'abc'), version=1), {'total_kwh': 40.0})
+        self.assertIsNone(cache.get(('south', '2026-06-01T06:00', 'abc'), version=1))
+        self.assertIsNone(cache.get(('north', '2026-06-01T07:00', 'abc'), version=1))
+        self.assertIsNone(cache.get(('north', '2026-06-01T06:00', 'abc'), version=2))
+        self.assertNotIn('quantization', cache.stats())
+
+if __name__ == '__main__':
+    unittest.main()
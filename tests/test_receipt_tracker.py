@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import eth_tester
+    from eth_abi import encode
+    from web3 import Web3, EthereumTesterProvider
+    from app.web3_helper import Web3Helper
+    from app.receipt_tracker import ReceiptTracker
+    HAS_ETH_TESTER = True
+except ImportError:
+    HAS_ETH_TESTER = False
+
+CONTRACT_ADDRESS = "0x" + "11" * 20
+SELLER = "0x" + "22" * 20
+BUYER = "0x" + "33" * 20
+
+def make_log(signature, types, values, log_index):
+    """Build a raw log entry for one of the contract's events"""
+    return {
+        'address': CONTRACT_ADDRESS,
+        'topics': [Web3.keccak(text=signature)],
+        'data': encode(types, values),
+        'logIndex': log_index,
+        'transactionIndex': 0,
+        'transactionHash': b'\x01' * 32,
+        'blockHash': b'\x02' * 32,
+        'blockNumber': 1
+    }
+
+@unittest.skipUnless(HAS_ETH_TESTER, "eth-tester is not installed")
+class TestReceiptTracker(unittest.TestCase):
+    def setUp(self):
+        """Set up a tracker on an in-process test chain"""
+        provider = EthereumTesterProvider()
+        self.helper = Web3Helper(provider=provider)
+        self.helper.load_contract(CONTRACT_ADDRESS)
+        self.tracker = ReceiptTracker(self.helper)
+        self.sender, self.recipient = self.helper.w3.eth.accounts[:2]
+        self.private_key = provider.ethereum_tester.backend.account_keys[0].to_hex()
+
+    def test_decodes_order_and_trade_events(self):
+        """Test OrderPlaced and TradeExecuted logs yield real ids"""
+        receipt = {'logs': [
+            make_log('OrderPlaced(uint256,address,uint256,uint256,bool)',
+                     ['uint256', 'address', 'uint256', 'uint256', 'bool'], [7, BUYER, 10, 100, True], 0),
+            make_log('TradeExecuted(uint256,address,address,uint256,uint256,uint256,uint256)',
+                     ['uint256', 'address', 'address', 'uint256', 'uint256', 'uint256', 'uint256'],
+                     [3, BUYER, SELLER, 10, 90, 7, 2], 1)
+        ]}
+        decoded = self.helper.decode_order_events(receipt)
+        self.assertEqual(decoded['orders'][0]['orderId'], 7)
+        self.assertEqual(decoded['trades'][0]['tradeId'], 3)
+        self.assertEqual(decoded['trades'][0]['seller'], Web3.to_checksum_address(SELLER))
+        self.assertEqual(decoded['cancelled_order_ids'], [])
+
+    def test_status_follows_the_poller(self):
+        """Test a submitted transaction moves from pending to confirmed"""
+        tx_hash = self.helper.send_transaction(
+            {'from': self.sender, 'to': self.recipient, 'value': 1, 'gas': 21000},
+            self.private_key
+        )
+        status = self.tracker.get(tx_hash)
+        self.assertEqual(status['status'], 'pending')
+        self.assertFalse(status['events_decoded'])
+
+        self.helper.receipt_poller.poll_once()
+        status = self.tracker.get(tx_hash)
+        self.assertEqual(status['status'], 'confirmed')
+        self.assertTrue(status['events_decoded'])
+        self.assertEqual(status['order_ids'], [])
+
+        self.assertIsNone(self.tracker.get('0x' + '00' * 32))
+
+    def test_status_of_transaction_from_another_process(self):
+        """Test a transaction this tracker never saw is looked up on the node"""
+        tx_hash = self.helper.w3.eth.send_transaction({'from': self.sender, 'to': self.recipient, 'value': 1})
+        status = self.tracker.get(tx_hash.hex())
+        self.assertEqual(status['status'], 'confirmed')
+        self.assertTrue(status['events_decoded'])
+        self.assertIsNone(self.tracker.get('not-a-hash'))
+
+if __name__ == '__main__':
+    unittest.main()
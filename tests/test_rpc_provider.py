@@ -0,0 +1,131 @@
+import unittest
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from app.rpc_provider import LatencyHistogram, PooledHTTPProvider, get_provider
+
+class FlakyNode(BaseHTTPRequestHandler):
+    """Answers 503 for the first ``failures`` requests, then succeeds"""
+    failures = 0
+    delay = 0.0
+    requests_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        FlakyNode.requests_seen.append(body['method'] if isinstance(body, dict) else 'batch')
+        if self.delay:
+            time.sleep(self.delay)
+        if FlakyNode.failures > 0:
+            FlakyNode.failures -= 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        calls = body if isinstance(body, list) else [body]
+        responses = [{'jsonrpc': '2.0', 'id': call['id'], 'result': '0x10'} for call in calls]
+        payload = json.dumps(responses if isinstance(body, list) else responses[0]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class TestPooledHTTPProvider(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Start a stub node on a free local port"""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyNode)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        FlakyNode.failures = 0
+        FlakyNode.delay = 0.0
+        FlakyNode.requests_seen = []
+        self.provider = PooledHTTPProvider(self.url, pool_size=2, timeout=1.0, max_retries=2, backoff=0.01)
+
+    def test_reads_are_retried(self):
+        """Test a read succeeds after transient 503s and the retries are counted"""
+        FlakyNode.failures = 2
+        response = self.provider.make_request('eth_blockNumber', [])
+        self.assertEqual(response['result'], '0x10')
+        self.assertEqual(len(FlakyNode.requests_seen), 3)
+        self.assertEqual(self.provider.stats()['eth_blockNumber']['retries'], 2)
+
+    def test_retry_budget_is_bounded(self):
+        """Test a read gives up after max_retries and is recorded as an error"""
+        FlakyNode.failures = 5
+        with self.assertRaises(requests.HTTPError):
+            self.provider.make_request('eth_call', [])
+        self.assertEqual(len(FlakyNode.requests_seen), 3)
+        self.assertEqual(self.provider.stats()['eth_call']['errors'], 1)
+
+    def test_writes_are_not_retried(self):
+        """Test a transaction broadcast is sent exactly once"""
+        FlakyNode.failures = 1
+        with self.assertRaises(requests.HTTPError):
+            self.provider.make_request('eth_sendRawTransaction', ['0x00'])
+        self.assertEqual(FlakyNode.requests_seen, ['eth_sendRawTransaction'])
+
+    def test_timeout(self):
+        """Test a slow node raises a timeout instead of hanging"""
+        provider = PooledHTTPProvider(self.url, timeout=0.05, max_retries=0)
+        FlakyNode.delay = 0.2
+        with self.assertRaises(requests.Timeout):
+            provider.make_request('eth_blockNumber', [])
+
+    def test_batch_and_latency_stats(self):
+        """Test batches go through the pool and latency is tracked per method"""
+        for _ in range(5):
+            self.provider.make_request('eth_blockNumber', [])
+        body = self.provider.make_batch_request([
+            {'jsonrpc': '2.0', 'id': i, 'method': 'eth_call', 'params': []} for i in range(3)
+        ])
+        self.assertEqual([r['id'] for r in body], [0, 1, 2])
+
+        stats = self.provider.stats()
+        self.assertEqual(stats['eth_blockNumber']['count'], 5)
+        self.assertEqual(stats['batch:eth_call']['count'], 1)
+        self.assertEqual(sum(stats['eth_blockNumber']['buckets'].values()), 5)
+        self.assertLessEqual(stats['eth_blockNumber']['p50_ms'], stats['eth_blockNumber']['p99_ms'])
+
+    def test_chain_id_is_fetched_once(self):
+        """Test eth_chainId is answered locally after the first call"""
+        for _ in range(3):
+            self.assertEqual(self.provider.make_request('eth_chainId', [])['result'], '0x10')
+        self.assertEqual(FlakyNode.requests_seen, ['eth_chainId'])
+
+    def test_shared_provider_per_url(self):
+        """Test get_provider returns one provider per URL"""
+        self.assertIs(get_provider(self.url), get_provider(self.url))
+        self.assertIsNot(get_provider(self.url), get_provider(self.url + '/other'))
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        """Test percentiles resolve to bucket upper bounds"""
+        histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+        for seconds in [0.005] * 90 + [0.05] * 9 + [5.0]:
+            histogram.observe(seconds)
+        self.assertEqual(histogram.percentile(0.5), 0.01)
+        self.assertEqual(histogram.percentile(0.95), 0.1)
+        self.assertEqual(histogram.percentile(1.0), float('inf'))
+        self.assertIsNone(LatencyHistogram().percentile(0.5))
+
+if __name__ == '__main__':
+    unittest.main()
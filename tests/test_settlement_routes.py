@@ -0,0 +1,96 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import eth_tester
+    from web3 import EthereumTesterProvider
+    from app.web3_helper import Web3Helper
+    import app.server as server
+    HAS_ETH_TESTER = True
+except ImportError:
+    HAS_ETH_TESTER = False
+
+# Contract whose runtime answers every call with 512 zero bytes (EnergyTrading needs solc to build)
+STUB_INIT = '0x6006600c60003960066000f3' + '6102006000f3'
+
+@unittest.skipUnless(HAS_ETH_TESTER, "eth-tester is not installed")
+class TestSettlementRoutes(unittest.TestCase):
+    def setUp(self):
+        """Point the server at the stub contract on an in-process test chain"""
+        provider = EthereumTesterProvider()
+        helper = Web3Helper(provider=provider)
+        self.accounts = helper.w3.eth.accounts
+        private_key = provider.ethereum_tester.backend.account_keys[0].to_hex()
+        tx_hash = helper.send_transaction({'from': self.accounts[0], 'data': STUB_INIT, 'gas': 100000},
+                                          private_key, wait=True)
+        helper.load_contract(helper.w3.eth.get_transaction_receipt(tx_hash).contractAddress)
+
+        self.saved = (server.web3_helper, server.DEMO_ACCOUNT_ADDRESS, server.DEMO_PRIVATE_KEY,
+                      server.PENDING_SETTLEMENTS_MAX)
+        server.web3_helper = helper
+        server.DEMO_ACCOUNT_ADDRESS, server.DEMO_PRIVATE_KEY = self.accounts[0], private_key
+        server.pending_settlements.clear()
+        del server.failed_settlements[:]
+        server.auction_settlements.clear()
+        del server.failed_auction_settlements[:]
+        self.client = server.app.test_client()
+
+    def tearDown(self):
+        (server.web3_helper, server.DEMO_ACCOUNT_ADDRESS, server.DEMO_PRIVATE_KEY,
+         server.PENDING_SETTLEMENTS_MAX) = self.saved
+        server.pending_settlements.clear()
+        server.auction_settlements.clear()
+
+    def order(self, user, user_type, price=100):
+        return self.client.post('/orderbook/orders', json={'user': user, 'user_type': user_type,
+                                                           'energy_amount': 5, 'price': price})
+
+    def test_invalid_user_is_rejected(self):
+        """Test orders need an address their trades can be settled to"""
+        self.assertEqual(self.order('not-an-address', 'seller').status_code, 400)
+        response = self.order(self.accounts[1].lower(), 'seller', price=10 ** 9)
+        self.assertEqual(response.json['order']['user'], self.accounts[1])
+
+    def test_full_queue_refuses_orders_until_settled(self):
+        """Test new orders get a 503 while the queue is full, and settling drains it"""
+        server.PENDING_SETTLEMENTS_MAX = 1
+        self.order(self.accounts[1], 'seller')
+        self.assertEqual(len(self.order(self.accounts[2], 'buyer').json['trades']), 1)
+        self.assertEqual(self.order(self.accounts[2], 'buyer').status_code, 503)
+
+        result = self.client.post('/orderbook/settle').json
+        self.assertEqual([entry['trade_ids'] for entry in result['settled']], [[server.order_book.trade_counter]])
+        self.assertEqual(result['pending_settlements'], 0)
+        self.assertTrue(self.order(self.accounts[2], 'buyer').json['success'])
+
+    def test_auction_order_needs_an_address(self):
+        """Test call-auction orders are stored with checksummed addresses"""
+        response = self.client.post('/auction/orders', json={'user': 'not-an-address', 'energy_amount': 5})
+        self.assertEqual(response.status_code, 400)
+        order_id = self.client.post('/auction/orders', json={'user': self.accounts[1].lower(),
+                                                             'energy_amount': 5}).json['order_id']
+        self.assertEqual(server.call_auction.get_order(order_id)['user'], self.accounts[1])
+
+    def test_failing_settlement_does_not_block_later_intervals(self):
+        """Test a settlement the node refuses moves to the failed list and the next interval settles"""
+        def settlement(interval, buyer):
+            return {'intervalId': interval, 'clearingPrice': 1000, 'energyAmount': 10,
+                    'buyers': [buyer], 'boughtAmounts': [10], 'sellers': [self.accounts[2]], 'soldAmounts': [10]}
+        server.auction_settlements.extend([settlement(10, 'not-an-address'), settlement(11, self.accounts[1])])
+
+        result = self.client.post('/auction/clear').json
+        self.assertEqual([entry['interval_id'] for entry in result['failed']], [10])
+        self.assertEqual([entry['interval_id'] for entry in result['settled']], [11])
+        self.assertIsNone(result['retry'])
+        self.assertEqual(result['pending_settlements'], 0)
+
+        intervals = self.client.get('/auction/intervals').json
+        self.assertEqual(intervals['pending'], [])
+        self.assertEqual([entry['interval_id'] for entry in intervals['failed']], [10])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.site_registry import SiteModelRegistry
+from ml.solar_predictor import SolarEnergyPredictor
+
+class TestSiteModelRegistry(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Save a small model for three sites"""
+        cls.tmp = tempfile.TemporaryDirectory()
+        predictor = SolarEnergyPredictor(n_estimators=5)
+        predictor.train_model(predictor.generate_sample_data(300), save_data=False, save=False)
+        for site in ('north', 'south', 'east'):
+            predictor.save_model(os.path.join(cls.tmp.name, site))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_lazy_load_and_hit(self):
+        """Test a site is loaded on first use only"""
+        registry = SiteModelRegistry(self.tmp.name)
+        self.assertEqual(registry.stats()['loads'], 0)
+        version, predictor = registry.get('north')
+        self.assertTrue(predictor.is_trained)
+        self.assertIs(registry.get('north')[1], predictor)
+        stats = registry.stats()
+        self.assertEqual((stats['loads'], stats['hits'], stats['misses']), (1, 1, 1))
+        self.assertEqual(stats['resident_bytes'], predictor.nbytes)
+        self.assertGreater(stats['resident_bytes'], 0)
+
+    def test_lru_eviction(self):
+        """Test the least recently used site is evicted and reloaded on demand"""
+        registry = SiteModelRegistry(self.tmp.name, max_resident=2)
+        registry.get('north')
+        registry.get('south')
+        registry.get('north')
+        registry.get('east')  # evicts south
+        self.assertEqual(set(registry.stats()['sites']), {'north', 'east'})
+        registry.get('south')
+        stats = registry.stats()
+        self.assertEqual(stats['load_counts'], {'north': 1, 'south': 2, 'east': 1})
+        self.assertEqual(stats['evictions'], 2)
+        self.assertAlmostEqual(stats['eviction_rate'], 0.5)
+
+    def test_unknown_and_invalid_sites(self):
+        """Test sites without a model return None and bad names are rejected"""
+        registry = SiteModelRegistry(self.tmp.name)
+        self.assertIsNone(registry.get('west'))
+        self.assertEqual(registry.stats()['unknown'], 1)
+        with self.assertRaises(ValueError):
+            registry.get('../north')
+
+    def test_concurrent_first_requests_load_once(self):
+        """Test simultaneous requests for a cold site share one load"""
+        registry = SiteModelRegistry(self.tmp.name)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get('south'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(registry.stats()['load_counts'], {'south': 1})
+        self.assertEqual(len({id(predictor) for _, predictor in results}), 1)
+
+    def test_reload_bumps_version(self):
+        """Test reloading a site loads it again under a new version"""
+        registry = SiteModelRegistry(self.tmp.name, engine='lockstep')
+        version, predictor = registry.get('east')
+        self.assertEqual(predictor.engine, 'lockstep')
+        registry.reload('east')
+        new_version, new_predictor = registry.get('east')
+        self.assertGreater(new_version, version)
+        self.assertIsNot(new_predictor, predictor)
+
+    def test_set_engine_is_all_or_nothing(self):
+        """Test a refused engine leaves every resident site on its old engine"""
+        registry = SiteModelRegistry(self.tmp.name)
+        north = registry.get('north')[1]
+        registry.predictor_factory = lambda: SolarEnergyPredictor(model_format='flat')
+        south = registry.get('south')[1]  # lockstep only
+        state = registry.set_engine('lockstep')
+        with self.assertRaises(ValueError):
+            registry.set_engine('sklearn')
+        self.assertEqual((north.engine, south.engine, registry.engine), ('lockstep', 'lockstep', 'lockstep'))
+
+        registry.restore_engine(state)
+        self.assertEqual((north.engine, registry.engine), ('sklearn', None))
+
+if __name__ == '__main__':
+    unittest.main()
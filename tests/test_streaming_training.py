@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.solar_predictor import SolarEnergyPredictor, iter_training_chunks, FEATURE_COLUMNS, TARGET_COLUMN
+
+class TestStreamingTraining(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Write a multi-chunk history file"""
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp.name, 'history.csv')
+        generator = SolarEnergyPredictor()
+        history = pd.concat([generator.generate_sample_data(1000, seed=seed) for seed in range(5)])
+        history['site'] = 'north'  # extra columns are not read
+        history.to_csv(cls.path, index=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_chunks_are_float32(self):
+        """Test the file is read in bounded float32 chunks of the model columns only"""
+        chunks = list(iter_training_chunks(self.path, chunksize=1500))
+        self.assertEqual([len(chunk) for chunk in chunks], [1500, 1500, 1500, 500])
+        for chunk in chunks:
+            self.assertEqual(list(chunk.columns), FEATURE_COLUMNS + [TARGET_COLUMN])
+            self.assertTrue((chunk.dtypes == np.float32).all())
+
+    def test_train_streaming(self):
+        """Test chunked training keeps the forest at its configured size and learns"""
+        predictor = SolarEnergyPredictor(n_estimators=12, min_samples_leaf=5)
+        mse, r2 = predictor.train_streaming(self.path, chunksize=500, trees_per_chunk=4, save=False)
+
+        stats = predictor.last_training_stats
+        self.assertEqual(stats['mode'], 'streaming')
+        self.assertEqual(stats['chunks'], 10)
+        self.assertEqual(stats['n_estimators'], 12)
+        self.assertEqual(len(predictor.model.estimators_), 12)
+        self.assertGreater(r2, 0.8)
+        self.assertGreater(predictor.predict_energy(25, 60, 3, 20, 600), 0)
+
+    def test_streaming_model_can_be_updated(self):
+        """Test a stream-trained forest can still grow by warm start"""
+        predictor = SolarEnergyPredictor(n_estimators=8)
+        predictor.train_streaming(self.path, chunksize=2000, trees_per_chunk=4, save=False)
+        predictor.update_model(predictor.generate_sample_data(200, seed=7), n_new_estimators=2, save=False)
+        self.assertEqual(len(predictor.model.estimators_), 10)
+
+    def test_empty_file(self):
+        """Test a file without rows is rejected"""
+        path = os.path.join(self.tmp.name, 'empty.csv')
+        pd.DataFrame(columns=FEATURE_COLUMNS + [TARGET_COLUMN]).to_csv(path, index=False)
+        with self.assertRaises(ValueError):
+            SolarEnergyPredictor().train_streaming(path, save=False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.history_store import HistoryStore
+from ml.solar_predictor import SolarEnergyPredictor, iter_training_chunks, FEATURE_COLUMNS
+from ml.synthetic_data import SyntheticDataGenerator
+
+class TestSyntheticData(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.generator = SyntheticDataGenerator(n_sites=3, start='2024-01-15', seed=1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_month_spans_cover_every_row(self):
+        """Test month spans split a site's rows at calendar month boundaries"""
+        months = self.generator.months(2000)
+        self.assertEqual(months[0][1], 0)
+        self.assertEqual(months[-1][2], 2000)
+        self.assertEqual(months[1][1], 17 * 24)  # Jan 15 00:00 to Feb 1 00:00
+        for previous, span in zip(months, months[1:]):
+            self.assertEqual(previous[2], span[1])
+
+    def test_independent_of_processes_and_chunks(self):
+        """Test the same seed gives the same rows whatever the parallelism and chunk size"""
+        serial = os.path.join(self.tmp.name, 'serial')
+        parallel = os.path.join(self.tmp.name, 'parallel')
+        stats = self.generator.write(serial, 3000, processes=1)
+        self.generator.write(parallel, 3000, processes=2, chunk_rows=1000)
+        self.assertEqual(stats['rows'], 9000)
+        expected = HistoryStore(serial).read()
+        pd.testing.assert_frame_equal(HistoryStore(parallel).read(), expected)
+        chunks = pd.concat([chunk for _, chunk in self.generator.iter_chunks(3000, chunk_rows=500)],
+                           ignore_index=True)
+        np.testing.assert_array_equal(chunks['energy_output'], expected['energy_output'])
+        self.assertEqual(HistoryStore(serial).sites(), self.generator.sites)
+
+    def test_diurnal_profile(self):
+        """Test there is no radiation or energy at night and plenty around noon"""
+        generator = SyntheticDataGenerator(n_sites=1, seed=3)
+        site, data = next(generator.iter_chunks(24 * 60))
+        profile = data.groupby(data['timestamp'].dt.hour)['solar_radiation'].mean()
+        self.assertEqual(((data['solar_radiation'] == 0) == (data['energy_output'] == 0)).mean(), 1.0)
+        self.assertGreater((data['solar_radiation'] == 0).mean(), 0.3)
+        self.assertGreater(profile.max(), 200)
+        self.assertTrue((data[FEATURE_COLUMNS].dtypes == np.float32).all())
+
+    def test_csv_output_trains(self):
+        """Test the CSV output streams into training like any history file"""
+        path = os.path.join(self.tmp.name, 'history.csv')
+        self.generator.write(path, 1000, output_format='csv', processes=2, chunk_rows=400)
+        self.assertEqual(sum(len(chunk) for chunk in iter_training_chunks(path, 1000)), 3000)
+        predictor = SolarEnergyPredictor(n_estimators=4)
+        predictor.train_streaming(path, chunksize=1000, save=False)
+        self.assertTrue(predictor.is_trained)
+
+    def test_sample_data_leaves_global_rng_alone(self):
+        """Test generate_sample_data no longer reseeds the global NumPy RNG"""
+        np.random.seed(0)
+        expected = np.random.rand()
+        np.random.seed(0)
+        SolarEnergyPredictor().generate_sample_data(10)
+        self.assertEqual(np.random.rand(), expected)
+
+if __name__ == '__main__':
+    unittest.main()
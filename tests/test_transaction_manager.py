@@ -0,0 +1,126 @@
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import eth_tester
+    from web3 import EthereumTesterProvider
+    from app.web3_helper import Web3Helper
+    HAS_ETH_TESTER = True
+except ImportError:
+    HAS_ETH_TESTER = False
+
+@unittest.skipUnless(HAS_ETH_TESTER, "eth-tester is not installed")
+class TestTransactionPipeline(unittest.TestCase):
+    def setUp(self):
+        """Set up a Web3Helper on an in-process test chain"""
+        provider = EthereumTesterProvider()
+        self.helper = Web3Helper(provider=provider)
+        self.sender, self.recipient = self.helper.w3.eth.accounts[:2]
+        self.private_key = provider.ethereum_tester.backend.account_keys[0].to_hex()
+
+    def send(self):
+        return self.helper.send_transaction(
+            {'from': self.sender, 'to': self.recipient, 'value': 1, 'gas': 21000},
+            self.private_key
+        )
+
+    def test_nonces_are_allocated_locally(self):
+        """Test consecutive submissions get consecutive nonces"""
+        first = self.helper.nonce_manager.next_nonce(self.sender)
+        second = self.helper.nonce_manager.next_nonce(self.sender)
+        self.assertEqual(second, first + 1)
+
+        self.helper.nonce_manager.reset(self.sender)
+        self.assertEqual(self.helper.nonce_manager.next_nonce(self.sender), first)
+
+    def test_receipts_resolved_in_bulk(self):
+        """Test submitted transactions are resolved by a single poll"""
+        tx_hashes = [self.send() for _ in range(3)]
+        for tx_hash in tx_hashes:
+            self.assertEqual(self.helper.get_transaction_status(tx_hash)['status'], 'pending')
+
+        self.assertEqual(self.helper.receipt_poller.poll_once(), 3)
+        for tx_hash in tx_hashes:
+            status = self.helper.get_transaction_status(tx_hash)
+            self.assertEqual(status['status'], 'confirmed')
+            self.assertEqual(status['gas_used'], 21000)
+        self.assertEqual(self.helper.receipt_poller.pending_count, 0)
+
+    def test_failed_send_resets_nonce(self):
+        """Test a rejected transaction is untracked and the nonce resynchronized"""
+        with self.assertRaises(Exception):
+            self.helper.send_transaction(
+                {'from': self.sender, 'to': self.recipient, 'value': 10 ** 30, 'gas': 21000},
+                self.private_key
+            )
+        self.assertEqual(self.helper.receipt_poller.pending_count, 0)
+        self.send()
+        self.helper.receipt_poller.poll_once()
+        self.assertEqual(self.helper.w3.eth.get_transaction_count(self.sender), 1)
+
+    def test_failed_signing_resets_nonce(self):
+        """Test a transaction that can't be signed doesn't leave a nonce gap"""
+        with self.assertRaises(Exception):
+            self.helper.send_transaction(
+                {'from': self.sender, 'to': self.recipient, 'value': 1, 'gas': 21000},
+                '0x' + '00' * 32
+            )
+        self.send()
+        self.helper.receipt_poller.poll_once()
+        self.assertEqual(self.helper.get_transaction_status(self.send())['status'], 'pending')
+        self.assertEqual(self.helper.w3.eth.get_transaction_count(self.sender), 2)
+
+    def test_transient_errors_keep_bulk_receipts(self):
+        """Test only a method-not-found error turns eth_getBlockReceipts off"""
+        poller = self.helper.receipt_poller
+        manager = self.helper.w3.manager
+        real_request = manager.request_blocking
+
+        def timeout(method, params):
+            raise TimeoutError("read timed out")
+        manager.request_blocking = timeout
+        try:
+            self.assertIsNone(poller._get_block_receipts(0))
+            self.assertTrue(poller._block_receipts_supported)
+        finally:
+            manager.request_blocking = real_request
+
+        # eth-tester does not implement the method
+        self.assertIsNone(poller._get_block_receipts(0))
+        self.assertFalse(poller._block_receipts_supported)
+
+    def test_forget_during_poll(self):
+        """Test a transaction forgotten mid-poll doesn't break the stale check"""
+        poller = self.helper.receipt_poller
+        poller.stale_after = 0
+        tx_hash = self.send()
+        poller._last_block = self.helper.w3.eth.block_number  # only the stale lookup can find it
+        real_eth = self.helper.w3.eth
+
+        class ForgettingEth:
+            def __getattr__(self, name):
+                return getattr(real_eth, name)
+
+            @property
+            def block_number(self):
+                poller.forget(tx_hash)
+                return real_eth.block_number
+
+        poller.w3 = SimpleNamespace(eth=ForgettingEth(), manager=self.helper.w3.manager)
+        self.assertEqual(poller.poll_once(), 0)
+        self.assertIsNone(poller.get_status(tx_hash))
+
+    def test_gas_price_is_cached(self):
+        """Test the gas price is only fetched once per refresh interval"""
+        cache = self.helper.gas_price_cache
+        price = cache.get()
+        cache.w3 = None  # any further fetch would fail
+        self.assertEqual(cache.get(), price)
+
+if __name__ == '__main__':
+    unittest.main()
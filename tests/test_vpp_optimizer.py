@@ -0,0 +1,98 @@
+import unittest
+import itertools
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.vpp_optimizer import VPPOptimizer
+
+class TestVPPOptimizer(unittest.TestCase):
+    def setUp(self):
+        """Set up a random day of generation and load for a few prosumers"""
+        rng = np.random.default_rng(1)
+        hours = np.arange(24)
+        sun = np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None)
+        self.generation = sun * rng.uniform(1, 5, (50, 1))
+        self.load = rng.uniform(0.3, 1.5, (50, 24))
+        self.buy = np.where((hours >= 17) & (hours < 21), 0.5, 0.3)
+
+    def test_matches_exhaustive_search(self):
+        """Test the DP finds the cheapest path over the charge levels"""
+        rng = np.random.default_rng(2)
+        optimizer = VPPOptimizer(capacity=4, max_power=2, efficiency=0.81, levels=5)
+        step_gain = 0.9  # one-way efficiency, 1 kWh per level
+        for _ in range(10):
+            generation, load = rng.uniform(0, 3, (1, 5)), rng.uniform(0, 3, (1, 5))
+            buy = rng.uniform(0.1, 0.5, 5)
+            result = optimizer.optimize(generation, load, buy, buy * 0.6)
+
+            best = np.inf
+            for path in itertools.product(range(5), repeat=5):
+                levels = (2,) + path
+                if levels[-1] < 2:
+                    continue  # must end at least as charged as it started
+                moves = np.diff(levels)
+                # 2 kW moves at most 1 level up (1.8 kWh stored) and 2 levels down (1.8 kWh delivered)
+                if (moves > 1).any() or (moves < -2).any():
+                    continue
+                grid = load[0] - generation[0] + np.where(moves > 0, moves / step_gain, moves * step_gain)
+                best = min(best, np.where(grid > 0, buy * grid, buy * 0.6 * grid).sum())
+            self.assertAlmostEqual(result['cost'][0], best, places=4)
+
+    def test_schedules_respect_battery_limits(self):
+        """Test charge stays within capacity and flows within power and efficiency"""
+        optimizer = VPPOptimizer(capacity=5, max_power=2, efficiency=0.9)
+        result = optimizer.optimize(self.generation, self.load, self.buy, 0.1)
+        self.assertTrue((result['soc'] >= -1e-6).all() and (result['soc'] <= 5 + 1e-6).all())
+        self.assertTrue((np.abs(result['battery']) <= 2 + 1e-5).all())
+
+        eta = np.sqrt(0.9)
+        stored = np.diff(np.hstack([np.full((50, 1), 2.5), result['soc']]), axis=1)
+        expected = np.where(result['battery'] > 0, result['battery'] * eta, result['battery'] / eta)
+        np.testing.assert_allclose(stored, expected, atol=1e-4)
+        np.testing.assert_allclose(result['grid'], self.load - self.generation + result['battery'], atol=1e-5)
+
+    def test_beats_greedy_and_no_battery(self):
+        """Test optimal schedules ending as charged as they started beat the greedy rule under the same target"""
+        optimizer = VPPOptimizer(levels=51)
+        optimal = optimizer.optimize(self.generation, self.load, self.buy, 0.1)
+        greedy = optimizer.greedy(self.generation, self.load, self.buy, 0.1)
+        self.assertTrue((optimal['soc'][:, -1] >= 2.5 - 1e-5).all())
+        self.assertTrue((greedy['soc'][:, -1] >= 2.5 - 1e-5).all())
+        self.assertTrue((optimal['cost'] <= optimal['baseline_cost'] + 1e-6).all())
+        self.assertTrue((optimal['cost'] <= greedy['cost'] + 1e-6).all())
+        self.assertLess(optimal['cost'].sum(), greedy['cost'].sum())
+
+    def test_terminal_soc(self):
+        """Test a terminal target below the start lets the battery end lower, and an unreachable one is rejected"""
+        drained = VPPOptimizer(levels=51, terminal_soc=0).optimize(self.generation, self.load, self.buy, 0.1)
+        kept = VPPOptimizer(levels=51).optimize(self.generation, self.load, self.buy, 0.1)
+        self.assertLess(drained['cost'].sum(), kept['cost'].sum())
+        with self.assertRaises(ValueError):
+            VPPOptimizer(max_power=0.1, initial_soc=0, terminal_soc=1).optimize(self.generation, self.load)
+
+    def test_chunks_and_per_prosumer_parameters(self):
+        """Test chunking doesn't change results and parameters can differ per prosumer"""
+        capacity = np.linspace(0, 10, 50)
+        whole = VPPOptimizer(capacity=capacity).optimize(self.generation, self.load, self.buy)
+        chunked = VPPOptimizer(capacity=capacity, chunk_size=7).optimize(self.generation, self.load, self.buy)
+        np.testing.assert_array_equal(whole['battery'], chunked['battery'])
+        # No battery, no change
+        self.assertTrue((whole['battery'][0] == 0).all())
+        self.assertAlmostEqual(whole['cost'][0], whole['baseline_cost'][0])
+
+    def test_rejects_invalid_input(self):
+        """Test mismatched shapes and impossible batteries are rejected"""
+        with self.assertRaises(ValueError):
+            VPPOptimizer().optimize(np.zeros((2, 24)), np.zeros((2, 48)))
+        with self.assertRaises(ValueError):
+            VPPOptimizer(efficiency=1.5)
+        with self.assertRaises(ValueError):
+            VPPOptimizer(initial_soc=2).optimize(np.zeros((1, 24)), np.zeros((1, 24)))
+
+if __name__ == '__main__':
+    unittest.main()